@@ -15,16 +15,20 @@ from utils import (
     buscar_usuario_por_login, criar_usuario, buscar_usuario_por_id,
     buscar_usuario_por_telefone, atualizar_usuario, gerar_nova_senha,
     # Campos
-    carregar_campos, buscar_campo_por_id,
+    buscar_campo_por_id, obter_catalogo_campos,
     # Jogos
-    carregar_jogos, criar_jogo, buscar_jogo_por_id, listar_jogos_por_organizador,
-    listar_jogos_futuros, verificar_conflito_horario, excluir_jogo,
+    carregar_jogos, criar_jogo,
+    listar_jogos_futuros, verificar_conflito_horario, excluir_jogo, criar_serie_jogos,
+    MAX_JOGOS_SERIE,
     # Inscrições
-    criar_inscricao, listar_inscricoes_por_jogo, listar_inscricoes_por_jogador,
+    criar_inscricao, listar_inscricoes_por_jogo,
     atualizar_status_inscricao, remover_jogador_inscricao,
+    atualizar_status_inscricoes_em_lote, remover_jogadores_em_lote,
+    painel_organizador, agenda_jogador,
     # Notificações
     listar_notificacoes_usuario, contar_notificacoes_nao_lidas,
-    marcar_notificacao_lida, marcar_todas_lidas,
+    marcar_notificacao_lida, marcar_todas_lidas, resumir_notificacoes_usuario,
+    CANAL_NOTIFICACOES,
     # Paths
     FOTOS_DIR
 )
@@ -35,15 +39,24 @@ from utils_feed import (
     criar_post, editar_post, excluir_post, listar_posts_usuario,
     listar_feed, buscar_post_por_id, carregar_foto_post,
     # Seguir
-    seguir_usuario, deixar_seguir, esta_seguindo, listar_ids_seguindo,
-    listar_ids_seguidores, contar_seguindo, contar_seguidores,
+    seguir_usuario, deixar_seguir,
     # Curtidas
-    curtir_post, descurtir_post, usuario_curtiu, contar_curtidas,
+    curtir_post, descurtir_post, contar_curtidas,
     # Comentários
-    adicionar_comentario, excluir_comentario, listar_comentarios_post,
-    contar_comentarios
+    adicionar_comentario, excluir_comentario, pagina_comentarios,
+    previa_comentarios, contar_comentarios
 )
 
+# Importa barramento e fila de eventos
+from utils_barramento import assinar, sincronizar, EVENTO_REINICIO
+from utils_eventos import iniciar_trabalhadores
+from utils_metricas import cronometro, medido, iniciar_exportacao
+
+# Importa contexto da sessão
+from utils_sessao import ContextoSessao
+from utils_recomendacoes import recomendar_usuarios
+from utils_geo import listar_locais, geocodificar, buscar_jogos_proximos
+
 
 # ============= CONFIGURAÇÕES DA PÁGINA =============
 
@@ -55,17 +68,32 @@ st.set_page_config(
 
 # ============= CARREGA CSS CUSTOMIZADO =============
 
+@st.cache_data
+def ler_css(caminho: str, modificado_em: float) -> str:
+    """Lê o arquivo CSS (em cache até o arquivo ser modificado)"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
 def carregar_css():
     """Carrega arquivo CSS customizado"""
     try:
-        with open('style.css', 'r', encoding='utf-8') as f:
-            css = f.read()
+        css = ler_css('style.css', os.path.getmtime('style.css'))
         st.markdown(f'<style>{css}</style>', unsafe_allow_html=True)
     except FileNotFoundError:
         pass  # Se não encontrar o arquivo, continua sem CSS
 
 carregar_css()
 
+# Threads que processam notificações em segundo plano (retoma eventos pendentes)
+iniciar_trabalhadores()
+
+# Endpoint/arquivo de métricas, se configurado (JOGOFACIL_METRICAS_PORTA / JOGOFACIL_METRICAS_ARQUIVO)
+iniciar_exportacao()
+
+# Catálogo de campos compartilhado pelas sessões (lido uma vez por processo)
+obter_catalogo_campos()
+
 
 # ============= INICIALIZAÇÃO DO SESSION STATE =============
 
@@ -96,6 +124,7 @@ def salvar_foto_perfil(usuario_id: int, imagem_upload) -> str:
     return ''
 
 
+@medido('jogofacil_imagem_segundos', origem='perfil')
 def carregar_foto_perfil(foto_nome: str):
     """Carrega e exibe foto de perfil"""
     if foto_nome:
@@ -114,13 +143,55 @@ def formatar_data_br(data_str: str) -> str:
         return data_str
 
 
+def obter_contexto() -> ContextoSessao:
+    """Retorna o contexto do usuário logado, criando-o no primeiro acesso da sessão"""
+    usuario = st.session_state.usuario_logado
+    contexto = st.session_state.get('contexto')
+    
+    if contexto is None or contexto.usuario_id != usuario['id']:
+        contexto = ContextoSessao(usuario['id'])
+        st.session_state.contexto = contexto
+    
+    return contexto
+
+
 def logout():
     """Realiza logout do usuário"""
     st.session_state.usuario_logado = None
+    st.session_state.contexto = None
     st.session_state.pagina_atual = 'login'
     st.rerun()
 
 
+@st.cache_resource
+def assinar_contadores_notificacoes() -> dict:
+    """
+    Assina o canal de notificações uma única vez por processo e mantém em
+    memória o total de não lidas de cada usuário, atualizado pelos eventos
+    """
+    contadores = {}
+    
+    def ao_receber(evento):
+        if evento == EVENTO_REINICIO:
+            contadores.clear()  # Eventos podem ter sido perdidos: recarrega sob demanda
+        else:
+            contadores[evento['usuario_id']] = evento['nao_lidas']
+    
+    assinar(CANAL_NOTIFICACOES, ao_receber)
+    return contadores
+
+
+def contar_notificacoes_badge(usuario_id: int) -> int:
+    """Total de não lidas para o aviso da sidebar, sem ler o disco quando nada mudou"""
+    contadores = assinar_contadores_notificacoes()
+    sincronizar()  # Eventos de outros processos
+    
+    if usuario_id not in contadores:
+        contadores[usuario_id] = contar_notificacoes_nao_lidas(usuario_id)
+    
+    return contadores[usuario_id]
+
+
 def gerar_horarios_30min():
     """Gera lista de horários de 30 em 30 minutos"""
     horarios = []
@@ -222,7 +293,7 @@ def mostrar_sidebar():
         st.markdown(f"<h4 style='text-align: center;'>{usuario.get('apelido_jogador') or usuario.get('login')}</h4>", unsafe_allow_html=True)
         
         # Notificações
-        num_notificacoes = contar_notificacoes_nao_lidas(usuario['id'])
+        num_notificacoes = contar_notificacoes_badge(usuario['id'])
         if num_notificacoes > 0:
             st.warning(f"{num_notificacoes} Você tem notificação nova!")
         
@@ -282,7 +353,6 @@ def pagina_perfil():
                 if nome_foto:
                     atualizar_usuario(usuario['id'], {'foto': nome_foto})
                     st.success("Foto atualizada!")
-                    st.session_state.usuario_logado = buscar_usuario_por_id(usuario['id'])
                     st.rerun()
     
     with col2:
@@ -313,7 +383,6 @@ def pagina_perfil():
                 
                 if atualizar_usuario(usuario['id'], dados_atualizados):
                     st.success("Perfil atualizado com sucesso!")
-                    st.session_state.usuario_logado = buscar_usuario_por_id(usuario['id'])
                     st.rerun()
                 else:
                     st.error("Erro ao atualizar perfil!")
@@ -335,10 +404,8 @@ def pagina_organizador():
     with tab_criar:
         st.subheader("Organizar Novo Jogo")
         
-        campos = carregar_campos()
-        
         # Select box de campos FORA do form para atualizar dinamicamente
-        opcoes_campos = {f"{c['nome']} - {c['formato']} ({c['tipo']})": c['id'] for c in campos}
+        opcoes_campos = obter_catalogo_campos().rotulos
         campo_selecionado = st.selectbox("Campo", options=list(opcoes_campos.keys()))
         campo_id = opcoes_campos[campo_selecionado]
         
@@ -361,6 +428,13 @@ def pagina_organizador():
             
             vagas = st.number_input("Número de Vagas", min_value=1, max_value=campo_info['jogadores_por_time']*5, value=campo_info['jogadores_por_time']*3)
             
+            # Série de jogos: mesmo campo e horário toda semana ou a cada duas semanas
+            col_rep1, col_rep2 = st.columns(2)
+            with col_rep1:
+                repeticao = st.selectbox("Repetição", ["Não repetir", "Semanal", "Quinzenal"])
+            with col_rep2:
+                repetir_ate = st.date_input("Repetir até", value=date.today() + timedelta(weeks=8), min_value=date.today())
+            
             submit = st.form_submit_button("Criar Jogo", use_container_width=True)
             
             if submit:
@@ -374,6 +448,34 @@ def pagina_organizador():
                 
                 if hora_fim_time <= hora_inicio_time:
                     st.error("O horário de término deve ser após o horário de início!")
+                elif repeticao != "Não repetir":
+                    serie = criar_serie_jogos(
+                        organizador_id=usuario['id'],
+                        campo_id=campo_id,
+                        data_inicial=data_str,
+                        data_final=repetir_ate.strftime("%Y-%m-%d"),
+                        hora_inicio=hora_inicio_str,
+                        hora_fim=hora_fim_str,
+                        valor=valor,
+                        vagas=vagas,
+                        frequencia=repeticao.lower()
+                    )
+                    
+                    if serie['erro']:
+                        st.error(serie['erro'])
+                    
+                    if serie['excedentes']:
+                        st.warning(f"⚠️ A série foi limitada a {MAX_JOGOS_SERIE} jogos: "
+                                   f"{len(serie['excedentes'])} data(s) a partir de {formatar_data_br(serie['excedentes'][0])} não foram criadas")
+                    
+                    if serie['conflitos']:
+                        datas_conflito = ", ".join(formatar_data_br(d) for d in serie['conflitos'])
+                        st.warning(f"⚠️ Campo ocupado nestas datas (não criadas): {datas_conflito}")
+                    
+                    if serie['jogos']:
+                        st.success(f"✅ {len(serie['jogos'])} jogo(s) criado(s)!")
+                    elif not serie['erro']:
+                        st.error("Nenhum jogo foi criado!")
                 elif verificar_conflito_horario(campo_id, data_str, hora_inicio_str, hora_fim_str):
                     st.error("⚠️ Este campo já está ocupado neste horário!")
                 else:
@@ -397,13 +499,26 @@ def pagina_organizador():
     with tab_meus_jogos:
         st.subheader("Jogos que Organizei")
         
-        meus_jogos = listar_jogos_por_organizador(usuario['id'])
+        painel = painel_organizador(usuario['id'])
+        meus_jogos = painel['jogos']
         
         if not meus_jogos:
             st.info("Você ainda não organizou nenhum jogo.")
         else:
+            # Resumo de todos os jogos
+            totais = painel['totais']
+            col_t1, col_t2, col_t3, col_t4 = st.columns(4)
+            with col_t1:
+                st.metric("⚽ Jogos", totais['jogos'])
+            with col_t2:
+                st.metric("📊 Ocupação", f"{totais['taxa_ocupacao']:.0%}")
+            with col_t3:
+                st.metric("⏳ Pendentes", totais['pendentes'])
+            with col_t4:
+                st.metric("💰 Receita", f"R$ {totais['receita']:.2f}")
+            
             for jogo in meus_jogos:
-                campo = buscar_campo_por_id(jogo['campo_id'])
+                campo = jogo['campo']
                 
                 with st.expander(f"⚽ {campo['nome']} - {formatar_data_br(jogo['data'])} às {jogo['hora_inicio']}"):
                     col1, col2, col3 = st.columns(3)
@@ -415,10 +530,11 @@ def pagina_organizador():
                     with col2:
                         st.write(f"**Campo:** {campo['nome']}")
                         st.write(f"**Valor:** R$ {jogo['valor']:.2f}")
+                        st.write(f"**Receita:** R$ {jogo['receita']:.2f}")
                     
                     with col3:
-                        vagas_disponiveis = jogo['vagas_total'] - jogo['vagas_ocupadas']
-                        st.write(f"**Vagas:** {jogo['vagas_ocupadas']}/{jogo['vagas_total']}")
+                        vagas_disponiveis = jogo['vagas_disponiveis']
+                        st.write(f"**Vagas:** {jogo['vagas_ocupadas']}/{jogo['vagas_total']} ({jogo['taxa_ocupacao']:.0%})")
                         
                         if vagas_disponiveis == 0:
                             st.success("🎉 Lotado!")
@@ -428,25 +544,24 @@ def pagina_organizador():
                     st.divider()
                     
                     # Inscrições pendentes
-                    inscricoes_pendentes = listar_inscricoes_por_jogo(jogo['id'], 'pendente')
+                    inscricoes_pendentes = jogo['pendentes']
                     
                     if inscricoes_pendentes:
                         st.write("**⏳ Solicitações Pendentes:**")
                         
                         for inscricao in inscricoes_pendentes:
-                            jogador = buscar_usuario_por_id(inscricao['jogador_id'])
+                            jogador = inscricao['jogador']
                             
                             col_a, col_b, col_c = st.columns([2, 1, 1])
                             
                             with col_a:
-                                nome_jogador = jogador.get('apelido_jogador') or jogador.get('nome') or jogador.get('login')
-                                st.write(f"👤 {nome_jogador}")
+                                st.write(f"👤 {inscricao['nome_jogador']}")
                                 st.caption(f"Tel: {jogador.get('telefone', 'N/A')}")
                             
                             with col_b:
                                 if st.button("✅ Aprovar", key=f"aprovar_{inscricao['id']}"):
-                                    if jogo['vagas_ocupadas'] < jogo['vagas_total']:
-                                        atualizar_status_inscricao(inscricao['id'], 'aprovada')
+                                    # A checagem de vaga e a aprovação acontecem juntas
+                                    if atualizar_status_inscricao(inscricao['id'], 'aprovada'):
                                         st.success("Aprovado!")
                                         st.rerun()
                                     else:
@@ -457,28 +572,65 @@ def pagina_organizador():
                                     atualizar_status_inscricao(inscricao['id'], 'reprovada')
                                     st.success("Recusado!")
                                     st.rerun()
+                        
+                        # Ações em lote: uma única gravação para todos os selecionados
+                        if len(inscricoes_pendentes) > 1:
+                            nomes_pendentes = {i['id']: i['nome_jogador'] for i in inscricoes_pendentes}
+                            selecionadas = st.multiselect(
+                                "Selecionar solicitações",
+                                options=list(nomes_pendentes),
+                                format_func=nomes_pendentes.get,
+                                key=f"lote_pendentes_{jogo['id']}"
+                            )
+                            
+                            col_lote_a, col_lote_b = st.columns(2)
+                            with col_lote_a:
+                                if st.button("✅ Aprovar selecionados", key=f"aprovar_lote_{jogo['id']}", disabled=not selecionadas):
+                                    resultado = atualizar_status_inscricoes_em_lote(selecionadas, 'aprovada')
+                                    aprovados = sum(resultado.values())
+                                    if aprovados < len(selecionadas):
+                                        st.warning(f"{aprovados} aprovado(s); os demais ficaram sem vaga.")
+                                    else:
+                                        st.success(f"{aprovados} aprovado(s)!")
+                                    st.rerun()
+                            with col_lote_b:
+                                if st.button("❌ Recusar selecionados", key=f"recusar_lote_{jogo['id']}", disabled=not selecionadas):
+                                    atualizar_status_inscricoes_em_lote(selecionadas, 'reprovada')
+                                    st.success("Recusados!")
+                                    st.rerun()
                     
                     # Jogadores aprovados
-                    inscricoes_aprovadas = listar_inscricoes_por_jogo(jogo['id'], 'aprovada')
+                    inscricoes_aprovadas = jogo['aprovadas']
                     
                     if inscricoes_aprovadas:
                         st.write("**✅ Jogadores Confirmados:**")
                         
                         # Enumera de baixo para cima (inverte a lista)
                         for idx, inscricao in enumerate(reversed(inscricoes_aprovadas), 1):
-                            jogador = buscar_usuario_por_id(inscricao['jogador_id'])
-                            
                             col_a, col_b = st.columns([3, 1])
                             
                             with col_a:
-                                nome_jogador = jogador.get('apelido_jogador') or jogador.get('nome') or jogador.get('login')
-                                st.write(f"{idx}. {nome_jogador}")
+                                st.write(f"{idx}. {inscricao['nome_jogador']}")
                             
                             with col_b:
                                 if st.button("🗑️ Remover", key=f"remover_{inscricao['id']}"):
                                     remover_jogador_inscricao(inscricao['id'])
                                     st.success("Jogador removido!")
                                     st.rerun()
+                        
+                        if len(inscricoes_aprovadas) > 1:
+                            nomes_aprovados = {i['id']: i['nome_jogador'] for i in inscricoes_aprovadas}
+                            selecionadas = st.multiselect(
+                                "Selecionar jogadores",
+                                options=list(nomes_aprovados),
+                                format_func=nomes_aprovados.get,
+                                key=f"lote_aprovados_{jogo['id']}"
+                            )
+                            
+                            if st.button("🗑️ Remover selecionados", key=f"remover_lote_{jogo['id']}", disabled=not selecionadas):
+                                remover_jogadores_em_lote(selecionadas)
+                                st.success("Jogadores removidos!")
+                                st.rerun()
                     
                     # Botão para excluir jogo
                     st.divider()
@@ -497,6 +649,9 @@ def pagina_jogador():
     
     usuario = st.session_state.usuario_logado
     
+    # Inscrições do jogador já com jogo, campo e organizador
+    agenda = agenda_jogador(usuario['id'])
+    
     st.title("⚽ Encontrar Jogos")
     
     # Tabs
@@ -513,12 +668,23 @@ def pagina_jogador():
         with col2:
             data_final = st.date_input("Até:", value=date.today() + timedelta(days=30))
         
+        # Filtro de distância (regiões da tabela local de geocodificação)
+        col_local, col_raio = st.columns(2)
+        with col_local:
+            regiao = st.selectbox("📍 Perto de:", ["Qualquer lugar"] + listar_locais())
+        with col_raio:
+            raio_km = st.slider("Distância máxima (km)", min_value=1, max_value=50, value=10, disabled=regiao == "Qualquer lugar")
+        
         data_inicial_str = data_inicial.strftime("%Y-%m-%d")
         data_final_str = data_final.strftime("%Y-%m-%d")
         
         # Lista jogos
-        jogos = listar_jogos_futuros(data_inicial_str)
-        jogos_filtrados = [j for j in jogos if j['data'] <= data_final_str]
+        if regiao != "Qualquer lugar":
+            lat, lon = geocodificar(regiao)
+            jogos_filtrados = buscar_jogos_proximos(lat, lon, raio_km, data_inicial_str, data_final_str)
+        else:
+            jogos = listar_jogos_futuros(data_inicial_str)
+            jogos_filtrados = [j for j in jogos if j['data'] <= data_final_str]
         
         if not jogos_filtrados:
             st.info("Nenhum jogo disponível neste período.")
@@ -538,6 +704,8 @@ def pagina_jogador():
                     with col1:
                         st.write(f"### ⚽ {campo['nome']}")
                         st.write(f"📍 {campo['endereco']}")
+                        if 'distancia_km' in jogo:
+                            st.caption(f"🧭 {jogo['distancia_km']:.1f} km de {regiao}")
                         st.write(f"📏 {campo['formato']} - {campo['tipo']}")
                     
                     with col2:
@@ -592,8 +760,7 @@ def pagina_jogador():
                             st.write("\n".join(nomes_pendentes))
                         
                         # Verifica se usuário já se inscreveu
-                        minhas_inscricoes = listar_inscricoes_por_jogador(usuario['id'])
-                        ja_inscrito = any(i['jogo_id'] == jogo['id'] and i['status'] in ['pendente', 'aprovada'] for i in minhas_inscricoes)
+                        ja_inscrito = jogo['id'] in agenda['jogos_inscritos']
                         
                         col_btn1, col_btn2 = st.columns(2)
                         
@@ -609,7 +776,14 @@ def pagina_jogador():
                             elif ja_inscrito:
                                 st.info("Você já está inscrito neste jogo")
                             else:
-                                st.warning("Sem vagas disponíveis")
+                                # Lotado: o pedido entra na fila e é aprovado quando abrir vaga
+                                if st.button("⏳ Entrar na fila de espera", key=f"fila_{jogo['id']}", use_container_width=True):
+                                    inscricao = criar_inscricao(jogo['id'], usuario['id'])
+                                    if inscricao:
+                                        st.success("✅ Você entrou na fila de espera! Se abrir uma vaga, sua inscrição é aprovada automaticamente.")
+                                        st.rerun()
+                                    else:
+                                        st.error("Você já está inscrito neste jogo!")
                         
                         with col_btn2:
                             if st.button("Fechar", key=f"fechar_{jogo['id']}", use_container_width=True):
@@ -620,25 +794,24 @@ def pagina_jogador():
     with tab_meus_jogos:
         st.subheader("Minhas Inscrições")
         
-        minhas_inscricoes = listar_inscricoes_por_jogador(usuario['id'])
+        pendentes = agenda['pendente']
+        aprovadas = agenda['aprovada']
         
-        if not minhas_inscricoes:
+        if not pendentes and not aprovadas:
             st.info("Você não está inscrito em nenhum jogo.")
         else:
-            # Separa por status
-            pendentes = [i for i in minhas_inscricoes if i['status'] == 'pendente']
-            aprovadas = [i for i in minhas_inscricoes if i['status'] == 'aprovada']
-            
             if pendentes:
                 st.write("### ⏳ Aguardando Aprovação")
                 for inscricao in pendentes:
-                    jogo = buscar_jogo_por_id(inscricao['jogo_id'])
-                    campo = buscar_campo_por_id(jogo['campo_id'])
+                    jogo = inscricao['jogo']
+                    campo = inscricao['campo']
                     
                     col1, col2 = st.columns([3, 1])
                     
                     with col1:
                         st.write(f"⚽ **{campo['nome']}** - {formatar_data_br(jogo['data'])} às {jogo['hora_inicio']}")
+                        if inscricao.get('posicao_fila'):
+                            st.caption(f"⏳ Fila de espera: {inscricao['posicao_fila']}º")
                     
                     with col2:
                         if st.button("❌ Cancelar", key=f"cancelar_{inscricao['id']}"):
@@ -649,8 +822,8 @@ def pagina_jogador():
             if aprovadas:
                 st.write("### ✅ Confirmadas")
                 for inscricao in aprovadas:
-                    jogo = buscar_jogo_por_id(inscricao['jogo_id'])
-                    campo = buscar_campo_por_id(jogo['campo_id'])
+                    jogo = inscricao['jogo']
+                    campo = inscricao['campo']
                     
                     col1, col2 = st.columns([3, 1])
                     
@@ -681,6 +854,9 @@ def pagina_notificacoes():
     else:
         col1, col2 = st.columns([3, 1])
         
+        with col1:
+            modo_resumo = st.toggle("Modo resumo", key="notificacoes_modo_resumo")
+        
         with col2:
             if st.button("Marcar todas como lidas"):
                 marcar_todas_lidas(usuario['id'])
@@ -688,6 +864,18 @@ def pagina_notificacoes():
         
         st.divider()
         
+        if modo_resumo:
+            resumo = resumir_notificacoes_usuario(usuario['id'])
+            
+            if not resumo:
+                st.info("Nenhuma notificação nova.")
+            
+            for item in resumo:
+                st.write(f"🔴 **{item['rotulo']}:** {item['total']}")
+                st.caption(item['mais_recente'])
+                st.divider()
+            return
+        
         for notif in notificacoes:
             with st.container():
                 col_msg, col_btn = st.columns([4, 1])
@@ -700,7 +888,7 @@ def pagina_notificacoes():
                 with col_btn:
                     if not notif.get('lida'):
                         if st.button("✓", key=f"ler_{notif['id']}"):
-                            marcar_notificacao_lida(notif['id'])
+                            marcar_notificacao_lida(notif['id'], usuario['id'])
                             st.rerun()
                 
                 st.divider()
@@ -712,6 +900,7 @@ def pagina_feed():
     """Página do feed social"""
     
     usuario = st.session_state.usuario_logado
+    contexto = obter_contexto()
     
     st.title("📱 Feed Social")
     
@@ -775,14 +964,16 @@ def pagina_feed():
         # Estatísticas
         col_stat1, col_stat2 = st.columns(2)
         with col_stat1:
-            st.metric("👥 Seguindo", contar_seguindo(usuario['id']))
+            st.metric("👥 Seguindo", len(contexto.seguindo))
         with col_stat2:
-            st.metric("❤️ Seguidores", contar_seguidores(usuario['id']))
+            st.metric("❤️ Seguidores", len(contexto.seguidores))
         
         st.divider()
         
-        # Sub-tabs para Buscar, Seguindo e Seguidores
-        subtab_buscar, subtab_seguindo, subtab_seguidores = st.tabs(["🔍 Buscar", "👥 Seguindo", "❤️ Seguidores"])
+        # Sub-tabs para Buscar, Sugestões, Seguindo e Seguidores
+        subtab_buscar, subtab_sugestoes, subtab_seguindo, subtab_seguidores = st.tabs(
+            ["🔍 Buscar", "✨ Sugestões", "👥 Seguindo", "❤️ Seguidores"]
+        )
         
         # Buscar jogadores
         with subtab_buscar:
@@ -817,7 +1008,7 @@ def pagina_feed():
                             st.write(f"👤 **{nome}**")
                         
                         with col_btn:
-                            if esta_seguindo(usuario['id'], user['id']):
+                            if contexto.segue(user['id']):
                                 if st.button("✓ Seguindo", key=f"seguindo_{user['id']}", type="secondary"):
                                     deixar_seguir(usuario['id'], user['id'])
                                     st.rerun()
@@ -827,15 +1018,44 @@ def pagina_feed():
                                     st.success(f"Agora você segue {nome}!")
                                     st.rerun()
         
+        # Sugestões de quem seguir
+        with subtab_sugestoes:
+            st.write("### Quem seguir")
+            
+            sugestoes = recomendar_usuarios(usuario['id'])
+            
+            if not sugestoes:
+                st.info("Siga alguns jogadores ou participe de jogos para receber sugestões.")
+            else:
+                for sugestao in sugestoes:
+                    user = buscar_usuario_por_id(sugestao['usuario_id'])
+                    if user:
+                        col_user, col_btn = st.columns([3, 1])
+                        
+                        with col_user:
+                            nome = user.get('apelido_jogador') or user.get('nome') or user.get('login')
+                            st.write(f"👤 **{nome}**")
+                            
+                            motivos = []
+                            if sugestao['amigos_em_comum']:
+                                motivos.append(f"{sugestao['amigos_em_comum']} amigo(s) em comum")
+                            if sugestao['jogos_em_comum']:
+                                motivos.append(f"jogou com você {sugestao['jogos_em_comum']} vez(es)")
+                            st.caption(" • ".join(motivos))
+                        
+                        with col_btn:
+                            if st.button("+ Seguir", key=f"sugestao_{user['id']}", type="primary"):
+                                seguir_usuario(usuario['id'], user['id'])
+                                st.success(f"Agora você segue {nome}!")
+                                st.rerun()
+        
         # Seguindo
         with subtab_seguindo:
-            seguindo_ids = listar_ids_seguindo(usuario['id'])
+            seguindo_ids = sorted(contexto.seguindo)
             
             if not seguindo_ids:
                 st.info("Você não está seguindo ninguém ainda.")
             else:
-                from utils import buscar_usuario_por_id
-                
                 for user_id in seguindo_ids:
                     user = buscar_usuario_por_id(user_id)
                     if user:
@@ -853,13 +1073,11 @@ def pagina_feed():
         
         # Seguidores
         with subtab_seguidores:
-            seguidores_ids = listar_ids_seguidores(usuario['id'])
+            seguidores_ids = sorted(contexto.seguidores)
             
             if not seguidores_ids:
                 st.info("Você ainda não tem seguidores.")
             else:
-                from utils import buscar_usuario_por_id
-                
                 for user_id in seguidores_ids:
                     user = buscar_usuario_por_id(user_id)
                     if user:
@@ -871,7 +1089,7 @@ def pagina_feed():
                         
                         with col_btn:
                             # Verifica se você também segue essa pessoa
-                            if esta_seguindo(usuario['id'], user_id):
+                            if contexto.segue(user_id):
                                 st.caption("✓ Seguindo também")
                             else:
                                 if st.button("+ Seguir de volta", key=f"seguir_volta_{user_id}"):
@@ -883,8 +1101,6 @@ def pagina_feed():
 def exibir_post(post, usuario_logado_id, exibir_acoes_autor=False, prefixo_key="post"):
     """Exibe um post com curtidas e comentários"""
     
-    from utils import buscar_usuario_por_id
-    
     autor = buscar_usuario_por_id(post['usuario_id'])
     nome_autor = autor.get('apelido_jogador') or autor.get('nome') or autor.get('login')
     
@@ -957,7 +1173,7 @@ def exibir_post(post, usuario_logado_id, exibir_acoes_autor=False, prefixo_key="
         col_curtir, col_comentar = st.columns([1, 5])
         
         num_curtidas = contar_curtidas(post['id'])
-        curtiu = usuario_curtiu(post['id'], usuario_logado_id)
+        curtiu = obter_contexto().curtiu(post['id'])
         
         with col_curtir:
             if curtiu:
@@ -976,8 +1192,14 @@ def exibir_post(post, usuario_logado_id, exibir_acoes_autor=False, prefixo_key="
                     st.session_state.post_comentarios_id = None
                 else:
                     st.session_state.post_comentarios_id = post['id']
+                    st.session_state.comentarios_carregados = None
                 st.rerun()
         
+        # Prévia dos últimos comentários (vem do resumo do post, sem abrir a lista)
+        if st.session_state.get('post_comentarios_id') != post['id'] and num_comentarios > 0:
+            for comentario in previa_comentarios(post['id']):
+                st.caption(f"**{comentario['nome_autor']}:** {comentario['texto']}")
+        
         # Seção de comentários
         if st.session_state.get('post_comentarios_id') == post['id']:
             st.write("---")
@@ -990,21 +1212,25 @@ def exibir_post(post, usuario_logado_id, exibir_acoes_autor=False, prefixo_key="
                 
                 if submit_comentario and texto_comentario:
                     adicionar_comentario(post['id'], usuario_logado_id, texto_comentario)
+                    # Com a lista toda à vista, o novo comentário (o último) entra nela
+                    carregados = st.session_state.get('comentarios_carregados')
+                    if carregados is not None and len(carregados) >= num_comentarios:
+                        carregados.extend(pagina_comentarios(post['id'], inicio=len(carregados))['comentarios'])
                     st.success("Comentário adicionado!")
                     st.rerun()
             
-            # Lista comentários
-            comentarios = listar_comentarios_post(post['id'])
+            # Lista comentários, uma página por vez (autores buscados de uma vez).
+            # As páginas já lidas ficam na sessão; "ver mais" busca só a seguinte
+            if st.session_state.get('comentarios_carregados') is None:
+                st.session_state.comentarios_carregados = pagina_comentarios(post['id'])['comentarios']
+            comentarios = st.session_state.comentarios_carregados
             
             if comentarios:
                 for comentario in comentarios:
-                    autor_coment = buscar_usuario_por_id(comentario['usuario_id'])
-                    nome_autor_coment = autor_coment.get('apelido_jogador') or autor_coment.get('nome') or autor_coment.get('login')
-                    
                     col_coment, col_del_coment = st.columns([5, 1])
                     
                     with col_coment:
-                        st.write(f"**{nome_autor_coment}:** {comentario['texto']}")
+                        st.write(f"**{comentario['nome_autor']}:** {comentario['texto']}")
                         data_coment = datetime.strptime(comentario['data'], "%Y-%m-%d %H:%M:%S")
                         st.caption(data_coment.strftime("%d/%m/%Y %H:%M"))
                     
@@ -1012,8 +1238,15 @@ def exibir_post(post, usuario_logado_id, exibir_acoes_autor=False, prefixo_key="
                         # Pode excluir se for seu comentário OU se for dono do post
                         if comentario['usuario_id'] == usuario_logado_id or post['usuario_id'] == usuario_logado_id:
                             if st.button("🗑️", key=f"{prefixo_key}_del_coment_{comentario['id']}"):
-                                excluir_comentario(comentario['id'])
+                                if excluir_comentario(comentario['id'], post['id']):
+                                    comentarios.remove(comentario)
                                 st.rerun()
+                
+                restantes = num_comentarios - len(comentarios)
+                if restantes > 0:
+                    if st.button(f"Ver mais comentários ({restantes})", key=f"{prefixo_key}_mais_coment_{post['id']}"):
+                        comentarios.extend(pagina_comentarios(post['id'], inicio=len(comentarios))['comentarios'])
+                        st.rerun()
             else:
                 st.info("Seja o primeiro a comentar!")
 
@@ -1027,20 +1260,26 @@ def main():
     if not st.session_state.usuario_logado:
         tela_login()
     else:
+        # Mantém a cópia do usuário em dia com o contexto da sessão
+        st.session_state.usuario_logado = obter_contexto().usuario
+        if not st.session_state.usuario_logado:
+            logout()
+        
         # Mostra sidebar
         mostrar_sidebar()
         
-        # Roteamento de páginas
-        if st.session_state.pagina_atual == 'perfil':
-            pagina_perfil()
-        elif st.session_state.pagina_atual == 'feed':
-            pagina_feed()
-        elif st.session_state.pagina_atual == 'organizador':
-            pagina_organizador()
-        elif st.session_state.pagina_atual == 'jogador':
-            pagina_jogador()
-        elif st.session_state.pagina_atual == 'notificacoes':
-            pagina_notificacoes()
+        # Roteamento de páginas (com o tempo de renderização de cada uma)
+        with cronometro('jogofacil_pagina_segundos', pagina=st.session_state.pagina_atual):
+            if st.session_state.pagina_atual == 'perfil':
+                pagina_perfil()
+            elif st.session_state.pagina_atual == 'feed':
+                pagina_feed()
+            elif st.session_state.pagina_atual == 'organizador':
+                pagina_organizador()
+            elif st.session_state.pagina_atual == 'jogador':
+                pagina_jogador()
+            elif st.session_state.pagina_atual == 'notificacoes':
+                pagina_notificacoes()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,6 @@
+"""
+Benchmarks do JogoFácil: gerador de dados sintéticos e medição dos caminhos quentes
+Executar a partir da raiz do projeto:
+    python -m benchmarks.gerar_dados --escala pequena
+    python -m benchmarks.executar --escala pequena
+"""
@@ -0,0 +1,449 @@
+"""
+Teste de carga de dia de jogo
+Vários processos (cada um com várias threads, como um servidor do Streamlit)
+executam ao mesmo tempo uma mistura de ações reais direto nas APIs de
+utils/utils_feed: inscrever em jogo, aprovar, curtir, comentar, seguir e ler
+notificações. Opcionalmente, outros processos usam o app.py pelo AppTest.
+No fim, mede vazão e latências (p50/p99) e confere a integridade dos dados:
+curtidas, comentários, inscrições, aprovações e seguidores que sumiram, ids
+duplicados e vagas_ocupadas fora de sincronia com as inscrições aprovadas
+    python -m benchmarks.carga --processos 4 --threads 4 --duracao 20
+    python -m benchmarks.carga --processos 4 --sessoes-apptest 2
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.gerar_dados import ESCALAS, SEMENTE_PADRAO, gerar_dados
+from benchmarks.executar import commit_atual
+
+import utils
+import utils_feed
+import utils_curtidas
+from utils_eventos import aguardar_eventos
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Peso de cada ação na mistura (proporcional, não precisa somar 100)
+MISTURA_PADRAO = {
+    'inscrever': 25,
+    'aprovar': 10,
+    'curtir': 25,
+    'comentar': 15,
+    'seguir': 10,
+    'ler_notificacoes': 15,
+}
+
+MAX_EXEMPLOS = 10  # exemplos guardados por tipo de violação
+
+
+# ============= AÇÕES =============
+# Cada ação retorna o efeito que deveria ficar gravado (ou None), para a
+# verificação de integridade no fim
+
+def _inscrever(ids: Dict, rng: random.Random, marca: str) -> Optional[Tuple]:
+    jogo_id, jogador_id = rng.choice(ids['jogos']), rng.choice(ids['usuarios'])
+    if utils.criar_inscricao(jogo_id, jogador_id):
+        return ('inscricao', (jogo_id, jogador_id))
+    return None
+
+
+def _aprovar(ids: Dict, rng: random.Random, marca: str) -> Optional[Tuple]:
+    pendentes = utils.listar_inscricoes_por_jogo(rng.choice(ids['jogos']), 'pendente')
+    if pendentes:
+        inscricao = rng.choice(pendentes)
+        if utils.atualizar_status_inscricao(inscricao['id'], 'aprovada'):
+            return ('aprovacao', inscricao['id'])
+    return None
+
+
+def _curtir(ids: Dict, rng: random.Random, marca: str) -> Optional[Tuple]:
+    post_id, usuario_id = rng.choice(ids['posts']), rng.choice(ids['usuarios'])
+    if utils_feed.curtir_post(post_id, usuario_id):
+        return ('curtida', (post_id, usuario_id))
+    return None
+
+
+def _comentar(ids: Dict, rng: random.Random, marca: str) -> Optional[Tuple]:
+    if utils_feed.adicionar_comentario(rng.choice(ids['posts']), rng.choice(ids['usuarios']), marca):
+        return ('comentario', marca)
+    return None
+
+
+def _seguir(ids: Dict, rng: random.Random, marca: str) -> Optional[Tuple]:
+    seguidor_id, seguido_id = rng.choice(ids['usuarios']), rng.choice(ids['usuarios'])
+    if utils_feed.seguir_usuario(seguidor_id, seguido_id):
+        return ('seguindo', (seguidor_id, seguido_id))
+    return None
+
+
+def _ler_notificacoes(ids: Dict, rng: random.Random, marca: str) -> Optional[Tuple]:
+    usuario_id = rng.choice(ids['usuarios'])
+    utils.listar_notificacoes_usuario(usuario_id)
+    utils.marcar_todas_lidas(usuario_id)
+    return None
+
+
+ACOES = {
+    'inscrever': _inscrever,
+    'aprovar': _aprovar,
+    'curtir': _curtir,
+    'comentar': _comentar,
+    'seguir': _seguir,
+    'ler_notificacoes': _ler_notificacoes,
+}
+
+
+# ============= PROCESSOS DE CARGA =============
+
+def _novo_resultado() -> Dict:
+    return {'latencias': {}, 'erros': Counter(), 'efeitos': []}
+
+
+def _executar_threads(threads: int, alvo) -> List[Dict]:
+    """Executa alvo(indice, resultado) em várias threads e junta os resultados"""
+    resultados = [_novo_resultado() for _ in range(threads)]
+    lista = [threading.Thread(target=alvo, args=(i, resultados[i])) for i in range(threads)]
+    for t in lista:
+        t.start()
+    for t in lista:
+        t.join()
+    return resultados
+
+
+def _processo_api(trabalho: str, ids: Dict, mistura: Dict[str, int], threads: int,
+                  inicio: float, duracao: float, semente: int) -> List[Dict]:
+    """Processo de carga: threads sorteiam ações da mistura até o fim da duração"""
+    os.chdir(trabalho)
+    nomes, pesos = list(mistura), list(mistura.values())
+
+    def trabalhar(indice: int, resultado: Dict):
+        rng = random.Random(semente * 1000 + indice)
+        time.sleep(max(inicio - time.time(), 0))
+        fim = time.time() + duracao
+        n = 0
+        while time.time() < fim:
+            acao = rng.choices(nomes, pesos)[0]
+            marca = f"carga-{semente}-{indice}-{n}"
+            n += 1
+            comeco = time.perf_counter()
+            try:
+                efeito = ACOES[acao](ids, rng, marca)
+            except Exception as e:
+                resultado['erros'][f"{acao}: {type(e).__name__}: {e}"] += 1
+                efeito = None
+            resultado['latencias'].setdefault(acao, []).append(time.perf_counter() - comeco)
+            if efeito:
+                resultado['efeitos'].append(efeito)
+
+    resultados = _executar_threads(threads, trabalhar)
+    aguardar_eventos()  # notificações dos tratadores assíncronos
+    return resultados
+
+
+def _processo_apptest(trabalho: str, ids: Dict, inicio: float, duracao: float, semente: int) -> List[Dict]:
+    """Processo de carga pelo AppTest: uma sessão logada navegando e curtindo no feed"""
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(trabalho)
+    rng = random.Random(semente)
+    resultado = _novo_resultado()
+
+    usuario = utils.buscar_usuario_por_id(rng.choice(ids['usuarios']))
+    at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=120)
+    at.run()
+    at.session_state['usuario_logado'] = usuario
+
+    def medir(nome, acao):
+        comeco = time.perf_counter()
+        try:
+            acao()
+            if at.exception:
+                resultado['erros'][f"{nome}: {at.exception[0].message}"] += 1
+        except Exception as e:
+            resultado['erros'][f"{nome}: {type(e).__name__}: {e}"] += 1
+        resultado['latencias'].setdefault(nome, []).append(time.perf_counter() - comeco)
+
+    def abrir(pagina):
+        at.session_state['pagina_atual'] = pagina
+        at.run()
+
+    time.sleep(max(inicio - time.time(), 0))
+    fim = time.time() + duracao
+    while time.time() < fim:
+        pagina = rng.choice(['feed', 'feed', 'jogador', 'notificacoes'])
+        medir(f"apptest.{pagina}", lambda: abrir(pagina))
+
+        if pagina == 'feed':
+            # Só clica em posts ainda não curtidos (clicar em ❤️ descurtiria)
+            botoes = [b for b in at.button if b.key and b.key.startswith("feed_curtir_") and b.label.startswith("🤍")]
+            if botoes:
+                botao = rng.choice(botoes)
+                post_id = int(botao.key.rsplit("_", 1)[1])
+                medir("apptest.curtir", lambda: botao.click().run())
+                resultado['efeitos'].append(('curtida', (post_id, usuario['id'])))
+
+    aguardar_eventos()
+    return [resultado]
+
+
+# ============= INTEGRIDADE =============
+
+def _ler(arquivo: str) -> List[Dict]:
+    try:
+        with open(os.path.join("data", arquivo), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def verificar_integridade(efeitos: List[Tuple]) -> Dict[str, Dict]:
+    """
+    Confere os arquivos em data/ (diretório atual) contra os efeitos que as ações
+    disseram ter gravado. Retorna {violação: {'total': n, 'exemplos': [...]}}
+    """
+    violacoes: Dict[str, Dict] = {}
+
+    def registrar(nome, exemplo):
+        v = violacoes.setdefault(nome, {'total': 0, 'exemplos': []})
+        v['total'] += 1
+        if len(v['exemplos']) < MAX_EXEMPLOS:
+            v['exemplos'].append(exemplo)
+
+    colecoes = {nome: _ler(f"{nome}.json") for nome in
+                ('usuarios', 'jogos', 'inscricoes', 'posts', 'seguindo')}
+    colecoes['comentarios'] = [c.como_dict() for c in utils_feed.carregar_comentarios()]
+    # Curtidas recentes ainda estão no log: lê o curtidas.json com o log aplicado
+    colecoes['curtidas'] = [c.como_dict() for c in utils_curtidas.carregar_curtidas()]
+
+    pasta = os.path.join("data", "notificacoes")
+    notificacoes = []
+    for nome in sorted(os.listdir(pasta)) if os.path.isdir(pasta) else []:
+        if nome.startswith("usuario_") and not nome.endswith("_estado.json"):
+            notificacoes.extend(_ler(os.path.join("notificacoes", nome)))
+    colecoes['notificacoes'] = notificacoes
+
+    # Ids duplicados
+    for nome, registros in colecoes.items():
+        for id_, total in Counter(r.get('id') for r in registros).items():
+            if total > 1:
+                registrar(f"id_duplicado.{nome}", {'id': id_, 'vezes': total})
+
+    # Registros duplicados (mesma chave natural)
+    chaves = {
+        'curtidas': ('post_id', 'usuario_id'),
+        'inscricoes': ('jogo_id', 'jogador_id'),
+        'seguindo': ('seguidor_id', 'seguido_id'),
+    }
+    for nome, campos in chaves.items():
+        for chave, total in Counter(tuple(r.get(c) for c in campos) for r in colecoes[nome]).items():
+            if total > 1:
+                registrar(f"registro_duplicado.{nome}", {'chave': list(chave), 'vezes': total})
+
+    # Efeitos perdidos
+    curtidas = {(c.get('post_id'), c.get('usuario_id')) for c in colecoes['curtidas']}
+    comentarios = {c.get('texto') for c in colecoes['comentarios']}
+    inscricoes = {(i.get('jogo_id'), i.get('jogador_id')) for i in colecoes['inscricoes']}
+    status = {i.get('id'): i.get('status') for i in colecoes['inscricoes']}
+    seguindo = {(s.get('seguidor_id'), s.get('seguido_id')) for s in colecoes['seguindo']}
+
+    for tipo, valor in efeitos:
+        if tipo == 'curtida' and tuple(valor) not in curtidas:
+            registrar("perdida.curtida", list(valor))
+        elif tipo == 'comentario' and valor not in comentarios:
+            registrar("perdido.comentario", valor)
+        elif tipo == 'inscricao' and tuple(valor) not in inscricoes:
+            registrar("perdida.inscricao", list(valor))
+        elif tipo == 'aprovacao' and status.get(valor) != 'aprovada':
+            registrar("perdida.aprovacao", {'inscricao_id': valor, 'status': status.get(valor)})
+        elif tipo == 'seguindo' and tuple(valor) not in seguindo:
+            registrar("perdido.seguindo", list(valor))
+
+    # Vagas
+    aprovadas = Counter(i.get('jogo_id') for i in colecoes['inscricoes'] if i.get('status') == 'aprovada')
+    for jogo in colecoes['jogos']:
+        ocupadas = aprovadas.get(jogo['id'], 0)
+        if jogo.get('vagas_ocupadas', 0) != ocupadas:
+            registrar("vagas_ocupadas_divergente",
+                      {'jogo_id': jogo['id'], 'gravado': jogo.get('vagas_ocupadas', 0), 'aprovadas': ocupadas})
+        if ocupadas > jogo.get('vagas_total', 0):
+            registrar("jogo_acima_da_capacidade",
+                      {'jogo_id': jogo['id'], 'vagas_total': jogo.get('vagas_total', 0), 'aprovadas': ocupadas})
+
+    return violacoes
+
+
+# ============= RELATÓRIO =============
+
+def _percentil(ordenados: List[float], p: float) -> float:
+    """Percentil pelo método do posto mais próximo"""
+    if not ordenados:
+        return 0.0
+    indice = max(int(round(p / 100 * len(ordenados) + 0.5)) - 1, 0)
+    return ordenados[min(indice, len(ordenados) - 1)]
+
+
+def resumir(resultados: List[Dict], duracao: float) -> Dict:
+    """Junta os resultados das threads: vazão e latências por ação"""
+    latencias: Dict[str, List[float]] = {}
+    erros = Counter()
+    for r in resultados:
+        for acao, valores in r['latencias'].items():
+            latencias.setdefault(acao, []).extend(valores)
+        erros.update(r['erros'])
+
+    acoes = {}
+    for acao, valores in sorted(latencias.items()):
+        valores.sort()
+        acoes[acao] = {
+            'operacoes': len(valores),
+            'por_segundo': round(len(valores) / duracao, 2),
+            'p50_ms': round(_percentil(valores, 50) * 1000, 3),
+            'p99_ms': round(_percentil(valores, 99) * 1000, 3),
+            'max_ms': round(valores[-1] * 1000, 3)
+        }
+
+    total = sum(a['operacoes'] for a in acoes.values())
+    return {
+        'operacoes': total,
+        'por_segundo': round(total / duracao, 2),
+        'acoes': acoes,
+        'erros': dict(erros.most_common())
+    }
+
+
+def executar_carga(diretorio_dados: str, processos: int, threads: int, duracao: float,
+                   mistura: Dict[str, int], sessoes_apptest: int = 0, semente: int = SEMENTE_PADRAO) -> Dict:
+    """Executa a carga sobre uma cópia dos dados e retorna o resumo e as violações"""
+    with tempfile.TemporaryDirectory(prefix="jogofacil-carga-") as trabalho:
+        shutil.copytree(os.path.join(diretorio_dados, "data"), os.path.join(trabalho, "data"))
+        shutil.copy(os.path.join(RAIZ, "style.css"), trabalho)
+
+        with open(os.path.join(trabalho, "data", "usuarios.json"), 'r', encoding='utf-8') as f:
+            usuarios = [u['id'] for u in json.load(f)]
+        with open(os.path.join(trabalho, "data", "jogos.json"), 'r', encoding='utf-8') as f:
+            jogos = [j['id'] for j in json.load(f)]
+        with open(os.path.join(trabalho, "data", "posts.json"), 'r', encoding='utf-8') as f:
+            posts = [p['id'] for p in json.load(f)]
+        ids = {'usuarios': usuarios, 'jogos': jogos, 'posts': posts}
+
+        # spawn: cada processo começa limpo, sem herdar caches, travas e threads deste
+        contexto = multiprocessing.get_context("spawn")
+        inicio = time.time() + 2 + sessoes_apptest  # tempo para os processos subirem
+        with ProcessPoolExecutor(max_workers=processos + sessoes_apptest, mp_context=contexto) as executor:
+            futuros = [
+                executor.submit(_processo_api, trabalho, ids, mistura, threads, inicio, duracao, semente + p)
+                for p in range(processos)
+            ]
+            futuros += [
+                executor.submit(_processo_apptest, trabalho, ids, inicio, duracao, semente + processos + s)
+                for s in range(sessoes_apptest)
+            ]
+            resultados = [r for futuro in futuros for r in futuro.result()]
+
+        anterior = os.getcwd()
+        os.chdir(trabalho)
+        try:
+            violacoes = verificar_integridade([e for r in resultados for e in r['efeitos']])
+        finally:
+            os.chdir(anterior)
+
+    return {**resumir(resultados, duracao), 'violacoes': violacoes}
+
+
+def _imprimir(relatorio: Dict) -> None:
+    print(f"\n{relatorio['operacoes']} operações, {relatorio['por_segundo']:.1f}/s")
+    print(f"  {'ação':<24} {'ops':>7} {'ops/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for acao, a in relatorio['acoes'].items():
+        print(f"  {acao:<24} {a['operacoes']:>7} {a['por_segundo']:>8.1f} {a['p50_ms']:>9.2f} {a['p99_ms']:>9.2f} {a['max_ms']:>9.2f}")
+
+    if relatorio['erros']:
+        print("\nErros:")
+        for erro, total in relatorio['erros'].items():
+            print(f"  {total:>5}x {erro}")
+
+    if relatorio['violacoes']:
+        print("\nViolações de integridade:")
+        for nome, v in sorted(relatorio['violacoes'].items()):
+            print(f"  {nome:<36} {v['total']:>6}   ex: {json.dumps(v['exemplos'][:3], ensure_ascii=False)}")
+    else:
+        print("\nNenhuma violação de integridade")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga com vários processos e verificação de integridade")
+    parser.add_argument("--escala", choices=list(ESCALAS), default='pequena')
+    parser.add_argument("--semente", type=int, default=SEMENTE_PADRAO)
+    parser.add_argument("--dados", help="diretório com data/ já gerado (padrão: benchmarks/.dados/<escala>-<semente>)")
+    parser.add_argument("--processos", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4, help="threads por processo")
+    parser.add_argument("--duracao", type=float, default=20, help="segundos de carga")
+    parser.add_argument("--sessoes-apptest", type=int, default=0, help="processos extras usando o app.py pelo AppTest")
+    parser.add_argument("--mistura", help="pesos das ações, ex: curtir=50,comentar=50")
+    parser.add_argument("--saida", help="arquivo JSON do relatório (padrão: benchmarks/resultados/carga-<commit>-<escala>.json)")
+    args = parser.parse_args()
+
+    mistura = dict(MISTURA_PADRAO)
+    if args.mistura:
+        mistura = {}
+        for par in args.mistura.split(","):
+            acao, peso = par.split("=")
+            if acao not in ACOES:
+                parser.error(f"ação desconhecida: {acao} (opções: {', '.join(ACOES)})")
+            mistura[acao] = int(peso)
+
+    raiz = os.getcwd()
+    dados = os.path.abspath(args.dados or os.path.join("benchmarks", ".dados", f"{args.escala}-{args.semente}"))
+    if not os.path.exists(os.path.join(dados, "data", "usuarios.json")):
+        print(f"Gerando dados ({args.escala}) em {dados}...")
+        gerar_dados(dados, args.escala, args.semente)
+
+    commit = commit_atual()
+    print(f"Carga ({args.escala}, {args.processos} processos x {args.threads} threads"
+          f" + {args.sessoes_apptest} sessões AppTest, {args.duracao:.0f}s, commit {commit})...")
+    try:
+        relatorio = executar_carga(dados, args.processos, args.threads, args.duracao,
+                                   mistura, args.sessoes_apptest, args.semente)
+    except Exception:
+        traceback.print_exc()
+        sys.exit(2)
+    _imprimir(relatorio)
+
+    arquivo_saida = args.saida or os.path.join(raiz, "benchmarks", "resultados", f"carga-{commit}-{args.escala}.json")
+    os.makedirs(os.path.dirname(arquivo_saida), exist_ok=True)
+    with open(arquivo_saida, 'w', encoding='utf-8') as f:
+        json.dump({
+            'metadados': {
+                'commit': commit,
+                'data': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'escala': args.escala,
+                'semente': args.semente,
+                'processos': args.processos,
+                'threads': args.threads,
+                'sessoes_apptest': args.sessoes_apptest,
+                'duracao': args.duracao,
+                'mistura': mistura
+            },
+            **relatorio
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\nRelatório em {arquivo_saida}")
+
+    if relatorio['violacoes']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
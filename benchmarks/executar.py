@@ -0,0 +1,437 @@
+"""
+Benchmarks dos caminhos quentes
+Gera (ou reaproveita) um conjunto de dados sintéticos, copia para um
+diretório de trabalho e mede cada função de leitura de utils/utils_feed, o
+acesso a dados de cada página e as principais escritas. Cada caso é medido
+"frio" (cache de leitura limpo antes de cada repetição) e "quente" (cache
+já preenchido). O resultado vai para um JSON que pode ser comparado com o
+de outro commit:
+    python -m benchmarks.executar --escala media
+    python -m benchmarks.executar --comparar benchmarks/resultados/abc1234.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.gerar_dados import ESCALAS, SEMENTE_PADRAO, DATA_BASE, gerar_dados, no_diretorio
+
+import utils
+import utils_feed
+import utils_geo
+from utils_cache import limpar_cache
+from utils_eventos import aguardar_eventos
+
+
+REPETICOES_PADRAO = 5
+LIMIAR_REGRESSAO = 0.20  # 20% mais lento que a referência
+
+_casos: List[Dict] = []
+
+
+def caso(nome: str, escrita: bool = False):
+    """
+    Registra um caso de benchmark
+    A função recebe o gerador de números aleatórios e retorna o que deve ser
+    medido (uma função sem argumentos). Casos de escrita alteram os dados e
+    são medidos só a frio
+    """
+    def registrar(preparar: Callable):
+        _casos.append({'nome': nome, 'preparar': preparar, 'escrita': escrita})
+        return preparar
+    return registrar
+
+
+# ============= AMOSTRAS =============
+
+class Amostra:
+    """IDs usados pelos casos, sorteados uma vez por execução"""
+
+    def __init__(self, rng: random.Random):
+        self.usuarios = utils.carregar_usuarios()
+        self.jogos = utils.carregar_jogos()
+        self.posts = utils_feed.carregar_posts()
+        organizadores = sorted({j['organizador_id'] for j in self.jogos})
+
+        self.usuario_id = rng.choice(self.usuarios)['id']
+        self.login = rng.choice(self.usuarios)['login']
+        self.organizador_id = rng.choice(organizadores)
+        self.jogo = rng.choice(self.jogos)
+        self.post_id = rng.choice(self.posts)['id']
+        self.rng = rng
+
+
+# ============= FUNÇÕES DE LEITURA =============
+
+@caso("utils.buscar_usuario_por_id")
+def _buscar_usuario_por_id(a: Amostra):
+    return lambda: utils.buscar_usuario_por_id(a.usuario_id)
+
+
+@caso("utils.buscar_usuario_por_login")
+def _buscar_usuario_por_login(a: Amostra):
+    return lambda: utils.buscar_usuario_por_login(a.login)
+
+
+@caso("utils.buscar_campo_por_id")
+def _buscar_campo_por_id(a: Amostra):
+    return lambda: utils.buscar_campo_por_id(a.jogo['campo_id'])
+
+
+@caso("utils.buscar_jogo_por_id")
+def _buscar_jogo_por_id(a: Amostra):
+    return lambda: utils.buscar_jogo_por_id(a.jogo['id'])
+
+
+@caso("utils.verificar_conflito_horario")
+def _verificar_conflito_horario(a: Amostra):
+    j = a.jogo
+    return lambda: utils.verificar_conflito_horario(j['campo_id'], j['data'], j['hora_inicio'], j['hora_fim'])
+
+
+@caso("utils.listar_jogos_futuros")
+def _listar_jogos_futuros(a: Amostra):
+    return lambda: utils.listar_jogos_futuros(DATA_BASE.strftime("%Y-%m-%d"))
+
+
+@caso("utils.listar_jogos_por_organizador")
+def _listar_jogos_por_organizador(a: Amostra):
+    return lambda: utils.listar_jogos_por_organizador(a.organizador_id)
+
+
+@caso("utils.listar_inscricoes_por_jogo")
+def _listar_inscricoes_por_jogo(a: Amostra):
+    return lambda: utils.listar_inscricoes_por_jogo(a.jogo['id'], 'aprovada')
+
+
+@caso("utils.listar_inscricoes_por_jogador")
+def _listar_inscricoes_por_jogador(a: Amostra):
+    return lambda: utils.listar_inscricoes_por_jogador(a.usuario_id)
+
+
+@caso("utils.painel_organizador")
+def _painel_organizador(a: Amostra):
+    return lambda: utils.painel_organizador(a.organizador_id)
+
+
+@caso("utils.agenda_jogador")
+def _agenda_jogador(a: Amostra):
+    return lambda: utils.agenda_jogador(a.usuario_id)
+
+
+@caso("utils.contar_notificacoes_nao_lidas")
+def _contar_notificacoes_nao_lidas(a: Amostra):
+    return lambda: utils.contar_notificacoes_nao_lidas(a.usuario_id)
+
+
+@caso("utils.listar_notificacoes_usuario")
+def _listar_notificacoes_usuario(a: Amostra):
+    return lambda: utils.listar_notificacoes_usuario(a.usuario_id)
+
+
+@caso("utils.resumir_notificacoes_usuario")
+def _resumir_notificacoes_usuario(a: Amostra):
+    return lambda: utils.resumir_notificacoes_usuario(a.usuario_id)
+
+
+@caso("utils_feed.listar_feed")
+def _listar_feed(a: Amostra):
+    return lambda: utils_feed.listar_feed(a.usuario_id)
+
+
+@caso("utils_feed.listar_posts_usuario")
+def _listar_posts_usuario(a: Amostra):
+    return lambda: utils_feed.listar_posts_usuario(a.usuario_id)
+
+
+@caso("utils_feed.buscar_post_por_id")
+def _buscar_post_por_id(a: Amostra):
+    return lambda: utils_feed.buscar_post_por_id(a.post_id)
+
+
+@caso("utils_feed.usuario_curtiu")
+def _usuario_curtiu(a: Amostra):
+    return lambda: utils_feed.usuario_curtiu(a.post_id, a.usuario_id)
+
+
+@caso("utils_feed.listar_posts_curtidos")
+def _listar_posts_curtidos(a: Amostra):
+    return lambda: utils_feed.listar_posts_curtidos(a.usuario_id)
+
+
+@caso("utils_feed.contar_curtidas")
+def _contar_curtidas(a: Amostra):
+    return lambda: utils_feed.contar_curtidas(a.post_id)
+
+
+@caso("utils_feed.contar_comentarios")
+def _contar_comentarios(a: Amostra):
+    return lambda: utils_feed.contar_comentarios(a.post_id)
+
+
+@caso("utils_feed.listar_comentarios_post")
+def _listar_comentarios_post(a: Amostra):
+    return lambda: utils_feed.listar_comentarios_post(a.post_id)
+
+
+@caso("utils_feed.pagina_comentarios")
+def _pagina_comentarios(a: Amostra):
+    return lambda: utils_feed.pagina_comentarios(a.post_id)
+
+
+@caso("utils_feed.esta_seguindo")
+def _esta_seguindo(a: Amostra):
+    return lambda: utils_feed.esta_seguindo(a.usuario_id, a.organizador_id)
+
+
+@caso("utils_feed.listar_ids_seguindo")
+def _listar_ids_seguindo(a: Amostra):
+    return lambda: utils_feed.listar_ids_seguindo(a.usuario_id)
+
+
+@caso("utils_feed.contar_seguidores")
+def _contar_seguidores(a: Amostra):
+    return lambda: utils_feed.contar_seguidores(a.usuario_id)
+
+
+@caso("utils_geo.buscar_jogos_proximos")
+def _buscar_jogos_proximos(a: Amostra):
+    lat, lon = utils_geo.geocodificar("Plano Piloto")
+    return lambda: utils_geo.buscar_jogos_proximos(lat, lon, 10, DATA_BASE.strftime("%Y-%m-%d"))
+
+
+# ============= ACESSO A DADOS DAS PÁGINAS =============
+# Mesmas chamadas que as páginas fazem numa renderização, sem o Streamlit
+
+@caso("pagina_feed.exibir_posts")
+def _exibir_posts(a: Amostra):
+    def renderizar():
+        for post in utils_feed.listar_feed(a.usuario_id):
+            utils.buscar_usuario_por_id(post['usuario_id'])
+            utils_feed.contar_curtidas(post['id'])
+            if utils_feed.contar_comentarios(post['id']):
+                utils_feed.previa_comentarios(post['id'])
+            if post.get('foto'):
+                foto = utils_feed.carregar_foto_post(post['foto'])
+                if foto:
+                    foto.load()
+    return renderizar
+
+
+@caso("pagina_organizador.meus_jogos")
+def _meus_jogos(a: Amostra):
+    return lambda: utils.painel_organizador(a.organizador_id)
+
+
+@caso("pagina_jogador.buscar_jogos")
+def _buscar_jogos(a: Amostra):
+    def renderizar():
+        agenda = utils.agenda_jogador(a.usuario_id)
+        for jogo in utils.listar_jogos_futuros(DATA_BASE.strftime("%Y-%m-%d")):
+            utils.buscar_campo_por_id(jogo['campo_id'])
+            utils.buscar_usuario_por_id(jogo['organizador_id'])
+            _ = jogo['id'] in agenda['jogos_inscritos']
+    return renderizar
+
+
+@caso("pagina_notificacoes.listar")
+def _listar(a: Amostra):
+    def renderizar():
+        utils.contar_notificacoes_nao_lidas(a.usuario_id)
+        utils.listar_notificacoes_usuario(a.usuario_id)
+    return renderizar
+
+
+# ============= ESCRITAS =============
+
+@caso("utils.criar_inscricao", escrita=True)
+def _criar_inscricao(a: Amostra):
+    return lambda: utils.criar_inscricao(a.rng.choice(a.jogos)['id'], a.rng.choice(a.usuarios)['id'])
+
+
+@caso("utils.atualizar_status_inscricao", escrita=True)
+def _atualizar_status_inscricao(a: Amostra):
+    pendentes = [i['id'] for i in utils.carregar_inscricoes() if i['status'] == 'pendente']
+    return lambda: pendentes and utils.atualizar_status_inscricao(pendentes.pop(), 'reprovada')
+
+
+@caso("utils.criar_notificacao", escrita=True)
+def _criar_notificacao(a: Amostra):
+    return lambda: utils.criar_notificacao(a.usuario_id, 'nova_inscricao', "Benchmark")
+
+
+@caso("utils.excluir_jogo", escrita=True)
+def _excluir_jogo(a: Amostra):
+    ids = [j['id'] for j in a.jogos]
+    a.rng.shuffle(ids)
+    return lambda: ids and utils.excluir_jogo(ids.pop())
+
+
+@caso("utils_feed.curtir_post", escrita=True)
+def _curtir_post(a: Amostra):
+    return lambda: utils_feed.curtir_post(a.rng.choice(a.posts)['id'], a.rng.choice(a.usuarios)['id'])
+
+
+@caso("utils_feed.adicionar_comentario", escrita=True)
+def _adicionar_comentario(a: Amostra):
+    return lambda: utils_feed.adicionar_comentario(a.post_id, a.usuario_id, "Benchmark")
+
+
+@caso("utils_feed.seguir_usuario", escrita=True)
+def _seguir_usuario(a: Amostra):
+    return lambda: utils_feed.seguir_usuario(a.rng.choice(a.usuarios)['id'], a.rng.choice(a.usuarios)['id'])
+
+
+# ============= EXECUÇÃO =============
+
+def _estatisticas(tempos: List[float]) -> Dict[str, float]:
+    """Resumo das medições em milissegundos"""
+    ms = [t * 1000 for t in tempos]
+    return {
+        'min_ms': round(min(ms), 3),
+        'mediana_ms': round(statistics.median(ms), 3),
+        'media_ms': round(statistics.mean(ms), 3),
+        'max_ms': round(max(ms), 3)
+    }
+
+
+def _medir(funcao: Callable, repeticoes: int, frio: bool) -> Dict[str, float]:
+    """Executa a função várias vezes e mede cada execução"""
+    tempos = []
+    for _ in range(repeticoes):
+        if frio:
+            limpar_cache()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return _estatisticas(tempos)
+
+
+def executar(diretorio_dados: str, repeticoes: int = REPETICOES_PADRAO,
+             filtro: Optional[str] = None, semente: int = SEMENTE_PADRAO) -> Dict[str, Dict]:
+    """
+    Mede os casos registrados sobre uma cópia dos dados (as escritas alteram a cópia)
+    Retorna {nome do caso: {'frio': {...}, 'quente': {...}}}
+    """
+    resultados = {}
+
+    with tempfile.TemporaryDirectory(prefix="jogofacil-bench-") as trabalho:
+        shutil.copytree(os.path.join(diretorio_dados, "data"), os.path.join(trabalho, "data"))
+
+        with no_diretorio(trabalho):
+            utils.recarregar_campos()
+            amostra = Amostra(random.Random(semente))
+
+            # Leituras primeiro, escritas no fim (alteram os dados)
+            for c in sorted(_casos, key=lambda c: c['escrita']):
+                if filtro and filtro not in c['nome']:
+                    continue
+
+                funcao = c['preparar'](amostra)
+                resultado = {'frio': _medir(funcao, repeticoes, frio=True)}
+                if not c['escrita']:
+                    resultado['quente'] = _medir(funcao, repeticoes, frio=False)
+                else:
+                    aguardar_eventos()
+                resultados[c['nome']] = resultado
+
+                print(f"  {c['nome']:<40} frio {resultado['frio']['mediana_ms']:>10.3f} ms"
+                      + (f"   quente {resultado['quente']['mediana_ms']:>10.3f} ms" if 'quente' in resultado else ""))
+
+    return resultados
+
+
+def commit_atual() -> str:
+    """Hash curto do commit atual (ou 'desconhecido' fora de um repositório git)"""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def comparar(atual: Dict, referencia: Dict, limiar: float = LIMIAR_REGRESSAO) -> List[str]:
+    """
+    Compara as medianas de dois resultados e imprime a variação de cada caso
+    Retorna os casos que ficaram mais lentos que o limiar
+    """
+    regressoes = []
+    print(f"\nComparação com {referencia['metadados']['commit']} (mediana, variação):")
+
+    for nome, resultado in atual['resultados'].items():
+        anterior = referencia['resultados'].get(nome)
+        if not anterior:
+            continue
+        for modo in ('frio', 'quente'):
+            if modo not in resultado or modo not in anterior:
+                continue
+            antes, depois = anterior[modo]['mediana_ms'], resultado[modo]['mediana_ms']
+            variacao = (depois - antes) / antes if antes else 0.0
+            marca = "  << REGRESSÃO" if variacao > limiar else ""
+            print(f"  {nome:<40} {modo:<6} {antes:>10.3f} -> {depois:>10.3f} ms  {variacao:+7.1%}{marca}")
+            if marca:
+                regressoes.append(f"{nome} ({modo})")
+
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa os benchmarks sobre dados sintéticos")
+    parser.add_argument("--escala", choices=list(ESCALAS), default='pequena')
+    parser.add_argument("--semente", type=int, default=SEMENTE_PADRAO)
+    parser.add_argument("--dados", help="diretório com data/ já gerado (padrão: benchmarks/.dados/<escala>-<semente>)")
+    parser.add_argument("--regerar", action="store_true", help="gera os dados de novo mesmo se já existirem")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES_PADRAO)
+    parser.add_argument("--filtro", help="só executa casos cujo nome contém este texto")
+    parser.add_argument("--saida", help="arquivo JSON de resultados (padrão: benchmarks/resultados/<commit>-<escala>.json)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    raiz = os.getcwd()
+    dados = os.path.abspath(args.dados or os.path.join("benchmarks", ".dados", f"{args.escala}-{args.semente}"))
+    if args.regerar or not os.path.exists(os.path.join(dados, "data", "usuarios.json")):
+        print(f"Gerando dados ({args.escala}) em {dados}...")
+        gerar_dados(dados, args.escala, args.semente)
+
+    commit = commit_atual()
+    print(f"Benchmarks ({args.escala}, {args.repeticoes} repetições, commit {commit}):")
+    resultados = executar(dados, args.repeticoes, args.filtro, args.semente)
+
+    saida = {
+        'metadados': {
+            'commit': commit,
+            'data': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'escala': args.escala,
+            'semente': args.semente,
+            'repeticoes': args.repeticoes,
+            'python': platform.python_version(),
+            'plataforma': platform.platform()
+        },
+        'resultados': resultados
+    }
+
+    arquivo_saida = args.saida or os.path.join(raiz, "benchmarks", "resultados", f"{commit}-{args.escala}.json")
+    os.makedirs(os.path.dirname(arquivo_saida), exist_ok=True)
+    with open(arquivo_saida, 'w', encoding='utf-8') as f:
+        json.dump(saida, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {arquivo_saida}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            referencia = json.load(f)
+        regressoes = comparar(saida, referencia)
+        if regressoes:
+            print(f"\n{len(regressoes)} regressão(ões) acima de {LIMIAR_REGRESSAO:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
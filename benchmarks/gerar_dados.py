@@ -0,0 +1,304 @@
+"""
+Gerador determinístico de dados sintéticos
+Escreve um diretório data/ completo (usuários, campos, jogos, inscrições,
+posts, curtidas, comentários, seguidores, notificações e fotos) no mesmo
+formato dos arquivos reais. A mesma escala e semente geram sempre os mesmos
+arquivos, então resultados de benchmarks podem ser comparados entre commits
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from utils import salvar_notificacoes
+from utils_feed import salvar_comentarios
+
+try:
+    from PIL import Image
+except ImportError:  # Sem Pillow os dados são gerados sem fotos
+    Image = None
+
+
+# Quantidades de cada escala
+ESCALAS = {
+    'pequena': {
+        'usuarios': 200, 'posts': 2_000, 'curtidas': 20_000, 'comentarios': 4_000,
+        'seguindo_por_usuario': 15, 'jogos': 300, 'inscricoes_por_jogo': 8,
+        'notificacoes': 5_000, 'fotos': 20
+    },
+    'media': {
+        'usuarios': 2_000, 'posts': 20_000, 'curtidas': 200_000, 'comentarios': 40_000,
+        'seguindo_por_usuario': 30, 'jogos': 2_000, 'inscricoes_por_jogo': 10,
+        'notificacoes': 50_000, 'fotos': 100
+    },
+    'grande': {
+        'usuarios': 10_000, 'posts': 100_000, 'curtidas': 1_000_000, 'comentarios': 200_000,
+        'seguindo_por_usuario': 50, 'jogos': 5_000, 'inscricoes_por_jogo': 12,
+        'notificacoes': 200_000, 'fotos': 200
+    },
+}
+
+SEMENTE_PADRAO = 42
+
+# Data de referência fixa: os jogos ficam entre 60 dias antes e 60 depois dela
+DATA_BASE = datetime(2026, 1, 1)
+
+CAMPOS_BASE = [
+    ("Arena Park Descoberto", "Parque da Cidade, s/n", "descoberto", "45x25m", "6x6", 6),
+    ("Arena Park Coberto", "Parque da Cidade, s/n", "coberto", "45x25m", "6x6", 6),
+    ("Arena Smart", "Sudoeste, 456", "descoberto", "50x25m", "6x6", 6),
+    ("Brazuca", "Guará, 789", "coberto", "40x20m", "5x5", 5),
+    ("Arena M10", "Águas Claras, 1010", "descoberto", "60x30m", "7x7", 7),
+    ("Quadra do Lago", "Lago Sul, 12", "coberto", "40x20m", "5x5", 5),
+    ("Society Norte", "Asa Norte, 300", "descoberto", "50x25m", "6x6", 6),
+    ("Campo Taguá", "Taguatinga, 88", "descoberto", "60x30m", "7x7", 7),
+]
+
+PALAVRAS = (
+    "fut hoje jogo top bola gol time partida resenha golaço quadra campo "
+    "society pelada amanhã galera valeu bora treino vitória empate chuva"
+).split()
+
+# Tabela de geocodificação do projeto, copiada para os dados gerados
+GEOCODIFICACAO_ORIGEM = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "geocodificacao.json")
+
+HORARIOS = [f"{h:02d}:{m:02d}" for h in range(7, 23) for m in (0, 30)]
+
+
+@contextmanager
+def no_diretorio(destino: str):
+    """Executa o bloco com o diretório de trabalho em destino (os caminhos do app são relativos)"""
+    anterior = os.getcwd()
+    os.chdir(destino)
+    try:
+        yield
+    finally:
+        os.chdir(anterior)
+
+
+def _salvar(nome: str, dados) -> None:
+    """Grava um arquivo em data/ com a mesma formatação do salvar_json"""
+    with open(os.path.join("data", nome), 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+
+
+def _texto(rng: random.Random, minimo: int, maximo: int) -> str:
+    """Frase aleatória com palavras do vocabulário"""
+    return " ".join(rng.choice(PALAVRAS) for _ in range(rng.randint(minimo, maximo))).capitalize()
+
+
+def _data_hora(rng: random.Random, dias_antes: int) -> str:
+    """Data/hora aleatória até dias_antes antes da data de referência"""
+    momento = DATA_BASE - timedelta(seconds=rng.randint(0, dias_antes * 86400))
+    return momento.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _salvar_foto(caminho: str, rng: random.Random, tamanho: int) -> None:
+    """JPEG com um degradê de cor aleatória"""
+    cor = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+    imagem = Image.new("RGB", (tamanho, tamanho), cor)
+    faixa = Image.linear_gradient("L").resize((tamanho, tamanho))
+    imagem.paste((255, 255, 255), mask=faixa.point(lambda v: v // 3))
+    imagem.save(caminho, "JPEG", quality=80)
+
+
+def gerar_dados(destino: str, escala: str = 'pequena', semente: int = SEMENTE_PADRAO,
+                quantidades: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """
+    Gera o diretório destino/data com dados sintéticos
+    quantidades sobrescreve valores da escala (ex: {'curtidas': 50_000})
+    Retorna quantos registros de cada tipo foram gravados
+    """
+    q = {**ESCALAS[escala], **(quantidades or {})}
+    rng = random.Random(semente)
+
+    os.makedirs(os.path.join(destino, "data", "fotos"), exist_ok=True)
+    os.makedirs(os.path.join(destino, "data", "posts_fotos"), exist_ok=True)
+
+    with no_diretorio(destino):
+        # Usuários (os primeiros usuários têm foto)
+        usuarios = []
+        for uid in range(1, q['usuarios'] + 1):
+            usuarios.append({
+                'id': uid,
+                'login': f"jogador{uid}",
+                'senha': "1234",
+                'telefone': f"61{uid:09d}",
+                'nome': f"Jogador {uid}",
+                'apelido_jogador': f"craque{uid}" if rng.random() < 0.7 else "",
+                'foto': f"user_{uid}.jpg" if uid <= q['fotos'] else ""
+            })
+        _salvar("usuarios.json", usuarios)
+
+        # Campos
+        campos = [
+            {'id': i, 'nome': nome, 'endereco': endereco, 'tipo': tipo, 'dimensoes': dimensoes,
+             'formato': formato, 'jogadores_por_time': por_time}
+            for i, (nome, endereco, tipo, dimensoes, formato, por_time) in enumerate(CAMPOS_BASE, 1)
+        ]
+        _salvar("campos.json", campos)
+        if os.path.exists(GEOCODIFICACAO_ORIGEM):
+            shutil.copy(GEOCODIFICACAO_ORIGEM, os.path.join("data", "geocodificacao.json"))
+
+        # Jogos: organizados por 5% dos usuários, sem conflito de horário no campo
+        organizadores = rng.sample(range(1, q['usuarios'] + 1), max(1, q['usuarios'] // 20))
+        ocupados = set()
+        jogos = []
+        while len(jogos) < q['jogos']:
+            campo = rng.choice(campos)
+            data = (DATA_BASE + timedelta(days=rng.randint(-60, 60))).strftime("%Y-%m-%d")
+            inicio = rng.randrange(len(HORARIOS) - 3)
+            if (campo['id'], data, inicio) in ocupados or (campo['id'], data, inicio + 1) in ocupados:
+                continue
+            ocupados.update({(campo['id'], data, inicio), (campo['id'], data, inicio + 1)})
+            jogos.append({
+                'id': len(jogos) + 1,
+                'organizador_id': rng.choice(organizadores),
+                'campo_id': campo['id'],
+                'data': data,
+                'hora_inicio': HORARIOS[inicio],
+                'hora_fim': HORARIOS[inicio + 2],
+                'valor': float(rng.choice([10, 15, 20, 25, 30])),
+                'vagas_total': campo['jogadores_por_time'] * 2,
+                'vagas_ocupadas': 0,
+                'status': 'ativo'
+            })
+
+        # Inscrições: aprovadas até lotar, o resto pendente/reprovada/cancelada
+        inscricoes = []
+        for jogo in jogos:
+            jogadores = rng.sample(range(1, q['usuarios'] + 1), min(q['inscricoes_por_jogo'], q['usuarios']))
+            for jogador_id in jogadores:
+                if jogador_id == jogo['organizador_id']:
+                    continue
+                if jogo['vagas_ocupadas'] < jogo['vagas_total'] and rng.random() < 0.7:
+                    status = 'aprovada'
+                    jogo['vagas_ocupadas'] += 1
+                else:
+                    status = rng.choice(['pendente', 'pendente', 'reprovada', 'cancelada'])
+                inscricoes.append({
+                    'id': len(inscricoes) + 1,
+                    'jogo_id': jogo['id'],
+                    'jogador_id': jogador_id,
+                    'status': status,
+                    'data_inscricao': _data_hora(rng, 90)
+                })
+        _salvar("jogos.json", jogos)
+        _salvar("inscricoes.json", inscricoes)
+
+        # Seguidores
+        seguindo = []
+        for seguidor_id in range(1, q['usuarios'] + 1):
+            quantos = min(rng.randint(0, 2 * q['seguindo_por_usuario']), q['usuarios'] - 1)
+            for seguido_id in rng.sample(range(1, q['usuarios'] + 1), quantos + 1):
+                if seguido_id != seguidor_id:
+                    seguindo.append({
+                        'id': len(seguindo) + 1,
+                        'seguidor_id': seguidor_id,
+                        'seguido_id': seguido_id,
+                        'data_inicio': _data_hora(rng, 365)
+                    })
+        _salvar("seguindo.json", seguindo)
+
+        # Posts (em ordem de criação), alguns com foto
+        datas_posts = sorted(_data_hora(rng, 365) for _ in range(q['posts']))
+        posts = []
+        for pid, data in enumerate(datas_posts, 1):
+            posts.append({
+                'id': pid,
+                'usuario_id': rng.randint(1, q['usuarios']),
+                'texto': _texto(rng, 3, 20),
+                'foto': f"post_{pid}.jpg" if pid <= q['fotos'] else "",
+                'data_criacao': data
+            })
+        _salvar("posts.json", posts)
+
+        # Curtidas: posts populares concentram a maioria (distribuição de cauda longa)
+        curtidas = []
+        vistos = set()
+        while len(curtidas) < q['curtidas']:
+            if rng.random() < 0.5:
+                post_id = max(1, q['posts'] - int(rng.paretovariate(1.2)) + 1)  # Recentes e populares
+            else:
+                post_id = rng.randint(1, q['posts'])
+            usuario_id = rng.randint(1, q['usuarios'])
+            if (post_id, usuario_id) in vistos:
+                if len(vistos) >= q['posts'] * q['usuarios']:
+                    break
+                continue
+            vistos.add((post_id, usuario_id))
+            curtidas.append({
+                'id': len(curtidas) + 1,
+                'post_id': post_id,
+                'usuario_id': usuario_id,
+                'data': _data_hora(rng, 365)
+            })
+        _salvar("curtidas.json", curtidas)
+
+        comentarios = [
+            {
+                'id': cid,
+                'post_id': rng.randint(1, q['posts']),
+                'usuario_id': rng.randint(1, q['usuarios']),
+                'texto': _texto(rng, 2, 12),
+                'data': _data_hora(rng, 365)
+            }
+            for cid in range(1, q['comentarios'] + 1)
+        ]
+        # Comentários: gravados pelo utils_feed para sair no formato por post
+        salvar_comentarios(comentarios)
+
+        # Notificações: gravadas pelo próprio utils para sair no formato das caixas
+        tipos = ['nova_inscricao', 'inscricao_aprovada', 'inscricao_reprovada', 'comentario_post', 'curtida_post', 'novo_seguidor']
+        notificacoes = [
+            {
+                'id': nid,
+                'usuario_id': rng.randint(1, q['usuarios']),
+                'tipo': rng.choice(tipos),
+                'mensagem': _texto(rng, 5, 15),
+                'dados': {},
+                'lida': rng.random() < 0.6,
+                'data_criacao': _data_hora(rng, 60)
+            }
+            for nid in range(1, q['notificacoes'] + 1)
+        ]
+        salvar_notificacoes(notificacoes)
+
+        # Fotos
+        fotos = 0
+        if Image is not None:
+            for uid in range(1, min(q['fotos'], q['usuarios']) + 1):
+                _salvar_foto(os.path.join("data", "fotos", f"user_{uid}.jpg"), rng, 200)
+                fotos += 1
+            for pid in range(1, min(q['fotos'], q['posts']) + 1):
+                _salvar_foto(os.path.join("data", "posts_fotos", f"post_{pid}.jpg"), rng, 1080)
+                fotos += 1
+
+    return {
+        'usuarios': len(usuarios), 'campos': len(campos), 'jogos': len(jogos),
+        'inscricoes': len(inscricoes), 'seguindo': len(seguindo), 'posts': len(posts),
+        'curtidas': len(curtidas), 'comentarios': len(comentarios),
+        'notificacoes': len(notificacoes), 'fotos': fotos
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos para benchmarks")
+    parser.add_argument("--escala", choices=list(ESCALAS), default='pequena')
+    parser.add_argument("--semente", type=int, default=SEMENTE_PADRAO)
+    parser.add_argument("--destino", help="diretório de saída (padrão: benchmarks/.dados/<escala>-<semente>)")
+    args = parser.parse_args()
+
+    destino = args.destino or os.path.join("benchmarks", ".dados", f"{args.escala}-{args.semente}")
+    contagens = gerar_dados(destino, args.escala, args.semente)
+    print(f"Dados gerados em {destino}:")
+    for nome, total in contagens.items():
+        print(f"  {nome}: {total}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Perfil de renderização das páginas
+Executa o app.py sem navegador (streamlit.testing.v1.AppTest) com um usuário
+logado, sobre uma cópia dos dados sintéticos, e mede cada página e cada
+interação (curtir, comentar, aprovar inscrição): tempo, chamadas de
+carregar_json/salvar_json, bytes lidos/gravados, imagens abertas e pico de
+memória. Gera um relatório em JSON e um perfil em pilhas colapsadas
+(formato do flamegraph.pl / speedscope):
+    python -m benchmarks.perfil_paginas --escala pequena
+    flamegraph.pl benchmarks/resultados/perfil-abc1234-pequena.folded > perfil.svg
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from benchmarks.gerar_dados import ESCALAS, SEMENTE_PADRAO, gerar_dados, no_diretorio
+from benchmarks.executar import commit_atual
+
+import utils
+import utils_feed
+import utils_curtidas
+from utils_cache import limpar_cache
+from utils_eventos import aguardar_eventos
+from utils_metricas import colecao_do_arquivo
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INTERVALO_AMOSTRAGEM = 0.001  # segundos entre amostras das pilhas
+TIMEOUT_EXECUCAO = 120
+
+PAGINAS = ['perfil', 'feed', 'organizador', 'jogador', 'notificacoes']
+
+
+# ============= CONTADORES DE E/S =============
+
+class Medidor:
+    """Conta as chamadas de E/S feitas pelas funções de armazenamento durante uma etapa"""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.zerar()
+
+    def zerar(self) -> None:
+        with self._trava:
+            self.contagens = Counter()
+            self.bytes = Counter()
+            self.arquivos = Counter()
+
+    def registrar(self, operacao: str, arquivo: Optional[str] = None) -> None:
+        tamanho = 0
+        if arquivo:
+            try:
+                tamanho = os.path.getsize(arquivo)
+            except OSError:
+                pass
+        with self._trava:
+            self.contagens[operacao] += 1
+            self.bytes[operacao] += tamanho
+            if arquivo:
+                self.arquivos[f"{operacao} {colecao_do_arquivo(arquivo)}"] += 1
+
+    def resumo(self) -> Dict:
+        with self._trava:
+            return {
+                'carregar_json': self.contagens['carregar_json'],
+                'salvar_json': self.contagens['salvar_json'],
+                'bytes_lidos': self.bytes['carregar_json'],
+                'bytes_gravados': self.bytes['salvar_json'],
+                'imagens_abertas': self.contagens['imagem'],
+                'por_arquivo': dict(self.arquivos.most_common())
+            }
+
+
+def _instrumentar(medidor: Medidor) -> None:
+    """Envolve carregar_json/salvar_json de utils, utils_feed e utils_curtidas e o Image.open do Pillow"""
+    for modulo in (utils, utils_feed, utils_curtidas):
+        carregar, salvar = modulo.carregar_json, modulo.salvar_json
+
+        def carregar_medido(arquivo, _original=carregar):
+            medidor.registrar('carregar_json', arquivo)
+            return _original(arquivo)
+
+        def salvar_medido(arquivo, dados, _original=salvar):
+            resultado = _original(arquivo, dados)
+            medidor.registrar('salvar_json', arquivo)
+            return resultado
+
+        modulo.carregar_json = carregar_medido
+        modulo.salvar_json = salvar_medido
+
+    if Image is not None:
+        abrir = Image.open
+
+        def abrir_medido(*args, **kwargs):
+            medidor.registrar('imagem')
+            return abrir(*args, **kwargs)
+
+        Image.open = abrir_medido
+
+
+# ============= AMOSTRAGEM DE PILHAS =============
+
+def _ocioso(frame) -> bool:
+    """Thread parada esperando (ex: trabalhador de eventos aguardando a fila)"""
+    return frame.f_code.co_name == 'wait' and frame.f_code.co_filename.endswith("threading.py")
+
+
+class Amostrador(threading.Thread):
+    """
+    Amostra periodicamente as pilhas das threads que executam código do projeto
+    (o script do AppTest e os trabalhadores de eventos) e acumula pilhas colapsadas
+    """
+
+    def __init__(self, intervalo: float = INTERVALO_AMOSTRAGEM):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.pilhas = Counter()
+        self.etapa = None
+        self._parar = threading.Event()
+
+    def run(self) -> None:
+        principal = threading.main_thread().ident
+        while not self._parar.wait(self.intervalo):
+            etapa = self.etapa
+            if etapa is None:
+                continue
+            for ident, frame in sys._current_frames().items():
+                if ident in (principal, self.ident) or _ocioso(frame):
+                    continue
+                pilha = []
+                do_projeto = False
+                while frame is not None:
+                    arquivo = frame.f_code.co_filename
+                    if arquivo.startswith(RAIZ) and not arquivo.startswith(os.path.join(RAIZ, "benchmarks")):
+                        do_projeto = True
+                    pilha.append(f"{os.path.basename(arquivo)}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                if do_projeto:
+                    self.pilhas[";".join([etapa] + pilha[::-1])] += 1
+
+    def parar(self) -> None:
+        self._parar.set()
+        self.join()
+
+    def colapsado(self) -> str:
+        return "".join(f"{pilha} {total}\n" for pilha, total in sorted(self.pilhas.items()))
+
+
+# ============= ETAPAS =============
+
+def _medir_etapa(nome: str, acao: Callable, medidor: Medidor, amostrador: Amostrador,
+                 memoria: bool) -> Dict:
+    """Executa uma etapa (uma execução do script) e coleta as medidas"""
+    medidor.zerar()
+    if memoria:
+        tracemalloc.reset_peak()
+    amostrador.etapa = nome
+
+    inicio = time.perf_counter()
+    at = acao()
+    tempo = time.perf_counter() - inicio
+    aguardar_eventos()  # escritas dos tratadores assíncronos contam para a etapa
+
+    amostrador.etapa = None
+    if at.exception:
+        raise RuntimeError(f"Etapa {nome}: {at.exception[0].message}")
+
+    resultado = {'tempo_ms': round(tempo * 1000, 3), **medidor.resumo()}
+    if memoria:
+        resultado['pico_memoria_kb'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    return resultado
+
+
+def _botao(at, prefixo: str):
+    """Primeiro botão cuja chave começa com o prefixo"""
+    for botao in at.button:
+        if botao.key and botao.key.startswith(prefixo):
+            return botao
+    raise RuntimeError(f"Nenhum botão com chave {prefixo}*")
+
+
+def _escolher_usuario() -> Dict:
+    """Organizador com mais inscrições pendentes (tem o que aprovar e costuma seguir gente)"""
+    jogos = {j['id']: j for j in utils.carregar_jogos()}
+    pendentes = Counter(
+        jogos[i['jogo_id']]['organizador_id']
+        for i in utils.carregar_inscricoes()
+        if i['status'] == 'pendente' and i['jogo_id'] in jogos
+    )
+    return utils.buscar_usuario_por_id(pendentes.most_common(1)[0][0])
+
+
+def perfilar(diretorio_dados: str, memoria: bool = True) -> Dict:
+    """
+    Renderiza cada página (frio e quente) e executa as interações sobre uma cópia dos dados
+    Retorna {'etapas': {nome: medidas}, 'pilhas': texto colapsado}
+    """
+    from streamlit.testing.v1 import AppTest
+
+    medidor = Medidor()
+    _instrumentar(medidor)
+    etapas = {}
+
+    with tempfile.TemporaryDirectory(prefix="jogofacil-perfil-") as trabalho:
+        shutil.copytree(os.path.join(diretorio_dados, "data"), os.path.join(trabalho, "data"))
+        shutil.copy(os.path.join(RAIZ, "style.css"), trabalho)
+
+        with no_diretorio(trabalho):
+            utils.recarregar_campos()
+            limpar_cache()
+            usuario = _escolher_usuario()
+
+            at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=TIMEOUT_EXECUCAO)
+            at.run()
+            at.session_state['usuario_logado'] = usuario
+
+            amostrador = Amostrador()
+            amostrador.start()
+            if memoria:
+                tracemalloc.start()
+
+            def medir(nome, acao):
+                etapas[nome] = _medir_etapa(nome, acao, medidor, amostrador, memoria)
+                print(f"  {nome:<28} {etapas[nome]['tempo_ms']:>10.1f} ms  "
+                      f"carregar {etapas[nome]['carregar_json']:>4}  salvar {etapas[nome]['salvar_json']:>3}  "
+                      f"imagens {etapas[nome]['imagens_abertas']:>3}"
+                      + (f"  pico {etapas[nome]['pico_memoria_kb']:>9.1f} KB" if memoria else ""))
+
+            def abrir(pagina):
+                def acao():
+                    at.session_state['pagina_atual'] = pagina
+                    return at.run()
+                return acao
+
+            try:
+                for pagina in PAGINAS:
+                    limpar_cache()
+                    medir(f"{pagina}.frio", abrir(pagina))
+                    medir(f"{pagina}.quente", abrir(pagina))
+
+                # Interações
+                medir("feed.abrir", abrir('feed'))
+                medir("feed.curtir", lambda: _botao(at, "feed_curtir_").click().run())
+                medir("feed.abrir_comentarios", lambda: _botao(at, "feed_ver_coment_").click().run())
+
+                def comentar():
+                    at.text_input[0].input("Comentário do perfil")
+                    return [b for b in at.button if b.label == "Comentar"][0].click().run()
+                medir("feed.comentar", comentar)
+
+                medir("organizador.abrir", abrir('organizador'))
+                medir("organizador.aprovar", lambda: _botao(at, "aprovar_").click().run())
+            finally:
+                if memoria:
+                    tracemalloc.stop()
+                amostrador.parar()
+
+    return {'usuario_id': usuario['id'], 'etapas': etapas, 'pilhas': amostrador.colapsado()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede a renderização das páginas com o AppTest")
+    parser.add_argument("--escala", choices=list(ESCALAS), default='pequena')
+    parser.add_argument("--semente", type=int, default=SEMENTE_PADRAO)
+    parser.add_argument("--dados", help="diretório com data/ já gerado (padrão: benchmarks/.dados/<escala>-<semente>)")
+    parser.add_argument("--sem-memoria", action="store_true",
+                        help="não mede o pico de memória (o tracemalloc deixa tudo mais lento)")
+    parser.add_argument("--saida", help="prefixo dos arquivos de saída (padrão: benchmarks/resultados/perfil-<commit>-<escala>)")
+    args = parser.parse_args()
+
+    raiz = os.getcwd()
+    dados = os.path.abspath(args.dados or os.path.join("benchmarks", ".dados", f"{args.escala}-{args.semente}"))
+    if not os.path.exists(os.path.join(dados, "data", "usuarios.json")):
+        print(f"Gerando dados ({args.escala}) em {dados}...")
+        gerar_dados(dados, args.escala, args.semente)
+
+    commit = commit_atual()
+    print(f"Perfil das páginas ({args.escala}, commit {commit}):")
+    perfil = perfilar(dados, memoria=not args.sem_memoria)
+
+    prefixo = args.saida or os.path.join(raiz, "benchmarks", "resultados", f"perfil-{commit}-{args.escala}")
+    os.makedirs(os.path.dirname(prefixo), exist_ok=True)
+    with open(prefixo + ".json", 'w', encoding='utf-8') as f:
+        json.dump({
+            'metadados': {
+                'commit': commit,
+                'data': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'escala': args.escala,
+                'semente': args.semente,
+                'usuario_id': perfil['usuario_id']
+            },
+            'etapas': perfil['etapas']
+        }, f, ensure_ascii=False, indent=2)
+    with open(prefixo + ".folded", 'w', encoding='utf-8') as f:
+        f.write(perfil['pilhas'])
+    print(f"\nRelatório em {prefixo}.json, pilhas colapsadas em {prefixo}.folded")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,38 @@ Módulo de funções utilitárias para a Rede Social de Futebol Society
 """
 import json
 import os
-from datetime import datetime, time
-from typing import List, Dict, Optional
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from types import MappingProxyType
+from typing import Iterable, Iterator, List, Dict, Mapping, Optional, Sequence, Tuple
 import random
-
+import re
+import threading
+from time import monotonic
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from utils_barramento import publicar
+from utils_cache import em_cache, invalidar, versao_colecao
+from utils_metricas import medido, medir_armazenamento, incrementar, colecao_do_arquivo
+from utils_snapshot import VisaoSnapshot, abrir_snapshot, descartar_snapshot
+from utils_registros import (
+    Usuario, Campo, Jogo, Inscricao, Notificacao, StatusJogo, StatusInscricao, para_json
+)
+from utils_eventos import (
+    emitir, registrar_tratador,
+    InscricaoCriada, StatusInscricaoAlterado, JogadorRemovido,
+    StatusInscricoesAlteradoEmLote, JogadoresRemovidosEmLote
+)
+
+
+# Canais do barramento publicados pelas funções de escrita
+CANAL_USUARIOS = 'usuarios'        # {'usuario_id': ...} quando o cadastro muda
+CANAL_INSCRICOES = 'inscricoes'    # {'jogadores_ids': [...]} quando inscrições desses jogadores mudam
 
 # Caminhos dos arquivos JSON
 DATA_DIR = "data"
@@ -14,16 +42,25 @@ USUARIOS_FILE = os.path.join(DATA_DIR, "usuarios.json")
 JOGOS_FILE = os.path.join(DATA_DIR, "jogos.json")
 CAMPOS_FILE = os.path.join(DATA_DIR, "campos.json")
 INSCRICOES_FILE = os.path.join(DATA_DIR, "inscricoes.json")
-NOTIFICACOES_FILE = os.path.join(DATA_DIR, "notificacoes.json")
+NOTIFICACOES_FILE = os.path.join(DATA_DIR, "notificacoes.json")  # formato antigo, migrado para as caixas
+NOTIFICACOES_DIR = os.path.join(DATA_DIR, "notificacoes")
+NOTIFICACOES_SEQ_FILE = os.path.join(NOTIFICACOES_DIR, "sequencia.json")
 FOTOS_DIR = os.path.join(DATA_DIR, "fotos")
 
 
 # ============= FUNÇÕES DE CARREGAMENTO E SALVAMENTO =============
 
-def carregar_json(arquivo: str) -> List[Dict]:
-    """Carrega dados de um arquivo JSON"""
+@medir_armazenamento('carregar')
+def carregar_json(arquivo: str) -> Sequence[Dict]:
+    """
+    Carrega dados de um arquivo JSON. Com snapshot binário atualizado, devolve
+    uma visão somente leitura que monta os registros sob demanda
+    """
     if not os.path.exists(arquivo):
         return []
+    snapshot = abrir_snapshot(arquivo)
+    if snapshot is not None and snapshot.reservar():
+        return VisaoSnapshot(snapshot)
     try:
         with open(arquivo, 'r', encoding='utf-8') as f:
             return json.load(f)
@@ -31,71 +68,198 @@ def carregar_json(arquivo: str) -> List[Dict]:
         return []
 
 
+@medir_armazenamento('salvar')
 def salvar_json(arquivo: str, dados: List[Dict]) -> bool:
     """Salva dados em um arquivo JSON"""
     try:
         with open(arquivo, 'w', encoding='utf-8') as f:
-            json.dump(dados, f, ensure_ascii=False, indent=2)
+            json.dump(dados, f, ensure_ascii=False, indent=2, default=para_json)
         return True
     except:
         return False
+    finally:
+        descartar_snapshot(arquivo)
+        invalidar(arquivo)
+
+
+TAMANHO_BLOCO_LEITURA = 1 << 18  # caracteres lidos por vez pelo iterar_json
+_SEPARADORES = re.compile(r'[\s,]*')
+
+
+def iterar_json(arquivo: str, usar_snapshot: bool = True, estrito: bool = False) -> Iterator[Dict]:
+    """
+    Percorre os registros de um arquivo com uma lista JSON, um por vez, lendo o
+    arquivo em blocos: a memória não cresce com o tamanho da coleção e quem
+    para de iterar (ex: achou o que procurava) não lê o resto do arquivo.
+    Um arquivo truncado para no último registro completo; com estrito, lê
+    sempre o JSON e levanta ValueError depois dele. Se houver um snapshot
+    atualizado da coleção (utils_snapshot), lê dele em vez do JSON
+    """
+    if not os.path.exists(arquivo):
+        return
+    incrementar('jogofacil_armazenamento_operacoes_total', operacao='iterar', colecao=colecao_do_arquivo(arquivo))
+
+    if usar_snapshot and not estrito:
+        snapshot = abrir_snapshot(arquivo)
+        if snapshot is not None and snapshot.reservar():
+            try:
+                yield from snapshot
+            finally:
+                snapshot.liberar()
+            return
+
+    decodificar = json.JSONDecoder().scan_once
+    try:
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            buffer = f.read(TAMANHO_BLOCO_LEITURA).lstrip()
+            if not buffer.startswith("["):
+                if estrito:
+                    raise ValueError(f"{arquivo} não contém uma lista JSON")
+                return
+            posicao, fim_arquivo = 1, False
+            while True:
+                posicao = _SEPARADORES.match(buffer, posicao).end()
+                if posicao < len(buffer) and buffer[posicao] == "]":
+                    return
+                try:
+                    registro, fim = decodificar(buffer, posicao)
+                    # Só aceita se o registro não termina no fim do bloco (pode continuar no próximo)
+                    if fim < len(buffer) or fim_arquivo:
+                        yield registro
+                        posicao = fim
+                        continue
+                except (StopIteration, ValueError):
+                    if fim_arquivo:
+                        if estrito:
+                            raise ValueError(f"{arquivo} truncado ou corrompido")
+                        return
+                bloco = f.read(TAMANHO_BLOCO_LEITURA)
+                fim_arquivo = not bloco
+                buffer = buffer[posicao:] + bloco
+                posicao = 0
+    except OSError:
+        return
+
+
+# ============= TRAVA ENTRE PROCESSOS =============
+
+class TravaProcessos:
+    """
+    Trava reentrante que vale entre as threads (RLock) e entre os processos
+    (trava do sistema num arquivo, solta sozinha se o processo morrer). Usada
+    em leitura-modificação-escrita de arquivos compartilhados, como as
+    sequências de ids
+    """
+
+    def __init__(self, arquivo: str):
+        self.arquivo = arquivo
+        self._trava = threading.RLock()
+        self._nivel = 0
+        self._f = None
+
+    def __enter__(self) -> 'TravaProcessos':
+        self._trava.acquire()
+        if self._nivel == 0:
+            try:
+                os.makedirs(os.path.dirname(self.arquivo), exist_ok=True)
+                self._f = open(self.arquivo, 'a+')
+                if fcntl:
+                    fcntl.flock(self._f.fileno(), fcntl.LOCK_EX)
+                else:
+                    self._f.seek(0)
+                    while True:
+                        try:
+                            msvcrt.locking(self._f.fileno(), msvcrt.LK_LOCK, 1)
+                            break
+                        except OSError:
+                            continue  # LK_LOCK desiste depois de 10 s; tenta de novo
+            except BaseException:
+                if self._f:
+                    self._f.close()
+                    self._f = None
+                self._trava.release()
+                raise
+        self._nivel += 1
+        return self
+
+    def __exit__(self, *erro) -> None:
+        self._nivel -= 1
+        if self._nivel == 0:
+            self._f.close()  # fechar o arquivo solta a trava do sistema
+            self._f = None
+        self._trava.release()
 
 
 # ============= FUNÇÕES DE USUÁRIOS =============
 
-def carregar_usuarios() -> List[Dict]:
+def carregar_usuarios() -> List[Usuario]:
     """Carrega lista de usuários"""
-    return carregar_json(USUARIOS_FILE)
+    return Usuario.lista(carregar_json(USUARIOS_FILE))
 
 
-def salvar_usuarios(usuarios: List[Dict]) -> bool:
+def salvar_usuarios(usuarios: List[Usuario]) -> bool:
     """Salva lista de usuários"""
     return salvar_json(USUARIOS_FILE, usuarios)
 
 
-def buscar_usuario_por_login(login: str) -> Optional[Dict]:
+@em_cache(USUARIOS_FILE)
+def buscar_usuario_por_login(login: str) -> Optional[Usuario]:
     """Busca usuário por login (nome/email/apelido)"""
-    usuarios = carregar_usuarios()
-    for usuario in usuarios:
+    for usuario in iterar_json(USUARIOS_FILE):
         if usuario.get('login', '').lower() == login.lower():
-            return usuario
+            return Usuario.de_dict(usuario)
     return None
 
 
-def buscar_usuario_por_id(user_id: int) -> Optional[Dict]:
+@em_cache(USUARIOS_FILE)
+def buscar_usuario_por_id(user_id: int) -> Optional[Usuario]:
     """Busca usuário por ID"""
-    usuarios = carregar_usuarios()
-    for usuario in usuarios:
+    for usuario in iterar_json(USUARIOS_FILE):
         if usuario.get('id') == user_id:
-            return usuario
+            return Usuario.de_dict(usuario)
     return None
 
 
-def buscar_usuario_por_telefone(telefone: str) -> Optional[Dict]:
+def buscar_usuarios_por_ids(ids: Iterable[int]) -> Dict[int, Usuario]:
+    """Busca vários usuários numa única passada (ex: autores de uma página de comentários)"""
+    faltando = set(ids)
+    encontrados = {}
+    if not faltando:
+        return encontrados
+    for usuario in iterar_json(USUARIOS_FILE):
+        if usuario.get('id') in faltando:
+            encontrados[usuario['id']] = Usuario.de_dict(usuario)
+            faltando.discard(usuario['id'])
+            if not faltando:
+                break
+    return encontrados
+
+
+@em_cache(USUARIOS_FILE)
+def buscar_usuario_por_telefone(telefone: str) -> Optional[Usuario]:
     """Busca usuário por telefone"""
-    usuarios = carregar_usuarios()
-    for usuario in usuarios:
+    for usuario in iterar_json(USUARIOS_FILE):
         if usuario.get('telefone') == telefone:
-            return usuario
+            return Usuario.de_dict(usuario)
     return None
 
 
-def criar_usuario(login: str, senha: str, telefone: str) -> Dict:
+def criar_usuario(login: str, senha: str, telefone: str) -> Usuario:
     """Cria um novo usuário"""
     usuarios = carregar_usuarios()
     
     # Gera ID único
-    novo_id = max([u.get('id', 0) for u in usuarios], default=0) + 1
-    
-    novo_usuario = {
-        'id': novo_id,
-        'login': login,
-        'senha': senha,
-        'telefone': telefone,
-        'nome': '',
-        'apelido_jogador': '',
-        'foto': ''
-    }
+    novo_id = max([u.id for u in usuarios], default=0) + 1
+    
+    novo_usuario = Usuario(
+        id=novo_id,
+        login=login,
+        senha=senha,
+        telefone=telefone,
+        nome='',
+        apelido_jogador='',
+        foto=''
+    )
     
     usuarios.append(novo_usuario)
     salvar_usuarios(usuarios)
@@ -107,12 +271,15 @@ def atualizar_usuario(user_id: int, dados: Dict) -> bool:
     usuarios = carregar_usuarios()
     
     for i, usuario in enumerate(usuarios):
-        if usuario.get('id') == user_id:
+        if usuario.id == user_id:
             # Atualiza apenas os campos fornecidos
             for chave, valor in dados.items():
                 if chave != 'id':  # Não permite alterar o ID
                     usuarios[i][chave] = valor
-            return salvar_usuarios(usuarios)
+            if not salvar_usuarios(usuarios):
+                return False
+            publicar(CANAL_USUARIOS, {'usuario_id': user_id})
+            return True
     
     return False
 
@@ -123,73 +290,196 @@ def gerar_nova_senha() -> str:
 
 
 # ============= FUNÇÕES DE CAMPOS =============
+#
+# O campos.json é cadastro fixo: é lido uma vez ao iniciar o processo para um
+# catálogo imutável (registros somente leitura, índices por id, tipo e
+# formato) compartilhado por todas as sessões. Só é relido por
+# recarregar_campos() ou quando o arquivo muda (checado a cada poucos segundos)
 
-def carregar_campos() -> List[Dict]:
-    """Carrega lista de campos"""
-    return carregar_json(CAMPOS_FILE)
+INTERVALO_VERIFICACAO_CAMPOS = 5  # segundos entre checagens do arquivo
 
 
-def buscar_campo_por_id(campo_id: int) -> Optional[Dict]:
-    """Busca campo por ID"""
-    campos = carregar_campos()
+@dataclass(frozen=True)
+class CatalogoCampos:
+    """Campos cadastrados e seus índices, todos somente leitura"""
+    campos: Tuple[Campo, ...]
+    por_id: Mapping[int, Campo]
+    por_tipo: Mapping[str, Tuple[Campo, ...]]
+    por_formato: Mapping[str, Tuple[Campo, ...]]
+    rotulos: Mapping[str, int]  # "Nome - formato (tipo)" -> id, para seleção nas páginas
+    carimbo: Optional[tuple]
+
+
+_catalogo_campos: Optional[CatalogoCampos] = None
+_proxima_verificacao_campos = 0.0
+_trava_campos = threading.Lock()
+
+
+def _carimbo_campos() -> Optional[tuple]:
+    """Data de modificação e tamanho do campos.json"""
+    try:
+        stat = os.stat(CAMPOS_FILE)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def _montar_catalogo_campos() -> CatalogoCampos:
+    """Lê o campos.json e monta o catálogo com os índices"""
+    carimbo = _carimbo_campos()
+    campos = tuple(Campo.lista(carregar_json(CAMPOS_FILE)))
+    
+    por_tipo: Dict[str, list] = {}
+    por_formato: Dict[str, list] = {}
     for campo in campos:
-        if campo.get('id') == campo_id:
-            return campo
-    return None
+        por_tipo.setdefault(campo.get('tipo'), []).append(campo)
+        por_formato.setdefault(campo.get('formato'), []).append(campo)
+    
+    return CatalogoCampos(
+        campos=campos,
+        por_id=MappingProxyType({c.id: c for c in campos}),
+        por_tipo=MappingProxyType({k: tuple(v) for k, v in por_tipo.items()}),
+        por_formato=MappingProxyType({k: tuple(v) for k, v in por_formato.items()}),
+        rotulos=MappingProxyType({f"{c.nome} - {c.formato} ({c.tipo})": c.id for c in campos}),
+        carimbo=carimbo
+    )
+
+
+def recarregar_campos() -> CatalogoCampos:
+    """Relê o campos.json imediatamente (atualização manual do catálogo)"""
+    global _catalogo_campos, _proxima_verificacao_campos
+    
+    with _trava_campos:
+        _catalogo_campos = _montar_catalogo_campos()
+        _proxima_verificacao_campos = monotonic() + INTERVALO_VERIFICACAO_CAMPOS
+        return _catalogo_campos
+
+
+def obter_catalogo_campos() -> CatalogoCampos:
+    """Catálogo de campos do processo (carregado na primeira chamada)"""
+    global _proxima_verificacao_campos
+    
+    catalogo = _catalogo_campos
+    if catalogo is None:
+        return recarregar_campos()
+    
+    agora = monotonic()
+    if agora >= _proxima_verificacao_campos:
+        _proxima_verificacao_campos = agora + INTERVALO_VERIFICACAO_CAMPOS
+        if _carimbo_campos() != catalogo.carimbo:
+            return recarregar_campos()
+    
+    return catalogo
+
+
+def carregar_campos() -> List[Campo]:
+    """Lista de campos (registros somente leitura)"""
+    return list(obter_catalogo_campos().campos)
+
+
+def buscar_campo_por_id(campo_id: int) -> Optional[Campo]:
+    """Busca campo por ID"""
+    return obter_catalogo_campos().por_id.get(campo_id)
+
+
+def listar_campos_por_tipo(tipo: str) -> List[Campo]:
+    """Campos de um tipo (coberto, descoberto)"""
+    return list(obter_catalogo_campos().por_tipo.get(tipo, ()))
+
+
+def listar_campos_por_formato(formato: str) -> List[Campo]:
+    """Campos de um formato (ex: 6x6)"""
+    return list(obter_catalogo_campos().por_formato.get(formato, ()))
 
 
 # ============= FUNÇÕES DE JOGOS =============
 
-def carregar_jogos() -> List[Dict]:
+def carregar_jogos() -> List[Jogo]:
     """Carrega lista de jogos"""
-    return carregar_json(JOGOS_FILE)
+    return Jogo.lista(carregar_json(JOGOS_FILE))
 
 
-def salvar_jogos(jogos: List[Dict]) -> bool:
+def salvar_jogos(jogos: List[Jogo]) -> bool:
     """Salva lista de jogos"""
     return salvar_json(JOGOS_FILE, jogos)
 
 
-def buscar_jogo_por_id(jogo_id: int) -> Optional[Dict]:
+@em_cache(JOGOS_FILE)
+def buscar_jogo_por_id(jogo_id: int) -> Optional[Jogo]:
     """Busca jogo por ID"""
     jogos = carregar_jogos()
     for jogo in jogos:
-        if jogo.get('id') == jogo_id:
+        if jogo.id == jogo_id:
             return jogo
     return None
 
 
+# Índice de reservas: (campo_id, data) -> [(início, fim, jogo_id), ...]
+# Remontado só quando o jogos.json muda; usado nas checagens de conflito
+_indice_reservas: Dict[tuple, List[tuple]] = {}
+_versao_indice_reservas = None
+
+
+def _garantir_indice_reservas() -> None:
+    """Remonta o índice de reservas se o jogos.json mudou"""
+    global _versao_indice_reservas
+    
+    versao = versao_colecao(JOGOS_FILE)
+    if versao == _versao_indice_reservas:
+        return
+    
+    indice = {}
+    for jogo in carregar_jogos():
+        inicio = datetime.strptime(jogo.hora_inicio, "%H:%M").time()
+        fim = datetime.strptime(jogo.hora_fim, "%H:%M").time()
+        indice.setdefault((jogo.campo_id, jogo.data), []).append((inicio, fim, jogo.id))
+    
+    _indice_reservas.clear()
+    _indice_reservas.update(indice)
+    _versao_indice_reservas = versao
+
+
+def _tem_conflito(campo_id: int, data: str, inicio: time, fim: time, jogo_id_excluir: Optional[int] = None) -> bool:
+    """Procura sobreposição no índice de reservas (só os jogos do campo naquela data)"""
+    for jogo_inicio, jogo_fim, jogo_id in _indice_reservas.get((campo_id, data), []):
+        # Ignora o próprio jogo (útil para edição)
+        if jogo_id_excluir and jogo_id == jogo_id_excluir:
+            continue
+        
+        # Há conflito se: novo início < jogo fim E novo fim > jogo início
+        if inicio < jogo_fim and fim > jogo_inicio:
+            return True
+    
+    return False
+
+
+@em_cache(JOGOS_FILE)
 def verificar_conflito_horario(campo_id: int, data: str, hora_inicio: str, hora_fim: str, jogo_id_excluir: Optional[int] = None) -> bool:
     """
     Verifica se há conflito de horário para um campo em uma data específica
     Retorna True se houver conflito, False caso contrário
     """
-    jogos = carregar_jogos()
+    _garantir_indice_reservas()
     
     # Converte strings de horário para objetos time para comparação
     inicio = datetime.strptime(hora_inicio, "%H:%M").time()
     fim = datetime.strptime(hora_fim, "%H:%M").time()
     
-    for jogo in jogos:
-        # Ignora o próprio jogo (útil para edição)
-        if jogo_id_excluir and jogo.get('id') == jogo_id_excluir:
-            continue
-            
-        # Verifica se é o mesmo campo e mesma data
-        if jogo.get('campo_id') == campo_id and jogo.get('data') == data:
-            jogo_inicio = datetime.strptime(jogo.get('hora_inicio'), "%H:%M").time()
-            jogo_fim = datetime.strptime(jogo.get('hora_fim'), "%H:%M").time()
-            
-            # Verifica sobreposição de horários
-            # Há conflito se: novo início < jogo fim E novo fim > jogo início
-            if inicio < jogo_fim and fim > jogo_inicio:
-                return True
+    return _tem_conflito(campo_id, data, inicio, fim, jogo_id_excluir)
+
+
+def listar_datas_com_conflito(campo_id: int, datas: List[str], hora_inicio: str, hora_fim: str) -> List[str]:
+    """Checagem em lote: quais das datas já têm jogo no campo nesse horário"""
+    _garantir_indice_reservas()
     
-    return False
+    inicio = datetime.strptime(hora_inicio, "%H:%M").time()
+    fim = datetime.strptime(hora_fim, "%H:%M").time()
+    
+    return [data for data in datas if _tem_conflito(campo_id, data, inicio, fim)]
 
 
 def criar_jogo(organizador_id: int, campo_id: int, data: str, hora_inicio: str, 
-               hora_fim: str, valor: float, vagas: int) -> Optional[Dict]:
+               hora_fim: str, valor: float, vagas: int) -> Optional[Jogo]:
     """Cria um novo jogo"""
     
     # Verifica conflito de horário
@@ -199,30 +489,104 @@ def criar_jogo(organizador_id: int, campo_id: int, data: str, hora_inicio: str,
     jogos = carregar_jogos()
     
     # Gera ID único
-    novo_id = max([j.get('id', 0) for j in jogos], default=0) + 1
-    
-    novo_jogo = {
-        'id': novo_id,
-        'organizador_id': organizador_id,
-        'campo_id': campo_id,
-        'data': data,
-        'hora_inicio': hora_inicio,
-        'hora_fim': hora_fim,
-        'valor': valor,
-        'vagas_total': vagas,
-        'vagas_ocupadas': 0,
-        'status': 'ativo'  # ativo, cancelado, finalizado
-    }
+    novo_id = max([j.id for j in jogos], default=0) + 1
+    
+    novo_jogo = Jogo(
+        id=novo_id,
+        organizador_id=organizador_id,
+        campo_id=campo_id,
+        data=data,
+        hora_inicio=hora_inicio,
+        hora_fim=hora_fim,
+        valor=valor,
+        vagas_total=vagas,
+        vagas_ocupadas=0,
+        status=StatusJogo.ATIVO
+    )
     
     jogos.append(novo_jogo)
     salvar_jogos(jogos)
     return novo_jogo
 
 
-def listar_jogos_por_organizador(organizador_id: int) -> List[Dict]:
+# Frequências das séries de jogos (intervalo em dias) e limite de ocorrências
+FREQUENCIAS_SERIE = {'semanal': 7, 'quinzenal': 14}
+MAX_JOGOS_SERIE = 52
+
+
+def gerar_datas_serie(data_inicial: str, data_final: str, frequencia: str = 'semanal') -> List[str]:
+    """
+    Datas de uma série, da data inicial até a final (inclusive)
+    Levanta ValueError se a data final for anterior à inicial
+    """
+    intervalo = timedelta(days=FREQUENCIAS_SERIE[frequencia])
+    atual = datetime.strptime(data_inicial, "%Y-%m-%d")
+    fim = datetime.strptime(data_final, "%Y-%m-%d")
+    if fim < atual:
+        raise ValueError("A data final da série deve ser igual ou posterior à data inicial")
+    
+    datas = []
+    while atual <= fim:
+        datas.append(atual.strftime("%Y-%m-%d"))
+        atual += intervalo
+    return datas
+
+
+def criar_serie_jogos(organizador_id: int, campo_id: int, data_inicial: str, data_final: str,
+                      hora_inicio: str, hora_fim: str, valor: float, vagas: int,
+                      frequencia: str = 'semanal') -> Dict:
+    """
+    Cria de uma vez todos os jogos de uma série semanal ou quinzenal
+    As datas com conflito de horário ficam de fora e os demais jogos são
+    gravados numa única escrita. Só os primeiros MAX_JOGOS_SERIE jogos são
+    criados; as datas seguintes voltam em 'excedentes'. Com intervalo de
+    datas inválido nada é criado e 'erro' traz o motivo.
+    Retorna {'serie_id', 'jogos', 'conflitos', 'excedentes', 'erro'}
+    """
+    try:
+        datas = gerar_datas_serie(data_inicial, data_final, frequencia)
+    except ValueError as e:
+        return {'serie_id': None, 'jogos': [], 'conflitos': [], 'excedentes': [], 'erro': str(e)}
+    excedentes = datas[MAX_JOGOS_SERIE:]
+    datas = datas[:MAX_JOGOS_SERIE]
+    conflitos = listar_datas_com_conflito(campo_id, datas, hora_inicio, hora_fim)
+    
+    jogos = carregar_jogos()
+    proximo_id = max([j.id for j in jogos], default=0) + 1
+    serie_id = max([j.get('serie_id', 0) for j in jogos], default=0) + 1
+    
+    novos_jogos = []
+    for data in datas:
+        if data in conflitos:
+            continue
+        novos_jogos.append(Jogo(
+            id=proximo_id,
+            organizador_id=organizador_id,
+            campo_id=campo_id,
+            data=data,
+            hora_inicio=hora_inicio,
+            hora_fim=hora_fim,
+            valor=valor,
+            vagas_total=vagas,
+            vagas_ocupadas=0,
+            status=StatusJogo.ATIVO,
+            serie_id=serie_id
+        ))
+        proximo_id += 1
+    
+    if novos_jogos:
+        jogos.extend(novos_jogos)
+        if not salvar_jogos(jogos):
+            novos_jogos = []
+    
+    return {'serie_id': serie_id, 'jogos': novos_jogos, 'conflitos': conflitos, 'excedentes': excedentes, 'erro': None}
+
+
+@em_cache(JOGOS_FILE)
+def listar_jogos_por_organizador(organizador_id: int) -> List[Jogo]:
     """Lista todos os jogos criados por um organizador"""
     jogos = carregar_jogos()
-    return [j for j in jogos if j.get('organizador_id') == organizador_id]
+    return [j for j in jogos if j.organizador_id == organizador_id]
 
 
 def excluir_jogo(jogo_id: int) -> bool:
@@ -239,7 +603,7 @@ def excluir_jogo(jogo_id: int) -> bool:
     data_formatada = datetime.strptime(jogo['data'], "%Y-%m-%d").strftime("%d/%m/%Y")
     
     for insc in inscricoes:
-        if insc['status'] in ['pendente', 'aprovada']:
+        if insc.status in (StatusInscricao.PENDENTE, StatusInscricao.APROVADA):
             criar_notificacao(
                 usuario_id=insc['jogador_id'],
                 tipo='jogo_cancelado',
@@ -249,246 +613,999 @@ def excluir_jogo(jogo_id: int) -> bool:
     
     # Remove todas as inscrições do jogo
     todas_inscricoes = carregar_inscricoes()
-    inscricoes_filtradas = [i for i in todas_inscricoes if i.get('jogo_id') != jogo_id]
+    inscricoes_filtradas = [i for i in todas_inscricoes if i.jogo_id != jogo_id]
     salvar_inscricoes(inscricoes_filtradas)
+    publicar(CANAL_INSCRICOES, {'jogadores_ids': [i['jogador_id'] for i in inscricoes]})
     
     # Remove o jogo
     jogos = carregar_jogos()
-    jogos_filtrados = [j for j in jogos if j.get('id') != jogo_id]
+    jogos_filtrados = [j for j in jogos if j.id != jogo_id]
     return salvar_jogos(jogos_filtrados)
 
 
-def listar_jogos_futuros(data_inicial: Optional[str] = None) -> List[Dict]:
+@em_cache(JOGOS_FILE)
+def listar_jogos_futuros(data_inicial: Optional[str] = None) -> List[Jogo]:
     """Lista jogos futuros a partir de uma data"""
     jogos = carregar_jogos()
     hoje = datetime.now().strftime("%Y-%m-%d")
     
     data_filtro = data_inicial if data_inicial else hoje
     
-    jogos_futuros = [j for j in jogos if j.get('data', '') >= data_filtro and j.get('status') == 'ativo']
+    jogos_futuros = [j for j in jogos if j.data >= data_filtro and j.status == StatusJogo.ATIVO]
     
     # Ordena por data e hora
-    jogos_futuros.sort(key=lambda x: (x.get('data', ''), x.get('hora_inicio', '')))
+    jogos_futuros.sort(key=lambda x: (x.data, x.hora_inicio))
     
     return jogos_futuros
 
 
 # ============= FUNÇÕES DE INSCRIÇÕES =============
 
-def carregar_inscricoes() -> List[Dict]:
+def carregar_inscricoes() -> List[Inscricao]:
     """Carrega lista de inscrições"""
-    return carregar_json(INSCRICOES_FILE)
+    return Inscricao.lista(carregar_json(INSCRICOES_FILE))
 
 
-def salvar_inscricoes(inscricoes: List[Dict]) -> bool:
+def salvar_inscricoes(inscricoes: List[Inscricao]) -> bool:
     """Salva lista de inscrições"""
     return salvar_json(INSCRICOES_FILE, inscricoes)
 
 
-def criar_inscricao(jogo_id: int, jogador_id: int) -> Optional[Dict]:
-    """Cria uma nova inscrição"""
-    inscricoes = carregar_inscricoes()
-    
-    # Verifica se já existe inscrição
-    for insc in inscricoes:
-        if insc.get('jogo_id') == jogo_id and insc.get('jogador_id') == jogador_id:
+def criar_inscricao(jogo_id: int, jogador_id: int) -> Optional[Inscricao]:
+    """
+    Cria uma nova inscrição
+    Com o jogo lotado o pedido fica pendente e entra na fila de espera
+    (fila_espera=True): só esses pedidos são aprovados sozinhos quando abre vaga
+    """
+    with _trava_vagas:
+        inscricoes = carregar_inscricoes()
+        
+        # Verifica se já existe inscrição
+        for insc in inscricoes:
+            if insc.jogo_id == jogo_id and insc.jogador_id == jogador_id:
+                return None
+        
+        # Gera ID único
+        novo_id = max([i.id for i in inscricoes], default=0) + 1
+        
+        nova_inscricao = Inscricao(
+            id=novo_id,
+            jogo_id=jogo_id,
+            jogador_id=jogador_id,
+            status=StatusInscricao.PENDENTE,
+            data_inscricao=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        )
+        if vagas_disponiveis(jogo_id) <= 0:
+            nova_inscricao.fila_espera = True
+        
+        inscricoes.append(nova_inscricao)
+        if not _salvar_inscricoes_e_vagas(inscricoes, [jogo_id]):
             return None
     
-    # Gera ID único
-    novo_id = max([i.get('id', 0) for i in inscricoes], default=0) + 1
-    
-    nova_inscricao = {
-        'id': novo_id,
-        'jogo_id': jogo_id,
-        'jogador_id': jogador_id,
-        'status': 'pendente',  # pendente, aprovada, reprovada, cancelada
-        'data_inscricao': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
+    publicar(CANAL_INSCRICOES, {'jogadores_ids': [jogador_id]})
     
-    inscricoes.append(nova_inscricao)
-    salvar_inscricoes(inscricoes)
-    
-    # Cria notificação para o organizador
-    jogo = buscar_jogo_por_id(jogo_id)
-    if jogo:
-        jogador = buscar_usuario_por_id(jogador_id)
-        campo = buscar_campo_por_id(jogo['campo_id'])
-        nome_jogador = jogador.get('apelido_jogador') or jogador.get('nome') or jogador.get('login')
-        data_formatada = datetime.strptime(jogo['data'], "%Y-%m-%d").strftime("%d/%m/%Y")
-        
-        criar_notificacao(
-            usuario_id=jogo['organizador_id'],
-            tipo='nova_inscricao',
-            mensagem=f'{nome_jogador} quer participar do seu jogo em {campo["nome"]} no dia {data_formatada} às {jogo["hora_inicio"]}.',
-            dados={'jogo_id': jogo_id, 'inscricao_id': novo_id}
-        )
+    # Notificação do organizador é montada em segundo plano
+    emitir(InscricaoCriada(inscricao_id=novo_id, jogo_id=jogo_id, jogador_id=jogador_id))
     
     return nova_inscricao
 
 
-def listar_inscricoes_por_jogo(jogo_id: int, status: Optional[str] = None) -> List[Dict]:
+@em_cache(INSCRICOES_FILE)
+def listar_inscricoes_por_jogo(jogo_id: int, status: Optional[str] = None) -> List[Inscricao]:
     """Lista inscrições de um jogo, opcionalmente filtrando por status"""
     inscricoes = carregar_inscricoes()
-    resultado = [i for i in inscricoes if i.get('jogo_id') == jogo_id]
+    resultado = [i for i in inscricoes if i.jogo_id == jogo_id]
     
     if status:
-        resultado = [i for i in resultado if i.get('status') == status]
+        resultado = [i for i in resultado if i.status == status]
     
     return resultado
 
 
-def listar_inscricoes_por_jogador(jogador_id: int) -> List[Dict]:
+@em_cache(INSCRICOES_FILE)
+def listar_inscricoes_por_jogador(jogador_id: int) -> List[Inscricao]:
     """Lista todas as inscrições de um jogador"""
     inscricoes = carregar_inscricoes()
-    return [i for i in inscricoes if i.get('jogador_id') == jogador_id]
+    return [i for i in inscricoes if i.jogador_id == jogador_id]
 
 
 def atualizar_status_inscricao(inscricao_id: int, novo_status: str) -> bool:
-    """Atualiza o status de uma inscrição"""
-    inscricoes = carregar_inscricoes()
+    """
+    Atualiza o status de uma inscrição
+    A aprovação só acontece se o jogo tiver vaga (retorna False se lotado);
+    quando um aprovado sai, o primeiro da fila de espera é promovido
+    """
+    with _trava_vagas:
+        inscricoes = carregar_inscricoes()
+        
+        insc = next((i for i in inscricoes if i.id == inscricao_id), None)
+        if not insc:
+            return False
+        
+        status_anterior = insc.get('status')
+        if novo_status == 'aprovada' and status_anterior != 'aprovada' and vagas_disponiveis(insc['jogo_id']) <= 0:
+            return False
+        
+        aprovadas_antes = _contar_aprovadas(inscricoes, insc['jogo_id'])
+        insc['status'] = novo_status
+        
+        # Se estava aprovada, a vaga liberada vai para a fila de espera
+        promovidas = []
+        if status_anterior == 'aprovada' and novo_status != 'aprovada':
+            promovidas = _promover_fila_espera(inscricoes, insc['jogo_id'], aprovadas_antes, 1)
+        
+        if not _salvar_inscricoes_e_vagas(inscricoes, [insc['jogo_id']]):
+            return False
     
-    for i, insc in enumerate(inscricoes):
-        if insc.get('id') == inscricao_id:
-            inscricoes[i]['status'] = novo_status
-            
-            # Atualiza vagas ocupadas se aprovado
-            if novo_status == 'aprovada':
-                atualizar_vagas_jogo(insc['jogo_id'], 1)
-                
-                # Notifica jogador
-                jogo = buscar_jogo_por_id(insc['jogo_id'])
-                if jogo:
-                    campo = buscar_campo_por_id(jogo['campo_id'])
-                    data_formatada = datetime.strptime(jogo['data'], "%Y-%m-%d").strftime("%d/%m/%Y")
-                    
-                    criar_notificacao(
-                        usuario_id=insc['jogador_id'],
-                        tipo='inscricao_aprovada',
-                        mensagem=f'Sua inscrição foi aprovada! Jogo em {campo["nome"]} no dia {data_formatada} às {jogo["hora_inicio"]}.',
-                        dados={'jogo_id': insc['jogo_id']}
-                    )
-            elif novo_status == 'reprovada':
-                # Notifica jogador
-                jogo = buscar_jogo_por_id(insc['jogo_id'])
-                if jogo:
-                    campo = buscar_campo_por_id(jogo['campo_id'])
-                    data_formatada = datetime.strptime(jogo['data'], "%Y-%m-%d").strftime("%d/%m/%Y")
-                    
-                    criar_notificacao(
-                        usuario_id=insc['jogador_id'],
-                        tipo='inscricao_reprovada',
-                        mensagem=f'Sua inscrição foi recusada para o jogo em {campo["nome"]} no dia {data_formatada} às {jogo["hora_inicio"]}.',
-                        dados={'jogo_id': insc['jogo_id']}
-                    )
-            elif novo_status == 'cancelada':
-                # Se estava aprovada, libera vaga
-                if insc.get('status') == 'aprovada':
-                    atualizar_vagas_jogo(insc['jogo_id'], -1)
-                
-                # Notifica organizador
-                jogo = buscar_jogo_por_id(insc['jogo_id'])
-                if jogo:
-                    jogador = buscar_usuario_por_id(insc['jogador_id'])
-                    nome_jogador = jogador.get('apelido_jogador') or jogador.get('nome') or jogador.get('login')
-                    data_formatada = datetime.strptime(jogo['data'], "%Y-%m-%d").strftime("%d/%m/%Y")
-                    
-                    criar_notificacao(
-                        usuario_id=jogo['organizador_id'],
-                        tipo='inscricao_cancelada',
-                        mensagem=f'{nome_jogador} cancelou a inscrição no jogo que você organizou em {data_formatada} às {jogo["hora_inicio"]}.',
-                        dados={'jogo_id': insc['jogo_id']}
-                    )
-            
-            return salvar_inscricoes(inscricoes)
+    publicar(CANAL_INSCRICOES, {'jogadores_ids': [insc['jogador_id']] + [p['jogador_id'] for p in promovidas]})
     
-    return False
+    # Notificação do jogador/organizador é montada em segundo plano
+    emitir(StatusInscricaoAlterado(
+        inscricao_id=inscricao_id,
+        jogo_id=insc['jogo_id'],
+        jogador_id=insc['jogador_id'],
+        novo_status=novo_status
+    ))
+    _emitir_status_em_lote(promovidas, 'aprovada')
+    return True
 
 
 def remover_jogador_inscricao(inscricao_id: int) -> bool:
-    """Remove um jogador (organizador removendo)"""
-    inscricoes = carregar_inscricoes()
+    """Remove um jogador (organizador removendo) e promove a fila de espera"""
+    with _trava_vagas:
+        inscricoes = carregar_inscricoes()
+        
+        insc = next((i for i in inscricoes if i.id == inscricao_id), None)
+        if not insc:
+            return False
+        
+        # Remove a inscrição e passa a vaga para o próximo da fila
+        aprovadas_antes = _contar_aprovadas(inscricoes, insc['jogo_id'])
+        inscricoes.remove(insc)
+        promovidas = []
+        if insc.get('status') == 'aprovada':
+            promovidas = _promover_fila_espera(inscricoes, insc['jogo_id'], aprovadas_antes, 1)
+        
+        if not _salvar_inscricoes_e_vagas(inscricoes, [insc['jogo_id']]):
+            return False
+    
+    publicar(CANAL_INSCRICOES, {'jogadores_ids': [insc['jogador_id']] + [p['jogador_id'] for p in promovidas]})
     
-    for i, insc in enumerate(inscricoes):
-        if insc.get('id') == inscricao_id:
-            # Libera vaga
-            atualizar_vagas_jogo(insc['jogo_id'], -1)
+    # Notificação do jogador removido é montada em segundo plano
+    emitir(JogadorRemovido(inscricao_id=inscricao_id, jogo_id=insc['jogo_id'], jogador_id=insc['jogador_id']))
+    _emitir_status_em_lote(promovidas, 'aprovada')
+    return True
+
+
+def atualizar_status_inscricoes_em_lote(inscricoes_ids: List[int], novo_status: str) -> Dict[int, bool]:
+    """
+    Atualiza o status de várias inscrições numa única transação
+    Inscrições e jogos são gravados uma vez só e as notificações de cada jogo
+    saem num único evento, gravado em lote. Aprovações além das vagas livres
+    ficam de fora. Retorna {inscricao_id: True se foi alterada}
+    """
+    resultado = {}
+    
+    with _trava_vagas:
+        inscricoes = carregar_inscricoes()
+        por_id = {i.id: i for i in inscricoes}
+        
+        alteradas = []
+        livres = {}  # jogo_id -> vagas ainda livres neste lote
+        liberadas = {}  # jogo_id -> vagas liberadas por aprovados que saíram
+        aprovadas_antes = {}
+        
+        for inscricao_id in dict.fromkeys(inscricoes_ids):
+            insc = por_id.get(inscricao_id)
+            if not insc or insc.get('status') == novo_status:
+                resultado[inscricao_id] = False
+                continue
+            
+            jogo_id = insc['jogo_id']
+            if jogo_id not in aprovadas_antes:
+                aprovadas_antes[jogo_id] = _contar_aprovadas(inscricoes, jogo_id)
+            if novo_status == 'aprovada':
+                if jogo_id not in livres:
+                    livres[jogo_id] = vagas_disponiveis(jogo_id)
+                if livres[jogo_id] <= 0:
+                    resultado[inscricao_id] = False
+                    continue
+                livres[jogo_id] -= 1
             
-            # Notifica jogador removido
-            jogo = buscar_jogo_por_id(insc['jogo_id'])
-            if jogo:
-                campo = buscar_campo_por_id(jogo['campo_id'])
-                data_formatada = datetime.strptime(jogo['data'], "%Y-%m-%d").strftime("%d/%m/%Y")
-                
-                criar_notificacao(
-                    usuario_id=insc['jogador_id'],
-                    tipo='removido_jogo',
-                    mensagem=f'Você foi removido do jogo em {campo["nome"]} no dia {data_formatada} às {jogo["hora_inicio"]} pelo organizador.',
-                    dados={'jogo_id': insc['jogo_id']}
-                )
+            if insc.get('status') == 'aprovada':
+                liberadas[jogo_id] = liberadas.get(jogo_id, 0) + 1
             
-            # Remove a inscrição
-            inscricoes.pop(i)
-            return salvar_inscricoes(inscricoes)
+            insc['status'] = novo_status
+            alteradas.append(insc)
+            resultado[inscricao_id] = True
+        
+        if not alteradas:
+            return resultado
+        
+        promovidas = []
+        for jogo_id, quantidade in liberadas.items():
+            promovidas.extend(_promover_fila_espera(inscricoes, jogo_id, aprovadas_antes[jogo_id], quantidade))
+        
+        if not _salvar_inscricoes_e_vagas(inscricoes, list({i['jogo_id'] for i in alteradas})):
+            return {inscricao_id: False for inscricao_id in resultado}
     
-    return False
+    publicar(CANAL_INSCRICOES, {'jogadores_ids': [i['jogador_id'] for i in alteradas + promovidas]})
+    
+    # Um evento por jogo; as notificações de cada um são gravadas em lote
+    _emitir_status_em_lote(alteradas, novo_status)
+    _emitir_status_em_lote(promovidas, 'aprovada')
+    return resultado
+
+
+def remover_jogadores_em_lote(inscricoes_ids: List[int]) -> Dict[int, bool]:
+    """
+    Remove vários jogadores numa única transação e promove a fila de espera
+    Retorna {inscricao_id: True se foi removida}
+    """
+    ids = set(inscricoes_ids)
+    
+    with _trava_vagas:
+        inscricoes = carregar_inscricoes()
+        
+        removidas = [i for i in inscricoes if i.id in ids]
+        if not removidas:
+            return {inscricao_id: False for inscricao_id in ids}
+        
+        liberadas = {}  # jogo_id -> aprovados removidos
+        for insc in removidas:
+            if insc.status == StatusInscricao.APROVADA:
+                liberadas[insc.jogo_id] = liberadas.get(insc.jogo_id, 0) + 1
+        aprovadas_antes = {jogo_id: _contar_aprovadas(inscricoes, jogo_id) for jogo_id in liberadas}
+        
+        inscricoes = [i for i in inscricoes if i.id not in ids]
+        
+        promovidas = []
+        for jogo_id, quantidade in liberadas.items():
+            promovidas.extend(_promover_fila_espera(inscricoes, jogo_id, aprovadas_antes[jogo_id], quantidade))
+        
+        if not _salvar_inscricoes_e_vagas(inscricoes, list({i['jogo_id'] for i in removidas})):
+            return {inscricao_id: False for inscricao_id in ids}
+    
+    publicar(CANAL_INSCRICOES, {'jogadores_ids': [i['jogador_id'] for i in removidas + promovidas]})
+    
+    por_jogo = {}
+    for insc in removidas:
+        por_jogo.setdefault(insc['jogo_id'], []).append(insc['jogador_id'])
+    for jogo_id, jogadores_ids in por_jogo.items():
+        emitir(JogadoresRemovidosEmLote(jogo_id=jogo_id, jogadores_ids=jogadores_ids))
+    _emitir_status_em_lote(promovidas, 'aprovada')
+    
+    removidas_ids = {i['id'] for i in removidas}
+    return {inscricao_id: inscricao_id in removidas_ids for inscricao_id in ids}
+
+
+# ============= CONTROLE DE VAGAS =============
+# Índice montado a partir das inscrições: quantos aprovados cada jogo tem e a
+# fila de espera (pedidos feitos com o jogo lotado, por ordem de inscrição;
+# os demais pendentes esperam a aprovação do organizador). As escritas que ocupam
+# ou liberam vagas rodam sob _trava_vagas, então duas aprovações ao mesmo
+# tempo não passam do limite, e o vagas_ocupadas do jogo é sempre recalculado
+# do índice em vez de somado aos poucos
+
+_trava_vagas = threading.RLock()
+_aprovadas_por_jogo: Dict[int, int] = {}
+_fila_espera_por_jogo: Dict[int, List[int]] = {}  # jogo_id -> [inscricao_id, ...]
+_versao_indice_vagas = None
+
 
+def _indexar_vagas(inscricoes: List[Inscricao]) -> None:
+    """Recalcula aprovados e filas de espera de todos os jogos"""
+    aprovadas: Dict[int, int] = {}
+    pendentes: Dict[int, List[Inscricao]] = {}
+    
+    for insc in inscricoes:
+        if insc.status == StatusInscricao.APROVADA:
+            aprovadas[insc.jogo_id] = aprovadas.get(insc.jogo_id, 0) + 1
+        elif insc.status == StatusInscricao.PENDENTE and insc.get('fila_espera'):
+            pendentes.setdefault(insc.jogo_id, []).append(insc)
+    
+    _aprovadas_por_jogo.clear()
+    _aprovadas_por_jogo.update(aprovadas)
+    _fila_espera_por_jogo.clear()
+    for jogo_id, fila in pendentes.items():
+        fila.sort(key=lambda i: (i.get('data_inscricao', ''), i['id']))
+        _fila_espera_por_jogo[jogo_id] = [i.id for i in fila]
+
+
+def _garantir_indice_vagas() -> None:
+    """Remonta o índice se o inscricoes.json mudou (por outro processo ou fora destas funções)"""
+    global _versao_indice_vagas
+    
+    versao = versao_colecao(INSCRICOES_FILE)
+    if versao == _versao_indice_vagas:
+        return
+    
+    with _trava_vagas:
+        _indexar_vagas(carregar_inscricoes())
+        _versao_indice_vagas = versao
+
+
+def _salvar_inscricoes_e_vagas(inscricoes: List[Inscricao], jogos_ids: List[int]) -> bool:
+    """Salva as inscrições, atualiza o índice e grava o vagas_ocupadas dos jogos afetados"""
+    global _versao_indice_vagas
+    
+    if not salvar_inscricoes(inscricoes):
+        return False
+    
+    _indexar_vagas(inscricoes)
+    _versao_indice_vagas = versao_colecao(INSCRICOES_FILE)
+    _sincronizar_vagas_ocupadas(jogos_ids)
+    return True
 
-def atualizar_vagas_jogo(jogo_id: int, incremento: int) -> bool:
-    """Atualiza o número de vagas ocupadas de um jogo"""
+
+def _sincronizar_vagas_ocupadas(jogos_ids: Optional[List[int]] = None) -> Dict[int, tuple]:
+    """
+    Iguala o vagas_ocupadas dos jogos à contagem de aprovados do índice
+    Retorna as diferenças corrigidas: {jogo_id: (antes, depois)}
+    """
     jogos = carregar_jogos()
+    corrigidos = {}
     
-    for i, jogo in enumerate(jogos):
-        if jogo.get('id') == jogo_id:
-            jogos[i]['vagas_ocupadas'] = jogos[i].get('vagas_ocupadas', 0) + incremento
-            # Garante que não fique negativo
-            if jogos[i]['vagas_ocupadas'] < 0:
-                jogos[i]['vagas_ocupadas'] = 0
-            return salvar_jogos(jogos)
+    for jogo in jogos:
+        if jogos_ids is not None and jogo.id not in jogos_ids:
+            continue
+        ocupadas = _aprovadas_por_jogo.get(jogo.id, 0)
+        if jogo.get('vagas_ocupadas') != ocupadas:
+            corrigidos[jogo['id']] = (jogo.get('vagas_ocupadas'), ocupadas)
+            jogo['vagas_ocupadas'] = ocupadas
     
-    return False
+    if corrigidos:
+        salvar_jogos(jogos)
+    return corrigidos
+
+
+def _contar_aprovadas(inscricoes: List[Inscricao], jogo_id: int) -> int:
+    return sum(1 for i in inscricoes if i.jogo_id == jogo_id and i.status == StatusInscricao.APROVADA)
+
+
+def _promover_fila_espera(inscricoes: List[Inscricao], jogo_id: int, aprovadas_antes: int,
+                          liberadas: int) -> List[Inscricao]:
+    """
+    Passa as vagas liberadas para a fila de espera: só se o jogo estava lotado
+    antes da saída, no máximo uma promoção por vaga liberada e só pedidos que
+    entraram na fila (os pendentes comuns continuam com o organizador).
+    Altera a lista de inscrições recebida e retorna as promovidas
+    """
+    jogo = buscar_jogo_por_id(jogo_id)
+    if not jogo or aprovadas_antes < jogo.get('vagas_total', 0):
+        return []
+    
+    livres = min(liberadas, jogo.get('vagas_total', 0) - _contar_aprovadas(inscricoes, jogo_id))
+    if livres <= 0:
+        return []
+    
+    fila = sorted(
+        (i for i in inscricoes
+         if i.jogo_id == jogo_id and i.status == StatusInscricao.PENDENTE and i.get('fila_espera')),
+        key=lambda i: (i.get('data_inscricao', ''), i['id'])
+    )
+    promovidas = fila[:livres]
+    for insc in promovidas:
+        insc.status = StatusInscricao.APROVADA
+    return promovidas
+
+
+def _emitir_status_em_lote(inscricoes: List[Inscricao], novo_status: str) -> None:
+    """Emite um evento por jogo com todos os jogadores cuja inscrição mudou para o status"""
+    por_jogo = {}
+    for insc in inscricoes:
+        por_jogo.setdefault(insc['jogo_id'], []).append(insc['jogador_id'])
+    
+    for jogo_id, jogadores_ids in por_jogo.items():
+        emitir(StatusInscricoesAlteradoEmLote(jogo_id=jogo_id, jogadores_ids=jogadores_ids, novo_status=novo_status))
+
+
+def contar_vagas_ocupadas(jogo_id: int) -> int:
+    """Quantos jogadores aprovados o jogo tem"""
+    _garantir_indice_vagas()
+    return _aprovadas_por_jogo.get(jogo_id, 0)
+
+
+def vagas_disponiveis(jogo_id: int) -> int:
+    """Vagas livres de um jogo (0 se lotado ou inexistente)"""
+    jogo = buscar_jogo_por_id(jogo_id)
+    if not jogo:
+        return 0
+    return max(jogo.get('vagas_total', 0) - contar_vagas_ocupadas(jogo_id), 0)
+
+
+def listar_fila_espera(jogo_id: int) -> List[int]:
+    """IDs das inscrições na fila de espera de um jogo, na ordem em que serão promovidas"""
+    _garantir_indice_vagas()
+    return list(_fila_espera_por_jogo.get(jogo_id, []))
+
+
+def posicao_fila_espera(jogo_id: int, inscricao_id: int) -> Optional[int]:
+    """Posição (a partir de 1) de uma inscrição na fila de espera do jogo"""
+    fila = listar_fila_espera(jogo_id)
+    return fila.index(inscricao_id) + 1 if inscricao_id in fila else None
+
+
+def reconciliar_vagas() -> Dict[int, tuple]:
+    """
+    Recalcula as vagas ocupadas de todos os jogos a partir das inscrições
+    e corrige os que divergem. Retorna {jogo_id: (antes, depois)}
+    """
+    global _versao_indice_vagas
+    
+    with _trava_vagas:
+        _indexar_vagas(carregar_inscricoes())
+        _versao_indice_vagas = versao_colecao(INSCRICOES_FILE)
+        return _sincronizar_vagas_ocupadas()
+
+
+# ============= PAINÉIS =============
+# Consultas que juntam jogos, campos, inscrições e usuários numa passada só,
+# para as páginas renderizarem com um número fixo de leituras
+
+def _inscricao_com_jogador(inscricao: Inscricao, usuarios_por_id: Dict[int, Usuario]) -> Dict:
+    """Inscrição acrescida do cadastro e do nome de exibição do jogador"""
+    jogador = usuarios_por_id.get(inscricao['jogador_id'], {})
+    return {**inscricao, 'jogador': jogador, 'nome_jogador': nome_exibicao(jogador)}
+
+
+@em_cache(JOGOS_FILE, INSCRICOES_FILE, USUARIOS_FILE, CAMPOS_FILE)
+def painel_organizador(organizador_id: int) -> Dict:
+    """
+    Jogos de um organizador com campo, solicitações pendentes (na ordem da
+    fila de espera) e jogadores aprovados, mais ocupação e receita de cada
+    jogo e do total. Retorna {'jogos': [...], 'totais': {...}}
+    """
+    jogos = [j for j in carregar_jogos() if j.organizador_id == organizador_id]
+    ids_jogos = {j.id for j in jogos}
+    
+    campos_por_id = obter_catalogo_campos().por_id
+    usuarios_por_id = {u.id: u for u in carregar_usuarios()}
+    
+    inscricoes_por_jogo = {}
+    for insc in carregar_inscricoes():
+        if insc.jogo_id in ids_jogos:
+            inscricoes_por_jogo.setdefault(insc.jogo_id, []).append(insc)
+    
+    totais = {'jogos': len(jogos), 'vagas_total': 0, 'vagas_ocupadas': 0, 'pendentes': 0, 'receita': 0.0}
+    resultado = []
+    
+    for jogo in jogos:
+        inscricoes = inscricoes_por_jogo.get(jogo.id, [])
+        pendentes = sorted(
+            (i for i in inscricoes if i.status == StatusInscricao.PENDENTE),
+            key=lambda i: (i.get('data_inscricao', ''), i.id)
+        )
+        aprovadas = [i for i in inscricoes if i.status == StatusInscricao.APROVADA]
+        
+        vagas_total = jogo.get('vagas_total', 0)
+        receita = jogo.get('valor', 0) * len(aprovadas)
+        
+        resultado.append({
+            **jogo,
+            'campo': campos_por_id.get(jogo['campo_id'], {}),
+            'pendentes': [_inscricao_com_jogador(i, usuarios_por_id) for i in pendentes],
+            'aprovadas': [_inscricao_com_jogador(i, usuarios_por_id) for i in aprovadas],
+            'vagas_ocupadas': len(aprovadas),
+            'vagas_disponiveis': max(vagas_total - len(aprovadas), 0),
+            'taxa_ocupacao': len(aprovadas) / vagas_total if vagas_total else 0.0,
+            'receita': receita
+        })
+        
+        totais['vagas_total'] += vagas_total
+        totais['vagas_ocupadas'] += len(aprovadas)
+        totais['pendentes'] += len(pendentes)
+        totais['receita'] += receita
+    
+    totais['taxa_ocupacao'] = totais['vagas_ocupadas'] / totais['vagas_total'] if totais['vagas_total'] else 0.0
+    return {'jogos': resultado, 'totais': totais}
+
+
+@em_cache(JOGOS_FILE, INSCRICOES_FILE, USUARIOS_FILE, CAMPOS_FILE)
+def agenda_jogador(jogador_id: int) -> Dict:
+    """
+    Inscrições de um jogador com jogo, campo e organizador, agrupadas por
+    status e ordenadas pela data do jogo. Pedidos na fila de espera trazem
+    a posição nela. 'jogos_inscritos' é o conjunto dos jogos em que o
+    jogador está pendente ou aprovado (para checar "já inscrito")
+    """
+    inscricoes = carregar_inscricoes()
+    minhas = [i for i in inscricoes if i.jogador_id == jogador_id]
+    ids_jogos = {i.jogo_id for i in minhas}
+    
+    jogos_por_id = {j.id: j for j in carregar_jogos() if j.id in ids_jogos}
+    campos_por_id = obter_catalogo_campos().por_id
+    usuarios_por_id = {u.id: u for u in carregar_usuarios()}
+    
+    # Fila de espera dos jogos em que o jogador aguarda vaga
+    na_fila = lambda i: i.status == StatusInscricao.PENDENTE and i.get('fila_espera')
+    jogos_pendentes = {i.jogo_id for i in minhas if na_fila(i)}
+    filas = {}
+    for insc in inscricoes:
+        if insc.jogo_id in jogos_pendentes and na_fila(insc):
+            filas.setdefault(insc.jogo_id, []).append(insc)
+    for fila in filas.values():
+        fila.sort(key=lambda i: (i.get('data_inscricao', ''), i['id']))
+    
+    agenda = {'pendente': [], 'aprovada': [], 'reprovada': [], 'cancelada': [], 'jogos_inscritos': set()}
+    
+    for insc in minhas:
+        jogo = jogos_por_id.get(insc['jogo_id'])
+        if not jogo:
+            continue  # Jogo excluído
+        
+        item = {
+            **insc,
+            'jogo': jogo,
+            'campo': campos_por_id.get(jogo['campo_id'], {}),
+            'organizador': usuarios_por_id.get(jogo['organizador_id'], {}),
+            'posicao_fila': None
+        }
+        if na_fila(insc):
+            item['posicao_fila'] = [i['id'] for i in filas[jogo['id']]].index(insc['id']) + 1
+        
+        agenda.setdefault(insc.get('status'), []).append(item)
+        if insc.get('status') in ('pendente', 'aprovada'):
+            agenda['jogos_inscritos'].add(jogo['id'])
+    
+    for status, itens in agenda.items():
+        if status != 'jogos_inscritos':
+            itens.sort(key=lambda i: (i['jogo'].get('data', ''), i['jogo'].get('hora_inicio', '')))
+    
+    return agenda
+
+
+# ============= TRATADORES DE EVENTOS DE INSCRIÇÕES =============
+# Rodam nas threads de utils_eventos, fora do caminho da requisição
+
+def nome_exibicao(usuario: Optional[Mapping]) -> str:
+    """Nome usado nas mensagens (apelido, nome ou login)"""
+    if not usuario:
+        return 'Alguém'
+    return usuario.get('apelido_jogador') or usuario.get('nome') or usuario.get('login')
+
+
+def _notificar_inscricao_criada(evento: InscricaoCriada):
+    """Avisa o organizador sobre um novo pedido de inscrição"""
+    jogo = buscar_jogo_por_id(evento.jogo_id)
+    if not jogo:
+        return
+    
+    nome_jogador = nome_exibicao(buscar_usuario_por_id(evento.jogador_id))
+    campo = buscar_campo_por_id(jogo['campo_id'])
+    data_formatada = datetime.strptime(jogo['data'], "%Y-%m-%d").strftime("%d/%m/%Y")
+    
+    criar_notificacao(
+        usuario_id=jogo['organizador_id'],
+        tipo='nova_inscricao',
+        mensagem=f'{nome_jogador} quer participar do seu jogo em {campo["nome"]} no dia {data_formatada} às {jogo["hora_inicio"]}.',
+        dados={'jogo_id': evento.jogo_id, 'inscricao_id': evento.inscricao_id}
+    )
+
+
+def _montar_notificacao_status(jogo: Dict, jogador_id: int, novo_status: str) -> Optional[Dict]:
+    """Notificação de mudança de status: para o jogador (aprovação/recusa) ou o organizador (cancelamento)"""
+    data_formatada = datetime.strptime(jogo['data'], "%Y-%m-%d").strftime("%d/%m/%Y")
+    
+    if novo_status == 'aprovada':
+        campo = buscar_campo_por_id(jogo['campo_id'])
+        return {
+            'usuario_id': jogador_id,
+            'tipo': 'inscricao_aprovada',
+            'mensagem': f'Sua inscrição foi aprovada! Jogo em {campo["nome"]} no dia {data_formatada} às {jogo["hora_inicio"]}.',
+            'dados': {'jogo_id': jogo['id']}
+        }
+    elif novo_status == 'reprovada':
+        campo = buscar_campo_por_id(jogo['campo_id'])
+        return {
+            'usuario_id': jogador_id,
+            'tipo': 'inscricao_reprovada',
+            'mensagem': f'Sua inscrição foi recusada para o jogo em {campo["nome"]} no dia {data_formatada} às {jogo["hora_inicio"]}.',
+            'dados': {'jogo_id': jogo['id']}
+        }
+    elif novo_status == 'cancelada':
+        nome_jogador = nome_exibicao(buscar_usuario_por_id(jogador_id))
+        return {
+            'usuario_id': jogo['organizador_id'],
+            'tipo': 'inscricao_cancelada',
+            'mensagem': f'{nome_jogador} cancelou a inscrição no jogo que você organizou em {data_formatada} às {jogo["hora_inicio"]}.',
+            'dados': {'jogo_id': jogo['id']}
+        }
+    return None
+
+
+def _montar_notificacao_remocao(jogo: Dict, jogador_id: int) -> Dict:
+    """Notificação para o jogador removido do jogo"""
+    campo = buscar_campo_por_id(jogo['campo_id'])
+    data_formatada = datetime.strptime(jogo['data'], "%Y-%m-%d").strftime("%d/%m/%Y")
+    
+    return {
+        'usuario_id': jogador_id,
+        'tipo': 'removido_jogo',
+        'mensagem': f'Você foi removido do jogo em {campo["nome"]} no dia {data_formatada} às {jogo["hora_inicio"]} pelo organizador.',
+        'dados': {'jogo_id': jogo['id']}
+    }
+
+
+def _notificar_status_inscricao(evento: StatusInscricaoAlterado):
+    """Avisa o jogador (aprovação/recusa) ou o organizador (cancelamento)"""
+    jogo = buscar_jogo_por_id(evento.jogo_id)
+    if not jogo:
+        return
+    
+    notificacao = _montar_notificacao_status(jogo, evento.jogador_id, evento.novo_status)
+    if notificacao:
+        criar_notificacao(**notificacao)
+
+
+def _notificar_status_inscricoes_em_lote(evento: StatusInscricoesAlteradoEmLote):
+    """Avisa todos os afetados por uma alteração em lote, gravando as notificações de uma vez"""
+    jogo = buscar_jogo_por_id(evento.jogo_id)
+    if not jogo:
+        return
+    
+    notificacoes = [_montar_notificacao_status(jogo, jogador_id, evento.novo_status) for jogador_id in evento.jogadores_ids]
+    criar_notificacoes_em_lote([n for n in notificacoes if n])
+
+
+def _notificar_jogador_removido(evento: JogadorRemovido):
+    """Avisa o jogador que foi removido do jogo"""
+    jogo = buscar_jogo_por_id(evento.jogo_id)
+    if not jogo:
+        return
+    
+    criar_notificacao(**_montar_notificacao_remocao(jogo, evento.jogador_id))
+
+
+def _notificar_jogadores_removidos_em_lote(evento: JogadoresRemovidosEmLote):
+    """Avisa os jogadores removidos em lote, gravando as notificações de uma vez"""
+    jogo = buscar_jogo_por_id(evento.jogo_id)
+    if not jogo:
+        return
+    
+    criar_notificacoes_em_lote([_montar_notificacao_remocao(jogo, jogador_id) for jogador_id in evento.jogadores_ids])
+
+
+registrar_tratador(InscricaoCriada, _notificar_inscricao_criada)
+registrar_tratador(StatusInscricaoAlterado, _notificar_status_inscricao)
+registrar_tratador(JogadorRemovido, _notificar_jogador_removido)
+registrar_tratador(StatusInscricoesAlteradoEmLote, _notificar_status_inscricoes_em_lote)
+registrar_tratador(JogadoresRemovidosEmLote, _notificar_jogadores_removidos_em_lote)
 
 
 # ============= FUNÇÕES DE NOTIFICAÇÕES =============
+#
+# Cada usuário tem sua própria caixa de notificações em data/notificacoes/:
+#   usuario_<id>.json         -> lista de notificações do usuário
+#   usuario_<id>_estado.json  -> estado de leitura da caixa
+# O estado guarda um marcador "lidas até o id X" (lidas_ate), um conjunto
+# esparso de ids lidos individualmente acima do marcador (lidas) e o total
+# de não lidas, de modo que contar e marcar todas como lidas não precisam
+# percorrer as notificações. Os ids são globais e crescentes (sequencia.json).
+
+_caixas_prontas = False
+
+# Serializa leitura-modificação-escrita das caixas e da sequência de ids entre
+# threads e processos (página do usuário e threads de eventos gravando na mesma
+# caixa). Com a reserva do id e a gravação na mesma trava, os ids chegam à caixa
+# em ordem crescente e o marcador lidas_ate nunca passa de um id ainda não gravado
+_trava_caixas = TravaProcessos(os.path.join(NOTIFICACOES_DIR, ".trava"))
+
+# Tipos de notificação agrupáveis: eventos do mesmo tipo sobre o mesmo alvo,
+# dentro da janela e ainda não lidos, viram uma única notificação
+# ("X, Y e mais 12 pessoas curtiram sua postagem").
+# tipo -> (chave do alvo em dados, chave do autor em dados)
+NOTIFICACOES_AGRUPAVEIS = {
+    'curtida_post': ('post_id', 'usuario_id'),
+    'novo_seguidor': (None, 'seguidor_id'),
+}
+JANELA_AGRUPAMENTO = timedelta(hours=6)
+
+# Canal do barramento em que cada mudança no estado de uma caixa é publicada
+# com o total atualizado de não lidas ({'usuario_id': ..., 'nao_lidas': ...})
+CANAL_NOTIFICACOES = 'notificacoes'
+MAX_NOMES_AGRUPADOS = 2
+
+
+def _caminho_caixa(usuario_id: int) -> str:
+    """Retorna o caminho do arquivo de notificações de um usuário"""
+    return os.path.join(NOTIFICACOES_DIR, f"usuario_{usuario_id}.json")
+
+
+def _caminho_estado_caixa(usuario_id: int) -> str:
+    """Retorna o caminho do arquivo de estado de leitura de um usuário"""
+    return os.path.join(NOTIFICACOES_DIR, f"usuario_{usuario_id}_estado.json")
+
+
+def _garantir_caixas():
+    """Cria o diretório das caixas e migra o notificacoes.json antigo, se houver"""
+    global _caixas_prontas
+    if _caixas_prontas:
+        return
+    
+    os.makedirs(NOTIFICACOES_DIR, exist_ok=True)
+    if not os.path.exists(NOTIFICACOES_SEQ_FILE) and os.path.exists(NOTIFICACOES_FILE):
+        salvar_notificacoes(carregar_json(NOTIFICACOES_FILE))
+    
+    _caixas_prontas = True
+
+
+def carregar_estado_caixa(usuario_id: int) -> Dict:
+    """Carrega o estado de leitura da caixa de um usuário"""
+    _garantir_caixas()
+    estado = carregar_json(_caminho_estado_caixa(usuario_id)) or {}
+    return {
+        'lidas_ate': estado.get('lidas_ate', 0),
+        'lidas': estado.get('lidas', []),
+        'nao_lidas': estado.get('nao_lidas', 0),
+        'ultimo_id': estado.get('ultimo_id', 0)
+    }
+
+
+def salvar_estado_caixa(usuario_id: int, estado: Dict) -> bool:
+    """Salva o estado de leitura da caixa de um usuário"""
+    # Se não resta nada por ler, o marcador absorve o conjunto esparso
+    if estado['nao_lidas'] <= 0:
+        estado['nao_lidas'] = 0
+        estado['lidas_ate'] = estado['ultimo_id']
+        estado['lidas'] = []
+    if not salvar_json(_caminho_estado_caixa(usuario_id), estado):
+        return False
+    
+    publicar(CANAL_NOTIFICACOES, {'usuario_id': usuario_id, 'nao_lidas': estado['nao_lidas']})
+    return True
+
+
+def _notificacao_lida(notificacao: Dict, estado: Dict) -> bool:
+    """Verifica no estado da caixa se uma notificação já foi lida"""
+    notif_id = notificacao.get('id', 0)
+    return notif_id <= estado['lidas_ate'] or notif_id in estado['lidas']
 
-def carregar_notificacoes() -> List[Dict]:
-    """Carrega lista de notificações"""
-    return carregar_json(NOTIFICACOES_FILE)
+
+def _proximo_id_notificacao(quantidade: int = 1) -> int:
+    """Reserva os próximos ids globais de notificação e retorna o primeiro"""
+    with _trava_caixas:
+        sequencia = carregar_json(NOTIFICACOES_SEQ_FILE) or {}
+        primeiro_id = sequencia.get('ultimo_id', 0) + 1
+        salvar_json(NOTIFICACOES_SEQ_FILE, {'ultimo_id': primeiro_id + quantidade - 1})
+        return primeiro_id
+
+
+def carregar_notificacoes() -> List[Notificacao]:
+    """Carrega as notificações de todas as caixas (com o campo 'lida' calculado)"""
+    _garantir_caixas()
+    notificacoes = []
+    
+    for nome in os.listdir(NOTIFICACOES_DIR):
+        if not nome.startswith('usuario_') or nome.endswith('_estado.json'):
+            continue
+        caixa = Notificacao.lista(carregar_json(os.path.join(NOTIFICACOES_DIR, nome)))
+        if not caixa:
+            continue
+        estado = carregar_estado_caixa(caixa[0].usuario_id)
+        for notif in caixa:
+            notif.lida = _notificacao_lida(notif, estado)
+            notificacoes.append(notif)
+    
+    notificacoes.sort(key=lambda x: x.get('id', 0))
+    return notificacoes
 
 
 def salvar_notificacoes(notificacoes: List[Dict]) -> bool:
-    """Salva lista de notificações"""
-    return salvar_json(NOTIFICACOES_FILE, notificacoes)
+    """Salva uma lista completa de notificações, redistribuindo-as nas caixas"""
+    with _trava_caixas:
+        os.makedirs(NOTIFICACOES_DIR, exist_ok=True)
+    
+        # Agrupa por usuário mantendo a ordem dos ids
+        caixas = {}
+        for notif in sorted(notificacoes, key=lambda x: x.get('id', 0)):
+            caixas.setdefault(notif.get('usuario_id'), []).append(notif)
+    
+        sucesso = True
+        for usuario_id, caixa in caixas.items():
+            estado = {'lidas_ate': 0, 'lidas': [], 'nao_lidas': 0, 'ultimo_id': caixa[-1].get('id', 0)}
+        
+            for notif in caixa:
+                if notif.get('lida', False):
+                    # Avança o marcador enquanto não houver nenhuma não lida antes
+                    if estado['nao_lidas'] == 0:
+                        estado['lidas_ate'] = notif.get('id', 0)
+                    else:
+                        estado['lidas'].append(notif.get('id', 0))
+                else:
+                    estado['nao_lidas'] += 1
+        
+            registros = [{k: v for k, v in n.items() if k != 'lida'} for n in caixa]
+            sucesso = salvar_json(_caminho_caixa(usuario_id), registros) and sucesso
+            sucesso = salvar_estado_caixa(usuario_id, estado) and sucesso
+    
+        ultimo_id = max([n.get('id', 0) for n in notificacoes], default=0)
+        sequencia = carregar_json(NOTIFICACOES_SEQ_FILE) or {}
+        if ultimo_id > sequencia.get('ultimo_id', 0):
+            sucesso = salvar_json(NOTIFICACOES_SEQ_FILE, {'ultimo_id': ultimo_id}) and sucesso
+    
+        return sucesso
 
 
-def criar_notificacao(usuario_id: int, tipo: str, mensagem: str, dados: Optional[Dict] = None) -> Dict:
-    """Cria uma nova notificação"""
-    notificacoes = carregar_notificacoes()
+def _mensagem_agrupada(nomes: List[str], total: int, acao: str, acao_plural: str) -> str:
+    """Monta a mensagem de uma notificação agrupada a partir dos nomes mais recentes"""
+    if total == 1:
+        return f"{nomes[0]} {acao}"
     
-    # Gera ID único
-    novo_id = max([n.get('id', 0) for n in notificacoes], default=0) + 1
-    
-    nova_notificacao = {
-        'id': novo_id,
-        'usuario_id': usuario_id,
-        'tipo': tipo,
-        'mensagem': mensagem,
-        'dados': dados or {},
-        'lida': False,
-        'data_criacao': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
+    outros = total - len(nomes)
+    if outros <= 0:
+        return f"{', '.join(nomes[:-1])} e {nomes[-1]} {acao_plural}"
     
-    notificacoes.append(nova_notificacao)
-    salvar_notificacoes(notificacoes)
-    return nova_notificacao
+    pessoa = "pessoa" if outros == 1 else "pessoas"
+    return f"{', '.join(nomes)} e mais {outros} {pessoa} {acao_plural}"
 
 
-def listar_notificacoes_usuario(usuario_id: int, apenas_nao_lidas: bool = False) -> List[Dict]:
+def _agrupar_notificacao(caixa: List[Dict], estado: Dict, tipo: str, dados: Dict, ator: str) -> Optional[Dict]:
+    """
+    Procura na caixa uma notificação recente e não lida do mesmo tipo e alvo
+    e incorpora o novo evento nela. Retorna a notificação atualizada ou None
+    """
+    chave_alvo, chave_autor = NOTIFICACOES_AGRUPAVEIS[tipo]
+    limite = (datetime.now() - JANELA_AGRUPAMENTO).strftime("%Y-%m-%d %H:%M:%S")
+    
+    # A caixa fica ordenada por data de atualização, então basta olhar o fim
+    for notif in reversed(caixa):
+        if notif.get('data_criacao', '') < limite:
+            break
+        if notif.get('tipo') != tipo or _notificacao_lida(notif, estado):
+            continue
+        
+        grupo = notif['dados']
+        if 'acao_plural' not in grupo or (chave_alvo and grupo.get(chave_alvo) != dados.get(chave_alvo)):
+            continue
+        
+        autor_id = dados.get(chave_autor)
+        if autor_id in grupo.get('autores_ids', []):
+            return notif  # Mesmo autor repetindo a ação (ex: descurtiu e curtiu de novo)
+        
+        grupo['autores_ids'] = grupo.get('autores_ids', []) + [autor_id]
+        grupo['nomes'] = ([ator] + grupo.get('nomes', []))[:MAX_NOMES_AGRUPADOS]
+        grupo['total'] = len(grupo['autores_ids'])
+        grupo[chave_autor] = autor_id
+        
+        notif['mensagem'] = _mensagem_agrupada(grupo['nomes'], grupo['total'], grupo['acao'], grupo['acao_plural'])
+        notif['data_criacao'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        caixa.remove(notif)
+        caixa.append(notif)
+        return notif
+    
+    return None
+
+
+@medido('jogofacil_notificacoes_segundos', funcao='criar_notificacao')
+def criar_notificacao(usuario_id: int, tipo: str, mensagem: Optional[str] = None, dados: Optional[Dict] = None,
+                      ator: Optional[str] = None, acao: Optional[str] = None,
+                      acao_plural: Optional[str] = None) -> Notificacao:
+    """
+    Cria uma nova notificação na caixa do usuário
+    Em vez da mensagem pronta, pode receber quem gerou o evento (ator) e o que
+    fez (acao, ex: "curtiu sua postagem"); a mensagem vira "ator acao". Se o
+    tipo for agrupável e acao_plural vier junto ("curtiram sua postagem"), o
+    evento pode ser incorporado a uma notificação recente em vez de criar outra
+    """
+    if mensagem is None:
+        mensagem = f"{ator} {acao}"
+    
+    with _trava_caixas:
+        _garantir_caixas()
+        dados = dados or {}
+        
+        caixa = Notificacao.lista(carregar_json(_caminho_caixa(usuario_id)))
+        estado = carregar_estado_caixa(usuario_id)
+        
+        agrupavel = tipo in NOTIFICACOES_AGRUPAVEIS and ator and acao and acao_plural
+        if agrupavel:
+            agrupada = _agrupar_notificacao(caixa, estado, tipo, dados, ator)
+            if agrupada:
+                salvar_json(_caminho_caixa(usuario_id), caixa)
+                return agrupada.copiar(lida=False)
+        
+            # Primeira notificação do grupo: guarda o necessário para agrupar depois
+            chave_autor = NOTIFICACOES_AGRUPAVEIS[tipo][1]
+            dados = {
+                **dados,
+                'acao': acao,
+                'acao_plural': acao_plural,
+                'nomes': [ator],
+                'autores_ids': [dados.get(chave_autor)],
+                'total': 1
+            }
+        
+        nova_notificacao = Notificacao(
+            id=_proximo_id_notificacao(),
+            usuario_id=usuario_id,
+            tipo=tipo,
+            mensagem=mensagem,
+            dados=dados,
+            data_criacao=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        )
+        
+        caixa.append(nova_notificacao)
+        salvar_json(_caminho_caixa(usuario_id), caixa)
+        
+        estado['ultimo_id'] = nova_notificacao.id
+        estado['nao_lidas'] += 1
+        salvar_estado_caixa(usuario_id, estado)
+        
+        return nova_notificacao.copiar(lida=False)
+
+
+@medido('jogofacil_notificacoes_segundos', funcao='criar_notificacoes_em_lote')
+def criar_notificacoes_em_lote(notificacoes: List[Dict]) -> List[Notificacao]:
+    """
+    Cria várias notificações de uma vez (cada item com usuario_id, tipo,
+    mensagem e dados). Reserva os ids numa única gravação da sequência e
+    grava cada caixa afetada uma vez só. Não agrupa notificações
+    """
+    if not notificacoes:
+        return []
+    
+    with _trava_caixas:
+        _garantir_caixas()
+        
+        proximo_id = _proximo_id_notificacao(len(notificacoes))
+        agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        por_usuario = {}
+        criadas = []
+        for notif in notificacoes:
+            nova_notificacao = Notificacao(
+                id=proximo_id,
+                usuario_id=notif['usuario_id'],
+                tipo=notif['tipo'],
+                mensagem=notif['mensagem'],
+                dados=notif.get('dados') or {},
+                data_criacao=agora
+            )
+            proximo_id += 1
+            por_usuario.setdefault(notif['usuario_id'], []).append(nova_notificacao)
+            criadas.append(nova_notificacao.copiar(lida=False))
+        
+        for usuario_id, novas in por_usuario.items():
+            caixa = Notificacao.lista(carregar_json(_caminho_caixa(usuario_id)))
+            caixa.extend(novas)
+            salvar_json(_caminho_caixa(usuario_id), caixa)
+            
+            estado = carregar_estado_caixa(usuario_id)
+            estado['ultimo_id'] = novas[-1].id
+            estado['nao_lidas'] += len(novas)
+            salvar_estado_caixa(usuario_id, estado)
+        
+        return criadas
+
+
+def iterar_notificacoes(usuario_id: int, apenas_nao_lidas: bool = False) -> Iterator[Notificacao]:
+    """
+    Percorre a caixa de um usuário na ordem de chegada (mais antigas primeiro),
+    com o campo 'lida' calculado, sem carregar a caixa inteira
+    """
+    _garantir_caixas()
+    estado = carregar_estado_caixa(usuario_id)
+    for notificacao in iterar_json(_caminho_caixa(usuario_id)):
+        lida = _notificacao_lida(notificacao, estado)
+        if not (apenas_nao_lidas and lida):
+            notificacao = Notificacao.de_dict(notificacao)
+            notificacao.lida = lida
+            yield notificacao
+
+
+def listar_notificacoes_usuario(usuario_id: int, apenas_nao_lidas: bool = False) -> List[Notificacao]:
     """Lista notificações de um usuário"""
-    notificacoes = carregar_notificacoes()
-    resultado = [n for n in notificacoes if n.get('usuario_id') == usuario_id]
+    _garantir_caixas()
+    estado = carregar_estado_caixa(usuario_id)
+    resultado = Notificacao.lista(carregar_json(_caminho_caixa(usuario_id)))
+    
+    for notif in resultado:
+        notif.lida = _notificacao_lida(notif, estado)
     
     if apenas_nao_lidas:
-        resultado = [n for n in resultado if not n.get('lida', False)]
+        resultado = [n for n in resultado if not n.lida]
     
     # Ordena por data (mais recente primeiro)
     resultado.sort(key=lambda x: x.get('data_criacao', ''), reverse=True)
@@ -497,34 +1614,83 @@ def listar_notificacoes_usuario(usuario_id: int, apenas_nao_lidas: bool = False)
 
 
 def contar_notificacoes_nao_lidas(usuario_id: int) -> int:
-    """Conta notificações não lidas de um usuário"""
-    notificacoes = listar_notificacoes_usuario(usuario_id, apenas_nao_lidas=True)
-    return len(notificacoes)
+    """Conta notificações não lidas de um usuário (lê apenas o estado da caixa)"""
+    return carregar_estado_caixa(usuario_id)['nao_lidas']
 
 
-def marcar_notificacao_lida(notificacao_id: int) -> bool:
-    """Marca uma notificação como lida"""
-    notificacoes = carregar_notificacoes()
-    
-    for i, notif in enumerate(notificacoes):
-        if notif.get('id') == notificacao_id:
-            notificacoes[i]['lida'] = True
-            return salvar_notificacoes(notificacoes)
-    
-    return False
+# Rótulos usados no modo resumo da página de notificações
+ROTULOS_NOTIFICACOES = {
+    'nova_inscricao': 'Novas inscrições nos seus jogos',
+    'inscricao_aprovada': 'Inscrições aprovadas',
+    'inscricao_reprovada': 'Inscrições recusadas',
+    'inscricao_cancelada': 'Inscrições canceladas',
+    'jogo_cancelado': 'Jogos cancelados',
+    'removido_jogo': 'Remoções de jogos',
+    'novo_seguidor': 'Novos seguidores',
+    'curtida_post': 'Curtidas nas suas postagens',
+    'comentario_post': 'Comentários nas suas postagens'
+}
 
 
-def marcar_todas_lidas(usuario_id: int) -> bool:
-    """Marca todas as notificações de um usuário como lidas"""
-    notificacoes = carregar_notificacoes()
+def resumir_notificacoes_usuario(usuario_id: int) -> List[Dict]:
+    """
+    Modo resumo: agrupa as notificações não lidas por tipo
+    Retorna lista com tipo, rótulo, total de eventos e a mensagem mais recente
+    """
+    resumo = {}
     
-    alterado = False
-    for i, notif in enumerate(notificacoes):
-        if notif.get('usuario_id') == usuario_id and not notif.get('lida', False):
-            notificacoes[i]['lida'] = True
-            alterado = True
+    for notif in listar_notificacoes_usuario(usuario_id, apenas_nao_lidas=True):
+        tipo = notif.get('tipo')
+        if tipo not in resumo:
+            resumo[tipo] = {
+                'tipo': tipo,
+                'rotulo': ROTULOS_NOTIFICACOES.get(tipo, tipo),
+                'total': 0,
+                'mais_recente': notif.get('mensagem', '')
+            }
+        # Notificações agrupadas contam todos os eventos que absorveram
+        resumo[tipo]['total'] += notif.get('dados', {}).get('total', 1)
     
-    if alterado:
-        return salvar_notificacoes(notificacoes)
+    return sorted(resumo.values(), key=lambda x: x['total'], reverse=True)
+
+
+def _buscar_dono_notificacao(notificacao_id: int) -> Optional[int]:
+    """Descobre em qual caixa está uma notificação (usado quando o dono não é informado)"""
+    _garantir_caixas()
+    for nome in os.listdir(NOTIFICACOES_DIR):
+        if not nome.startswith("usuario_") or nome.endswith("_estado.json"):
+            continue
+        for notif in iterar_json(os.path.join(NOTIFICACOES_DIR, nome)):
+            if notif.get('id') == notificacao_id:
+                return notif.get('usuario_id')
+    return None
+
+
+def marcar_notificacao_lida(notificacao_id: int, usuario_id: Optional[int] = None) -> bool:
+    """Marca uma notificação como lida atualizando apenas o estado da caixa"""
+    if usuario_id is None:
+        usuario_id = _buscar_dono_notificacao(notificacao_id)
+        if usuario_id is None:
+            return False
     
-    return False
+    with _trava_caixas:
+        estado = carregar_estado_caixa(usuario_id)
+        
+        if notificacao_id > estado['ultimo_id'] or notificacao_id <= estado['lidas_ate'] or notificacao_id in estado['lidas']:
+            return False
+        
+        estado['lidas'].append(notificacao_id)
+        estado['nao_lidas'] -= 1
+        return salvar_estado_caixa(usuario_id, estado)
+
+
+def marcar_todas_lidas(usuario_id: int) -> bool:
+    """Marca todas as notificações de um usuário como lidas (avança o marcador)"""
+    with _trava_caixas:
+        estado = carregar_estado_caixa(usuario_id)
+        
+        if estado['nao_lidas'] == 0:
+            return False
+        
+        estado['nao_lidas'] = 0
+        return salvar_estado_caixa(usuario_id, estado)
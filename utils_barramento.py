@@ -0,0 +1,151 @@
+"""
+Barramento de eventos local (publicar/assinar)
+Entrega eventos aos assinantes do mesmo processo na hora e, para instalações
+com vários processos, replica cada evento num arquivo de log compartilhado
+que os outros processos leem de forma incremental
+"""
+import json
+import os
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Caminhos dos arquivos
+DATA_DIR = "data"
+BARRAMENTO_FILE = os.path.join(DATA_DIR, "barramento.log")
+BARRAMENTO_ANTERIOR_FILE = BARRAMENTO_FILE + ".1"
+
+# Acima deste tamanho o log é trocado por um novo (o atual vira barramento.log.1,
+# o que mantém o inode ocupado por uma rodada); os leitores percebem pelo inode
+TAMANHO_MAXIMO_LOG = 1024 * 1024
+
+# Evento entregue a todos os assinantes quando eventos podem ter sido perdidos
+EVENTO_REINICIO = {'tipo': 'reinicio'}
+
+_assinantes: Dict[str, List[Callable[[Dict], None]]] = {}
+_trava = threading.Lock()
+_origem = uuid.uuid4().hex  # identifica este processo no log compartilhado
+
+
+def _carimbo_log() -> Tuple[Optional[int], int]:
+    """Inode e tamanho do log compartilhado (None, 0 se ele não existe)"""
+    try:
+        info = os.stat(BARRAMENTO_FILE)
+    except OSError:
+        return None, 0
+    return info.st_ino, info.st_size
+
+
+_inode_log, _posicao_log = _carimbo_log()
+
+
+# ============= ASSINATURAS =============
+
+def assinar(canal: str, callback: Callable[[Dict], None]) -> Callable[[], None]:
+    """Registra um assinante em um canal e retorna a função que cancela a assinatura"""
+    with _trava:
+        _assinantes.setdefault(canal, []).append(callback)
+
+    def cancelar():
+        with _trava:
+            if callback in _assinantes.get(canal, []):
+                _assinantes[canal].remove(callback)
+
+    return cancelar
+
+
+def _entregar(canal: str, evento: Dict):
+    """Entrega um evento aos assinantes locais de um canal"""
+    with _trava:
+        callbacks = list(_assinantes.get(canal, []))
+
+    for callback in callbacks:
+        try:
+            callback(evento)
+        except:
+            pass  # Um assinante com erro não impede os demais
+
+
+def _entregar_reinicio():
+    """Avisa todos os assinantes de que eventos podem ter sido perdidos"""
+    with _trava:
+        canais = list(_assinantes.keys())
+
+    for canal in canais:
+        _entregar(canal, EVENTO_REINICIO)
+
+
+# ============= PUBLICAÇÃO =============
+
+def publicar(canal: str, evento: Dict) -> None:
+    """Publica um evento: entrega aos assinantes locais e grava no log compartilhado"""
+    _entregar(canal, evento)
+
+    linha = json.dumps({'origem': _origem, 'canal': canal, 'evento': evento}, ensure_ascii=False) + "\n"
+    try:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        if _carimbo_log()[1] > TAMANHO_MAXIMO_LOG:
+            # Troca o arquivo em vez de truncá-lo: quem lê vê outro inode e recomeça
+            os.replace(BARRAMENTO_FILE, BARRAMENTO_ANTERIOR_FILE)
+        with open(BARRAMENTO_FILE, 'a', encoding='utf-8') as f:
+            f.write(linha)
+            f.flush()
+            inode_escrito = os.fstat(f.fileno()).st_ino
+        if _carimbo_log()[0] != inode_escrito:
+            # Outro processo trocou o log enquanto ele estava aberto: grava no atual
+            with open(BARRAMENTO_FILE, 'a', encoding='utf-8') as f:
+                f.write(linha)
+    except:
+        pass  # Sem o log, apenas os assinantes deste processo recebem o evento
+
+
+def sincronizar() -> int:
+    """
+    Lê do log compartilhado os eventos publicados por outros processos desde a
+    última leitura e os entrega aos assinantes locais. Se o arquivo não mudou,
+    custa apenas um stat. Se o log foi trocado (outro inode) ou encolheu,
+    recomeça do início e avisa os assinantes com EVENTO_REINICIO.
+    Retorna o número de eventos entregues
+    """
+    global _inode_log, _posicao_log
+
+    inode, tamanho = _carimbo_log()
+    if inode is None or (inode == _inode_log and tamanho == _posicao_log):
+        return 0
+
+    with _trava:
+        try:
+            with open(BARRAMENTO_FILE, 'rb') as f:
+                # O inode do arquivo aberto é o que vale: o log pode ter sido trocado depois do stat
+                info = os.fstat(f.fileno())
+                reiniciado = (_inode_log is not None and info.st_ino != _inode_log) or \
+                    info.st_size < _posicao_log
+                if reiniciado:
+                    _posicao_log = 0
+                _inode_log = info.st_ino
+                f.seek(_posicao_log)
+                bloco = f.read()
+        except:
+            return 0
+
+        # Uma linha sem quebra no final ainda está sendo escrita: fica para a próxima
+        completo = bloco[:bloco.rfind(b"\n") + 1]
+        _posicao_log += len(completo)
+        linhas = completo.decode('utf-8', errors='replace').splitlines()
+
+    if reiniciado:
+        _entregar_reinicio()
+
+    entregues = 0
+    for linha in linhas:
+        try:
+            registro = json.loads(linha)
+        except ValueError:
+            continue
+        if registro.get('origem') == _origem:
+            continue
+        _entregar(registro.get('canal'), registro.get('evento', {}))
+        entregues += 1
+
+    return entregues
@@ -0,0 +1,131 @@
+"""
+Cache das funções de leitura
+Guarda em memória (compartilhada entre as sessões do Streamlit no mesmo
+processo) o resultado das funções de leitura de utils/utils_feed, por
+argumentos. Cada entrada lembra a versão das coleções (arquivos JSON) de
+que depende; quando uma função de escrita salva uma coleção, a versão dela
+sobe e só as entradas que dependem daquela coleção deixam de valer
+"""
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict, Optional, Tuple
+
+from utils_registros import Registro
+
+
+# Tempo de vida padrão das entradas (segundos) e limite de entradas por função
+TTL_PADRAO = 300
+MAX_ENTRADAS = 1024
+
+_versoes: Dict[str, int] = {}
+_funcoes: Dict[str, Dict] = {}  # nome -> {'entradas': OrderedDict, 'acertos': int, 'faltas': int}
+_trava = threading.RLock()
+
+
+# ============= VERSÕES DAS COLEÇÕES =============
+
+def invalidar(arquivo: str) -> None:
+    """Sobe a versão de uma coleção (chamado sempre que o arquivo é salvo)"""
+    with _trava:
+        _versoes[arquivo] = _versoes.get(arquivo, 0) + 1
+
+
+def versao_colecao(arquivo: str) -> Tuple:
+    """
+    Versão atual de uma coleção: contador local mais data de modificação
+    do arquivo, para enxergar gravações feitas por outros processos
+    """
+    try:
+        stat = os.stat(arquivo)
+        disco = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        disco = None
+    return (_versoes.get(arquivo, 0), disco)
+
+
+# ============= DECORADOR =============
+
+_AUSENTE = object()
+
+
+def em_cache(*arquivos: str, ttl: Optional[float] = TTL_PADRAO) -> Callable:
+    """
+    Decora uma função de leitura para guardar o resultado por argumentos
+    arquivos: coleções de que o resultado depende
+    ttl: validade máxima em segundos (None = só expira quando a coleção muda)
+    Listas, conjuntos, dicionários e registros retornados são cópias rasas, então quem
+    chama pode modificá-los sem afetar o cache
+    """
+    def decorador(funcao: Callable) -> Callable:
+        nome = f"{funcao.__module__}.{funcao.__name__}"
+        estado = {'entradas': OrderedDict(), 'acertos': 0, 'faltas': 0}
+        _funcoes[nome] = estado
+
+        @wraps(funcao)
+        def envolvida(*args, **kwargs):
+            chave = (args, tuple(sorted(kwargs.items())))
+            versoes = tuple(versao_colecao(a) for a in arquivos)
+            agora = time.monotonic()
+
+            with _trava:
+                entrada = estado['entradas'].get(chave, _AUSENTE)
+                if entrada is not _AUSENTE:
+                    valor, versoes_entrada, expira_em = entrada
+                    if versoes_entrada == versoes and (expira_em is None or agora < expira_em):
+                        estado['acertos'] += 1
+                        estado['entradas'].move_to_end(chave)
+                        return _copiar(valor)
+                estado['faltas'] += 1
+
+            valor = funcao(*args, **kwargs)
+
+            with _trava:
+                expira_em = agora + ttl if ttl is not None else None
+                estado['entradas'][chave] = (valor, versoes, expira_em)
+                estado['entradas'].move_to_end(chave)
+                while len(estado['entradas']) > MAX_ENTRADAS:
+                    estado['entradas'].popitem(last=False)
+
+            return _copiar(valor)
+
+        envolvida.sem_cache = funcao
+        return envolvida
+
+    return decorador
+
+
+def _copiar(valor):
+    """Cópia rasa de coleções retornadas pelo cache"""
+    if isinstance(valor, (list, set, dict, Registro)):
+        return copy.copy(valor)
+    return valor
+
+
+# ============= ESTATÍSTICAS E LIMPEZA =============
+
+def estatisticas_cache() -> Dict[str, Dict]:
+    """Acertos, faltas, taxa de acerto e número de entradas de cada função em cache"""
+    with _trava:
+        resultado = {}
+        for nome, estado in _funcoes.items():
+            total = estado['acertos'] + estado['faltas']
+            resultado[nome] = {
+                'acertos': estado['acertos'],
+                'faltas': estado['faltas'],
+                'taxa_acerto': estado['acertos'] / total if total else 0.0,
+                'entradas': len(estado['entradas'])
+            }
+        return resultado
+
+
+def limpar_cache() -> None:
+    """Descarta todas as entradas e zera as estatísticas"""
+    with _trava:
+        for estado in _funcoes.values():
+            estado['entradas'].clear()
+            estado['acertos'] = 0
+            estado['faltas'] = 0
@@ -0,0 +1,382 @@
+"""
+Índice de curtidas em memória com log de gravação
+Guarda, para cada post, os ids de quem curtiu e, para cada usuário, os ids
+dos posts curtidos em arrays ordenados de inteiros (módulo array), então
+"curtiu?" é uma busca binária e contar é um len. Curtir e descurtir não
+regravam o curtidas.json: cada operação vira uma linha no curtidas.log
+(só acrescentada), que os outros processos leem de forma incremental. Quando
+o log passa de TAMANHO_MAXIMO_LOG ele é compactado: as operações são
+aplicadas ao curtidas.json numa única gravação e o log recomeça vazio
+"""
+import glob
+import json
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from utils import carregar_json, salvar_json, iterar_json
+from utils_cache import invalidar
+from utils_metricas import incrementar
+from utils_registros import Curtida
+from utils_snapshot import abrir_snapshot, descartar_snapshot
+
+
+# Caminhos dos arquivos
+DATA_DIR = "data"
+CURTIDAS_FILE = os.path.join(DATA_DIR, "curtidas.json")
+LOG_FILE = os.path.join(DATA_DIR, "curtidas.log")
+TRAVA_COMPACTACAO_FILE = LOG_FILE + ".compactando"
+
+# Acima deste tamanho o log é aplicado ao curtidas.json (~12 mil operações)
+TAMANHO_MAXIMO_LOG = 1024 * 1024
+# Uma trava de compactação mais velha que isso é de um processo que morreu
+VALIDADE_TRAVA = 60
+
+_TIPO_ID = 'i'  # inteiros de 32 bits
+
+_curtidores: Dict[int, array] = {}  # post -> usuários que curtiram
+_curtidos: Dict[int, array] = {}    # usuário -> posts curtidos
+_carimbo_base: Optional[Tuple[int, int]] = None  # (mtime_ns, tamanho) do curtidas.json aplicado
+_inode_log: Optional[int] = None
+_posicao_log = 0  # bytes do curtidas.log já aplicados
+_carregado = False
+_trava = threading.RLock()
+
+
+# ============= CARREGAMENTO =============
+
+def _carimbo(arquivo: str) -> Optional[Tuple[int, int]]:
+    """Data de modificação e tamanho de um arquivo, para saber se mudou"""
+    try:
+        stat = os.stat(arquivo)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def _carimbo_log() -> Tuple[Optional[int], int]:
+    """Inode e tamanho do log atual (o inode muda quando a compactação troca o log)"""
+    try:
+        stat = os.stat(LOG_FILE)
+        return (stat.st_ino, stat.st_size)
+    except OSError:
+        return (None, 0)
+
+
+def _ja_contem(ids: array, valor: int) -> bool:
+    """Busca binária em um array ordenado"""
+    i = bisect_left(ids, valor)
+    return i < len(ids) and ids[i] == valor
+
+
+def _incluir(post_id: int, usuario_id: int) -> None:
+    for mapa, chave, valor in ((_curtidores, post_id, usuario_id), (_curtidos, usuario_id, post_id)):
+        ids = mapa.setdefault(chave, array(_TIPO_ID))
+        if not _ja_contem(ids, valor):
+            insort(ids, valor)
+
+
+def _excluir(post_id: int, usuario_id: int) -> None:
+    for mapa, chave, valor in ((_curtidores, post_id, usuario_id), (_curtidos, usuario_id, post_id)):
+        ids = mapa.get(chave)
+        if ids is not None and _ja_contem(ids, valor):
+            del ids[bisect_left(ids, valor)]
+            if not ids:
+                del mapa[chave]
+
+
+def _montar(pares: Iterable[Tuple[int, int]]) -> None:
+    """Monta os dois índices a partir dos pares (post_id, usuario_id) do curtidas.json"""
+    curtidores: Dict[int, List[int]] = {}
+    curtidos: Dict[int, List[int]] = {}
+
+    for post_id, usuario_id in pares:
+        curtidores.setdefault(post_id, []).append(usuario_id)
+        curtidos.setdefault(usuario_id, []).append(post_id)
+
+    _curtidores.clear()
+    _curtidos.clear()
+    for destino, origem in ((_curtidores, curtidores), (_curtidos, curtidos)):
+        for chave, ids in origem.items():
+            destino[chave] = array(_TIPO_ID, sorted(set(ids)))
+
+
+def _pares_base() -> Iterable[Tuple[int, int]]:
+    """Pares do curtidas.json, pelas colunas do snapshot quando ele está atualizado"""
+    snapshot = abrir_snapshot(CURTIDAS_FILE)
+    if snapshot is not None and len(snapshot) and snapshot.reservar():
+        try:
+            yield from zip(snapshot.coluna('post_id'), snapshot.coluna('usuario_id'))
+        finally:
+            snapshot.liberar()
+        return
+    for c in iterar_json(CURTIDAS_FILE):
+        yield (c.get('post_id'), c.get('usuario_id'))
+
+
+def _operacoes(bloco: bytes) -> Iterable[Dict]:
+    for linha in bloco.decode('utf-8', errors='replace').splitlines():
+        try:
+            yield json.loads(linha)
+        except ValueError:
+            continue  # Linha corrompida (gravação interrompida): ignorada
+
+
+def _aplicar(operacoes: Iterable[Dict]) -> None:
+    """Aplica operações do log aos índices (reaplicar a mesma sequência não muda nada)"""
+    for op in operacoes:
+        post_id, usuario_id = op.get('post_id'), op.get('usuario_id')
+        if post_id is None or usuario_id is None:
+            continue
+        if op.get('op') == 'curtir':
+            _incluir(post_id, usuario_id)
+        elif op.get('op') == 'descurtir':
+            _excluir(post_id, usuario_id)
+
+
+def _logs_pendentes() -> List[str]:
+    """Logs de uma compactação em andamento (ou interrompida), do mais antigo ao mais novo"""
+    return sorted(glob.glob(glob.escape(LOG_FILE) + ".[0-9]*"))
+
+
+def _ler_completo(arquivo: str, inicio: int = 0) -> bytes:
+    """Conteúdo de um log a partir de inicio, até a última linha completa"""
+    try:
+        with open(arquivo, 'rb') as f:
+            f.seek(inicio)
+            bloco = f.read()
+    except OSError:
+        return b""
+    # Uma linha sem quebra no final ainda está sendo escrita: fica para a próxima
+    return bloco[:bloco.rfind(b"\n") + 1]
+
+
+def _recarregar(carimbo_base: Optional[Tuple[int, int]], inode_log: Optional[int]) -> None:
+    """Remonta tudo: curtidas.json, logs de compactação pendentes e o log atual"""
+    global _carimbo_base, _inode_log, _posicao_log, _carregado
+
+    _montar(_pares_base() if carimbo_base is not None else [])
+    for pendente in _logs_pendentes():
+        _aplicar(_operacoes(_ler_completo(pendente)))
+    bloco = _ler_completo(LOG_FILE)
+    _aplicar(_operacoes(bloco))
+
+    _carimbo_base, _inode_log, _posicao_log, _carregado = carimbo_base, inode_log, len(bloco), True
+
+
+def _garantir_indice() -> None:
+    """
+    Deixa os índices em dia com os arquivos (custa dois stats): lê só as linhas
+    novas do log e remonta tudo se o curtidas.json foi regravado ou o log trocado
+    """
+    global _inode_log, _posicao_log
+
+    carimbo_base = _carimbo(CURTIDAS_FILE)
+    inode_log, tamanho_log = _carimbo_log()
+
+    with _trava:
+        if not _carregado or carimbo_base != _carimbo_base or tamanho_log < _posicao_log or \
+                (inode_log != _inode_log and _posicao_log > 0):
+            _recarregar(carimbo_base, inode_log)
+            return
+
+        _inode_log = inode_log
+        if tamanho_log > _posicao_log:
+            bloco = _ler_completo(LOG_FILE, _posicao_log)
+            _posicao_log += len(bloco)
+            _aplicar(_operacoes(bloco))
+
+
+# ============= GRAVAÇÃO =============
+
+def _anexar(operacoes: List[Dict]) -> bool:
+    """
+    Acrescenta operações ao log numa única escrita e as aplica aos índices.
+    Se uma compactação trocou o log enquanto ele estava aberto, a escrita pode
+    ter ido para o log antigo depois de ele ser lido: grava de novo no atual
+    (reaplicar uma operação não muda nada)
+    """
+    texto = "".join(json.dumps(op, ensure_ascii=False) + "\n" for op in operacoes)
+    try:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        while True:
+            with open(LOG_FILE, 'a', encoding='utf-8') as f:
+                f.write(texto)
+                f.flush()
+                inode = os.fstat(f.fileno()).st_ino
+            if _carimbo_log()[0] == inode:
+                break
+    except OSError:
+        return False
+    incrementar('jogofacil_armazenamento_operacoes_total', operacao='anexar', colecao=os.path.basename(LOG_FILE))
+
+    _garantir_indice()
+    invalidar(CURTIDAS_FILE)
+    if _posicao_log > TAMANHO_MAXIMO_LOG:
+        compactar()
+    return True
+
+
+def curtir(post_id: int, usuario_id: int) -> bool:
+    """Grava uma curtida; False se o usuário já curtiu o post"""
+    with _trava:
+        _garantir_indice()
+        if _ja_contem(_curtidores.get(post_id, ()), usuario_id):
+            return False
+        return _anexar([{'op': 'curtir', 'post_id': post_id, 'usuario_id': usuario_id,
+                         'data': datetime.now().strftime("%Y-%m-%d %H:%M:%S")}])
+
+
+def descurtir(post_id: int, usuario_id: int) -> bool:
+    """Remove uma curtida; False se o usuário não tinha curtido o post"""
+    with _trava:
+        _garantir_indice()
+        if not _ja_contem(_curtidores.get(post_id, ()), usuario_id):
+            return False
+        return _anexar([{'op': 'descurtir', 'post_id': post_id, 'usuario_id': usuario_id}])
+
+
+def remover_post(post_id: int) -> int:
+    """Remove todas as curtidas de um post (post excluído). Retorna quantas eram"""
+    with _trava:
+        _garantir_indice()
+        usuarios = list(_curtidores.get(post_id, ()))
+        if usuarios and not _anexar([{'op': 'descurtir', 'post_id': post_id, 'usuario_id': u} for u in usuarios]):
+            return 0
+        return len(usuarios)
+
+
+# ============= COMPACTAÇÃO =============
+
+def _materializar(base: List[Dict], operacoes: Iterable[Dict]) -> List[Curtida]:
+    """
+    Aplica as operações à lista do curtidas.json: curtidas novas ganham o
+    próximo id na ordem do log e a data gravada na operação
+    """
+    curtidas = Curtida.lista(base)
+    posicoes = {(c.get('post_id'), c.get('usuario_id')): i for i, c in enumerate(curtidas)}
+    removidas: Set[int] = set()
+    proximo_id = max((c.get('id') or 0 for c in curtidas), default=0) + 1
+
+    for op in operacoes:
+        par = (op.get('post_id'), op.get('usuario_id'))
+        posicao = posicoes.get(par)
+        if op.get('op') == 'curtir' and (posicao is None or posicao in removidas):
+            posicoes[par] = len(curtidas)
+            curtidas.append(Curtida(id=proximo_id, post_id=par[0], usuario_id=par[1], data=op.get('data')))
+            proximo_id += 1
+        elif op.get('op') == 'descurtir' and posicao is not None:
+            removidas.add(posicao)
+
+    return [c for i, c in enumerate(curtidas) if i not in removidas]
+
+
+def carregar_curtidas() -> List[Curtida]:
+    """Lista completa de curtidas: curtidas.json com as operações do log aplicadas"""
+    operacoes: List[Dict] = []
+    for pendente in _logs_pendentes():
+        operacoes.extend(_operacoes(_ler_completo(pendente)))
+    operacoes.extend(_operacoes(_ler_completo(LOG_FILE)))
+    return _materializar(carregar_json(CURTIDAS_FILE), operacoes)
+
+
+def _travar_compactacao() -> bool:
+    """Trava entre processos: só um compacta por vez (arquivo criado com O_EXCL)"""
+    try:
+        if time.time() - os.path.getmtime(TRAVA_COMPACTACAO_FILE) > VALIDADE_TRAVA:
+            os.remove(TRAVA_COMPACTACAO_FILE)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(TRAVA_COMPACTACAO_FILE, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except OSError:
+        return False
+
+
+def _gravar_base(curtidas: Optional[List[Curtida]]) -> bool:
+    """
+    Troca o log atual por um pendente (as próximas operações vão para um log
+    novo) e grava o curtidas.json: a lista dada ou, sem ela, a materializada
+    com os logs pendentes
+    """
+    if not _travar_compactacao():
+        return False
+    try:
+        if os.path.exists(LOG_FILE):
+            os.replace(LOG_FILE, f"{LOG_FILE}.{time.time_ns()}")
+        pendentes = _logs_pendentes()
+        if curtidas is None:
+            operacoes = [op for p in pendentes for op in _operacoes(_ler_completo(p))]
+            curtidas = _materializar(carregar_json(CURTIDAS_FILE), operacoes)
+
+        # Troca atômica: quem remonta o índice nunca lê um curtidas.json pela metade
+        temporario = CURTIDAS_FILE + ".tmp"
+        if not salvar_json(temporario, curtidas):
+            return False
+        os.replace(temporario, CURTIDAS_FILE)
+        descartar_snapshot(CURTIDAS_FILE)
+        invalidar(CURTIDAS_FILE)
+        for pendente in pendentes:
+            os.remove(pendente)
+        return True
+    except OSError:
+        return False
+    finally:
+        try:
+            os.remove(TRAVA_COMPACTACAO_FILE)
+        except OSError:
+            pass
+
+
+def tem_log_pendente() -> bool:
+    """Há operações no log que ainda não foram para o curtidas.json"""
+    return bool(_logs_pendentes()) or _carimbo_log()[1] > 0
+
+
+def compactar() -> bool:
+    """Aplica o log ao curtidas.json numa única gravação e recomeça o log vazio"""
+    with _trava:
+        if not os.path.exists(LOG_FILE) and not _logs_pendentes():
+            return True
+        ok = _gravar_base(None)
+        _garantir_indice()
+        return ok
+
+
+def substituir(curtidas: List[Curtida]) -> bool:
+    """Grava a lista inteira de curtidas (descarta o que estava no log)"""
+    with _trava:
+        ok = _gravar_base(curtidas)
+        _garantir_indice()
+        return ok
+
+
+# ============= CONSULTAS =============
+
+def curtiu(post_id: int, usuario_id: int) -> bool:
+    """Verifica se o usuário curtiu o post (busca binária)"""
+    _garantir_indice()
+    return _ja_contem(_curtidores.get(post_id, ()), usuario_id)
+
+
+def contar(post_id: int) -> int:
+    """Quantas curtidas o post tem"""
+    _garantir_indice()
+    return len(_curtidores.get(post_id, ()))
+
+
+def posts_curtidos(usuario_id: int) -> array:
+    """IDs (ordenados) dos posts que o usuário curtiu"""
+    _garantir_indice()
+    return array(_TIPO_ID, _curtidos.get(usuario_id, ()))
+
+
+def curtidores(post_id: int) -> array:
+    """IDs (ordenados) de quem curtiu o post"""
+    _garantir_indice()
+    return array(_TIPO_ID, _curtidores.get(post_id, ()))
@@ -0,0 +1,328 @@
+"""
+Eventos de domínio e fila de processamento assíncrono
+As funções de escrita fazem só a alteração principal e emitem um evento;
+os efeitos colaterais (montar e gravar notificações, atualizar contadores)
+rodam em threads de trabalho. A fila é gravada em disco antes do
+processamento, então eventos pendentes sobrevivem a um reinício.
+Cada processo grava a própria fila e a mantém travada enquanto vive; um
+processo novo só assume filas cuja trava ficou livre (dono encerrado)
+"""
+import json
+import os
+import queue
+import threading
+import uuid
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, TextIO
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Caminhos dos arquivos
+DATA_DIR = "data"
+FILA_EVENTOS_FILE = os.path.join(DATA_DIR, "fila_eventos.jsonl")
+FILA_PROCESSADOS_FILE = os.path.join(DATA_DIR, "fila_eventos_processados.jsonl")
+FILAS_DIR = os.path.join(DATA_DIR, "fila_eventos")  # um arquivo por processo
+
+NUM_TRABALHADORES = 2
+MAX_TENTATIVAS = 3
+
+
+# ============= EVENTOS DE DOMÍNIO =============
+
+@dataclass(frozen=True)
+class InscricaoCriada:
+    """Jogador pediu para participar de um jogo"""
+    inscricao_id: int
+    jogo_id: int
+    jogador_id: int
+
+
+@dataclass(frozen=True)
+class StatusInscricaoAlterado:
+    """Inscrição aprovada, reprovada ou cancelada"""
+    inscricao_id: int
+    jogo_id: int
+    jogador_id: int
+    novo_status: str
+
+
+@dataclass(frozen=True)
+class JogadorRemovido:
+    """Organizador removeu um jogador do jogo"""
+    inscricao_id: int
+    jogo_id: int
+    jogador_id: int
+
+
+@dataclass(frozen=True)
+class StatusInscricoesAlteradoEmLote:
+    """Organizador aprovou, recusou ou cancelou várias inscrições de um jogo de uma vez"""
+    jogo_id: int
+    jogadores_ids: List[int]
+    novo_status: str
+
+
+@dataclass(frozen=True)
+class JogadoresRemovidosEmLote:
+    """Organizador removeu vários jogadores do jogo de uma vez"""
+    jogo_id: int
+    jogadores_ids: List[int]
+
+
+@dataclass(frozen=True)
+class PostCurtido:
+    """Usuário curtiu um post"""
+    post_id: int
+    usuario_id: int
+
+
+@dataclass(frozen=True)
+class ComentarioAdicionado:
+    """Usuário comentou um post"""
+    post_id: int
+    usuario_id: int
+    comentario_id: int
+
+
+@dataclass(frozen=True)
+class UsuarioSeguido:
+    """Um usuário começou a seguir outro"""
+    seguidor_id: int
+    seguido_id: int
+
+
+TIPOS_EVENTOS = {
+    cls.__name__: cls
+    for cls in (InscricaoCriada, StatusInscricaoAlterado, JogadorRemovido,
+                StatusInscricoesAlteradoEmLote, JogadoresRemovidosEmLote,
+                PostCurtido, ComentarioAdicionado, UsuarioSeguido)
+}
+
+
+# ============= ESTADO DA FILA =============
+
+_fila: "queue.Queue[Dict]" = queue.Queue()
+_tratadores: Dict[str, List[Callable]] = {}
+_sem_tratador: List[Dict] = []  # Eventos aguardando alguém registrar um tratador
+_trava = threading.Lock()
+_trabalhadores: List[threading.Thread] = []
+_arquivo_fila: Optional[TextIO] = None  # fila deste processo, aberta e travada
+
+
+# ============= REGISTRO DE TRATADORES =============
+
+def registrar_tratador(tipo_evento: type, tratador: Callable) -> None:
+    """Registra uma função que recebe os eventos de um tipo"""
+    with _trava:
+        _tratadores.setdefault(tipo_evento.__name__, []).append(tratador)
+
+        # Eventos recuperados antes do registro voltam para a fila
+        aguardando = [r for r in _sem_tratador if r['tipo'] == tipo_evento.__name__]
+        for registro in aguardando:
+            _sem_tratador.remove(registro)
+            _fila.put(registro)
+
+
+# ============= ARQUIVO DA FILA =============
+
+def _travar(f: TextIO) -> bool:
+    """Trava exclusiva e sem espera no arquivo; o sistema a solta quando o processo termina"""
+    try:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _abrir_fila() -> TextIO:
+    """Cria e trava o arquivo de fila deste processo"""
+    global _arquivo_fila
+    if _arquivo_fila is None:
+        os.makedirs(FILAS_DIR, exist_ok=True)
+        caminho = os.path.join(FILAS_DIR, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl")
+        f = open(caminho, 'a+', encoding='utf-8')
+        _travar(f)
+        _arquivo_fila = f
+    return _arquivo_fila
+
+
+def _anexar_linha(registro: Dict) -> None:
+    """Acrescenta um registro (evento ou marca de processado) na fila deste processo"""
+    f = _abrir_fila()
+    f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    f.flush()
+
+
+# ============= EMISSÃO =============
+
+
+def emitir(evento) -> None:
+    """Grava o evento na fila em disco e o entrega às threads de trabalho"""
+    iniciar_trabalhadores()
+
+    registro = {
+        'id': uuid.uuid4().hex,
+        'tipo': type(evento).__name__,
+        'dados': asdict(evento),
+        'data': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'tentativas': 0
+    }
+
+    with _trava:
+        try:
+            _anexar_linha(registro)
+        except:
+            pass  # Sem disco o evento ainda é processado, só não é durável
+        _fila.put(registro)
+
+
+# ============= PROCESSAMENTO =============
+
+def _marcar_processado(registro: Dict, erro: str = '') -> None:
+    """Registra em disco que um evento já foi tratado"""
+    with _trava:
+        try:
+            _anexar_linha({'processado': registro['id'], 'erro': erro})
+        except:
+            pass
+
+
+def _compactar_fila() -> None:
+    """Esvazia a fila deste processo quando não há mais nada pendente"""
+    with _trava:
+        if _fila.unfinished_tasks or _sem_tratador or _arquivo_fila is None:
+            return
+        try:
+            _arquivo_fila.truncate(0)
+        except OSError:
+            pass
+
+
+def _processar(registro: Dict) -> None:
+    """Executa os tratadores de um evento, com novas tentativas em caso de erro"""
+    with _trava:
+        tratadores = list(_tratadores.get(registro['tipo'], []))
+        if not tratadores:
+            _sem_tratador.append(registro)
+            return
+
+    evento = TIPOS_EVENTOS[registro['tipo']](**registro['dados'])
+
+    try:
+        for tratador in tratadores:
+            tratador(evento)
+    except Exception as e:
+        registro['tentativas'] += 1
+        if registro['tentativas'] < MAX_TENTATIVAS:
+            _fila.put(registro)
+            return
+        # Descartado: o erro fica registrado na marca de processado
+        _marcar_processado(registro, erro=str(e))
+        return
+
+    _marcar_processado(registro)
+
+
+def _trabalhar() -> None:
+    """Laço de uma thread de trabalho"""
+    while True:
+        registro = _fila.get()
+        try:
+            _processar(registro)
+        finally:
+            _fila.task_done()
+
+        if _fila.unfinished_tasks == 0:
+            _compactar_fila()
+
+
+def _ler_linhas(f: TextIO) -> Iterator[Dict]:
+    """Lê os registros de um arquivo JSON Lines, ignorando linhas incompletas"""
+    f.seek(0)
+    for linha in f:
+        try:
+            yield json.loads(linha)
+        except ValueError:
+            continue  # Gravação interrompida no meio da linha
+
+
+def _pendentes(registros: List[Dict], processados: set) -> List[Dict]:
+    return [r for r in registros
+            if r.get('id') not in processados and r.get('tipo') in TIPOS_EVENTOS]
+
+
+def _assumir_fila(caminho: str, processados_legado: Optional[str] = None) -> List[Dict]:
+    """
+    Lê os eventos pendentes da fila de um processo encerrado e apaga o arquivo.
+    Filas com a trava ocupada pertencem a processos vivos e são ignoradas
+    """
+    try:
+        f = open(caminho, 'r+', encoding='utf-8')
+    except OSError:
+        return []
+    with f:
+        # Outro processo pode ter assumido e apagado o arquivo antes da trava
+        if not _travar(f) or not os.path.exists(caminho) or os.stat(caminho).st_ino != os.fstat(f.fileno()).st_ino:
+            return []
+
+        registros = list(_ler_linhas(f))
+        processados = {r['processado'] for r in registros if 'processado' in r}
+        if processados_legado and os.path.exists(processados_legado):
+            with open(processados_legado, 'r', encoding='utf-8') as p:
+                processados.update(r.get('id') for r in _ler_linhas(p))
+        pendentes = _pendentes(registros, processados)
+
+        # Copia para a fila deste processo antes de apagar a original
+        for registro in pendentes:
+            _anexar_linha(registro)
+        for arquivo in (caminho, processados_legado):
+            if arquivo:
+                try:
+                    os.remove(arquivo)
+                except OSError:
+                    pass
+    return pendentes
+
+
+def _recuperar_pendentes() -> Iterator[Dict]:
+    """Assume as filas deixadas por processos encerrados (e a fila única de versões anteriores)"""
+    if os.path.exists(FILA_EVENTOS_FILE):
+        yield from _assumir_fila(FILA_EVENTOS_FILE, FILA_PROCESSADOS_FILE)
+
+    if not os.path.isdir(FILAS_DIR):
+        return
+    proprio = _abrir_fila().name
+    for nome in sorted(os.listdir(FILAS_DIR)):
+        caminho = os.path.join(FILAS_DIR, nome)
+        if nome.endswith('.jsonl') and caminho != proprio:
+            yield from _assumir_fila(caminho)
+
+
+def iniciar_trabalhadores() -> None:
+    """Inicia as threads de trabalho (uma vez por processo) e reenfileira eventos pendentes"""
+    with _trava:
+        if _trabalhadores:
+            return
+
+        for registro in _recuperar_pendentes():
+            _fila.put(registro)
+
+        for i in range(NUM_TRABALHADORES):
+            thread = threading.Thread(target=_trabalhar, name=f"eventos-{i}", daemon=True)
+            thread.start()
+            _trabalhadores.append(thread)
+
+
+def aguardar_eventos() -> None:
+    """Bloqueia até que todos os eventos emitidos tenham sido processados"""
+    _fila.join()
@@ -4,29 +4,56 @@ Gerencia posts, curtidas, comentários e sistema de seguir
 """
 import json
 import os
+from bisect import insort
 from datetime import datetime
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import List, Dict, Optional, Sequence
 from PIL import Image
 
 # Importa função de notificação
-from utils import criar_notificacao, buscar_usuario_por_id
-
+from utils import criar_notificacao, buscar_usuario_por_id, buscar_usuarios_por_ids, nome_exibicao, iterar_json, \
+    TravaProcessos
+from utils_cache import em_cache, invalidar, versao_colecao
+from utils_metricas import medido, medir_armazenamento
+from utils_snapshot import VisaoSnapshot, abrir_snapshot, descartar_snapshot
+from utils_registros import Post, Curtida, Comentario, Seguindo, para_json
+from utils_barramento import publicar
+import utils_grafo as grafo
+import utils_curtidas as indice_curtidas
+from utils_eventos import (
+    emitir, registrar_tratador,
+    PostCurtido, ComentarioAdicionado, UsuarioSeguido
+)
+
+
+# Canais do barramento publicados pelas funções de escrita
+CANAL_SEGUINDO = 'seguindo'   # {'seguidor_id', 'seguido_id', 'seguindo': bool}
+CANAL_CURTIDAS = 'curtidas'   # {'post_id', 'usuario_id', 'curtiu': bool}
 
 # Caminhos dos arquivos
 DATA_DIR = "data"
 POSTS_FILE = os.path.join(DATA_DIR, "posts.json")
 SEGUINDO_FILE = os.path.join(DATA_DIR, "seguindo.json")
 CURTIDAS_FILE = os.path.join(DATA_DIR, "curtidas.json")
-COMENTARIOS_FILE = os.path.join(DATA_DIR, "comentarios.json")
+COMENTARIOS_FILE = os.path.join(DATA_DIR, "comentarios.json")  # formato antigo, migrado para data/comentarios/
+COMENTARIOS_DIR = os.path.join(DATA_DIR, "comentarios")
+COMENTARIOS_SEQ_FILE = os.path.join(COMENTARIOS_DIR, "sequencia.json")
 POSTS_FOTOS_DIR = os.path.join(DATA_DIR, "posts_fotos")
 
 
 # ============= FUNÇÕES AUXILIARES =============
 
-def carregar_json(arquivo: str) -> List[Dict]:
-    """Carrega dados de um arquivo JSON"""
+@medir_armazenamento('carregar')
+def carregar_json(arquivo: str) -> Sequence[Dict]:
+    """
+    Carrega dados de um arquivo JSON. Com snapshot binário atualizado, devolve
+    uma visão somente leitura que monta os registros sob demanda
+    """
     if not os.path.exists(arquivo):
         return []
+    snapshot = abrir_snapshot(arquivo)
+    if snapshot is not None and snapshot.reservar():
+        return VisaoSnapshot(snapshot)
     try:
         with open(arquivo, 'r', encoding='utf-8') as f:
             return json.load(f)
@@ -34,34 +61,38 @@ def carregar_json(arquivo: str) -> List[Dict]:
         return []
 
 
+@medir_armazenamento('salvar')
 def salvar_json(arquivo: str, dados: List[Dict]) -> bool:
     """Salva dados em um arquivo JSON"""
     try:
         with open(arquivo, 'w', encoding='utf-8') as f:
-            json.dump(dados, f, ensure_ascii=False, indent=2)
+            json.dump(dados, f, ensure_ascii=False, indent=2, default=para_json)
         return True
     except:
         return False
+    finally:
+        descartar_snapshot(arquivo)
+        invalidar(arquivo)
 
 
 # ============= FUNÇÕES DE POSTS =============
 
-def carregar_posts() -> List[Dict]:
+def carregar_posts() -> List[Post]:
     """Carrega lista de posts"""
-    return carregar_json(POSTS_FILE)
+    return Post.lista(carregar_json(POSTS_FILE))
 
 
-def salvar_posts(posts: List[Dict]) -> bool:
+def salvar_posts(posts: List[Post]) -> bool:
     """Salva lista de posts"""
     return salvar_json(POSTS_FILE, posts)
 
 
-def criar_post(usuario_id: int, texto: str, foto_upload=None) -> Optional[Dict]:
+def criar_post(usuario_id: int, texto: str, foto_upload=None) -> Optional[Post]:
     """Cria um novo post"""
     posts = carregar_posts()
     
     # Gera ID único
-    novo_id = max([p.get('id', 0) for p in posts], default=0) + 1
+    novo_id = max([p.id for p in posts], default=0) + 1
     
     # Salva foto se houver
     foto_nome = ''
@@ -76,33 +107,25 @@ def criar_post(usuario_id: int, texto: str, foto_upload=None) -> Optional[Dict]:
         except:
             foto_nome = ''
     
-    novo_post = {
-        'id': novo_id,
-        'usuario_id': usuario_id,
-        'texto': texto,
-        'foto': foto_nome,
-        'data_criacao': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
+    novo_post = Post(
+        id=novo_id,
+        usuario_id=usuario_id,
+        texto=texto,
+        foto=foto_nome,
+        data_criacao=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    )
     
     posts.append(novo_post)
     salvar_posts(posts)
     return novo_post
 
 
-def buscar_post_por_id(post_id: int) -> Optional[Dict]:
-    """Busca post por ID"""
-    posts = carregar_posts()
-    for post in posts:
-        if post.get('id') == post_id:
-            return post
-    return None
-
-
-def buscar_post_por_id(post_id: int) -> Optional[Dict]:
+@em_cache(POSTS_FILE)
+def buscar_post_por_id(post_id: int) -> Optional[Post]:
     """Busca um post pelo ID"""
     posts = carregar_posts()
     for post in posts:
-        if post.get('id') == post_id:
+        if post.id == post_id:
             return post
     return None
 
@@ -112,7 +135,7 @@ def editar_post(post_id: int, novo_texto: str) -> bool:
     posts = carregar_posts()
     
     for i, post in enumerate(posts):
-        if post.get('id') == post_id:
+        if post.id == post_id:
             posts[i]['texto'] = novo_texto
             posts[i]['data_edicao'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             return salvar_posts(posts)
@@ -126,7 +149,7 @@ def excluir_post(post_id: int) -> bool:
     
     # Remove o post
     for i, post in enumerate(posts):
-        if post.get('id') == post_id:
+        if post.id == post_id:
             # Remove foto se existir
             if post.get('foto'):
                 caminho_foto = os.path.join(POSTS_FOTOS_DIR, post['foto'])
@@ -140,30 +163,28 @@ def excluir_post(post_id: int) -> bool:
             salvar_posts(posts)
             
             # Remove curtidas do post
-            curtidas = carregar_curtidas()
-            curtidas_filtradas = [c for c in curtidas if c.get('post_id') != post_id]
-            salvar_curtidas(curtidas_filtradas)
+            indice_curtidas.remover_post(post_id)
             
             # Remove comentários do post
-            comentarios = carregar_comentarios()
-            comentarios_filtrados = [c for c in comentarios if c.get('post_id') != post_id]
-            salvar_comentarios(comentarios_filtrados)
+            excluir_comentarios_post(post_id)
             
             return True
     
     return False
 
 
-def listar_posts_usuario(usuario_id: int) -> List[Dict]:
+@em_cache(POSTS_FILE)
+def listar_posts_usuario(usuario_id: int) -> List[Post]:
     """Lista todos os posts de um usuário"""
     posts = carregar_posts()
-    posts_usuario = [p for p in posts if p.get('usuario_id') == usuario_id]
+    posts_usuario = [p for p in posts if p.usuario_id == usuario_id]
     # Ordena por data (mais recente primeiro)
     posts_usuario.sort(key=lambda x: x.get('data_criacao', ''), reverse=True)
     return posts_usuario
 
 
-def listar_feed(usuario_id: int, limite: int = 20) -> List[Dict]:
+@em_cache(POSTS_FILE, SEGUINDO_FILE)
+def listar_feed(usuario_id: int, limite: int = 20) -> List[Post]:
     """Lista posts do feed (quem o usuário segue + próprios posts)"""
     posts = carregar_posts()
     seguindo_ids = listar_ids_seguindo(usuario_id)
@@ -171,7 +192,7 @@ def listar_feed(usuario_id: int, limite: int = 20) -> List[Dict]:
     # Inclui posts de quem segue + próprios posts
     seguindo_ids.add(usuario_id)
     
-    posts_feed = [p for p in posts if p.get('usuario_id') in seguindo_ids]
+    posts_feed = [p for p in posts if p.usuario_id in seguindo_ids]
     
     # Ordena por data (mais recente primeiro)
     posts_feed.sort(key=lambda x: x.get('data_criacao', ''), reverse=True)
@@ -180,6 +201,7 @@ def listar_feed(usuario_id: int, limite: int = 20) -> List[Dict]:
     return posts_feed[:limite]
 
 
+@medido('jogofacil_imagem_segundos', origem='post')
 def carregar_foto_post(foto_nome: str):
     """Carrega foto de um post"""
     if foto_nome:
@@ -191,12 +213,12 @@ def carregar_foto_post(foto_nome: str):
 
 # ============= FUNÇÕES DE SEGUIR =============
 
-def carregar_seguindo() -> List[Dict]:
+def carregar_seguindo() -> List[Seguindo]:
     """Carrega lista de relacionamentos de seguir"""
-    return carregar_json(SEGUINDO_FILE)
+    return Seguindo.lista(carregar_json(SEGUINDO_FILE))
 
 
-def salvar_seguindo(seguindo: List[Dict]) -> bool:
+def salvar_seguindo(seguindo: List[Seguindo]) -> bool:
     """Salva lista de relacionamentos"""
     return salvar_json(SEGUINDO_FILE, seguindo)
 
@@ -206,36 +228,29 @@ def seguir_usuario(seguidor_id: int, seguido_id: int) -> bool:
     if seguidor_id == seguido_id:
         return False  # Não pode seguir a si mesmo
     
-    seguindo = carregar_seguindo()
-    
     # Verifica se já segue
-    for rel in seguindo:
-        if rel.get('seguidor_id') == seguidor_id and rel.get('seguido_id') == seguido_id:
-            return False  # Já está seguindo
+    if grafo.segue(seguidor_id, seguido_id):
+        return False  # Já está seguindo
+    
+    seguindo = carregar_seguindo()
     
     # Gera ID único
-    novo_id = max([s.get('id', 0) for s in seguindo], default=0) + 1
+    novo_id = max([s.id for s in seguindo], default=0) + 1
     
-    novo_relacionamento = {
-        'id': novo_id,
-        'seguidor_id': seguidor_id,
-        'seguido_id': seguido_id,
-        'data_inicio': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
+    novo_relacionamento = Seguindo(
+        id=novo_id,
+        seguidor_id=seguidor_id,
+        seguido_id=seguido_id,
+        data_inicio=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    )
     
     seguindo.append(novo_relacionamento)
     salvar_seguindo(seguindo)
+    grafo.registrar_seguir(seguidor_id, seguido_id)
+    publicar(CANAL_SEGUINDO, {'seguidor_id': seguidor_id, 'seguido_id': seguido_id, 'seguindo': True})
     
-    # Cria notificação para quem foi seguido
-    seguidor = buscar_usuario_por_id(seguidor_id)
-    nome_seguidor = seguidor.get('apelido_jogador') or seguidor.get('nome') or seguidor.get('login')
-    
-    criar_notificacao(
-        usuario_id=seguido_id,
-        tipo='novo_seguidor',
-        mensagem=f'{nome_seguidor} começou a seguir você!',
-        dados={'seguidor_id': seguidor_id}
-    )
+    # Notificação para quem foi seguido é montada em segundo plano
+    emitir(UsuarioSeguido(seguidor_id=seguidor_id, seguido_id=seguido_id))
     
     return True
 
@@ -245,201 +260,376 @@ def deixar_seguir(seguidor_id: int, seguido_id: int) -> bool:
     seguindo = carregar_seguindo()
     
     for i, rel in enumerate(seguindo):
-        if rel.get('seguidor_id') == seguidor_id and rel.get('seguido_id') == seguido_id:
+        if rel.seguidor_id == seguidor_id and rel.seguido_id == seguido_id:
             seguindo.pop(i)
-            return salvar_seguindo(seguindo)
+            if not salvar_seguindo(seguindo):
+                return False
+            grafo.registrar_deixar_seguir(seguidor_id, seguido_id)
+            publicar(CANAL_SEGUINDO, {'seguidor_id': seguidor_id, 'seguido_id': seguido_id, 'seguindo': False})
+            return True
     
     return False
 
 
 def esta_seguindo(seguidor_id: int, seguido_id: int) -> bool:
     """Verifica se um usuário está seguindo outro"""
-    seguindo = carregar_seguindo()
-    
-    for rel in seguindo:
-        if rel.get('seguidor_id') == seguidor_id and rel.get('seguido_id') == seguido_id:
-            return True
-    
-    return False
+    return grafo.segue(seguidor_id, seguido_id)
 
 
 def listar_ids_seguindo(usuario_id: int) -> set:
     """Retorna IDs de usuários que o usuário segue"""
-    seguindo = carregar_seguindo()
-    return {rel.get('seguido_id') for rel in seguindo if rel.get('seguidor_id') == usuario_id}
+    return set(grafo.ids_seguindo(usuario_id))
 
 
 def listar_ids_seguidores(usuario_id: int) -> set:
     """Retorna IDs de usuários que seguem o usuário"""
-    seguindo = carregar_seguindo()
-    return {rel.get('seguidor_id') for rel in seguindo if rel.get('seguido_id') == usuario_id}
+    return set(grafo.ids_seguidores(usuario_id))
+
+
+def listar_ids_mutuos(usuario_id: int) -> set:
+    """Retorna IDs de usuários que o usuário segue e que o seguem de volta"""
+    return set(grafo.ids_mutuos(usuario_id))
+
+
+def filtrar_seguidos(seguidor_id: int, candidatos_ids) -> set:
+    """Em lote: quais dos usuários candidatos o usuário segue"""
+    return grafo.quais_segue(seguidor_id, candidatos_ids)
 
 
 def contar_seguindo(usuario_id: int) -> int:
     """Conta quantos usuários o usuário segue"""
-    return len(listar_ids_seguindo(usuario_id))
+    return grafo.contar_seguindo(usuario_id)
 
 
 def contar_seguidores(usuario_id: int) -> int:
     """Conta quantos seguidores o usuário tem"""
-    return len(listar_ids_seguidores(usuario_id))
+    return grafo.contar_seguidores(usuario_id)
 
 
 # ============= FUNÇÕES DE CURTIDAS =============
 
-def carregar_curtidas() -> List[Dict]:
-    """Carrega lista de curtidas"""
-    return carregar_json(CURTIDAS_FILE)
+def carregar_curtidas() -> List[Curtida]:
+    """Carrega lista de curtidas (curtidas.json mais as operações ainda no log)"""
+    return indice_curtidas.carregar_curtidas()
 
 
-def salvar_curtidas(curtidas: List[Dict]) -> bool:
+def salvar_curtidas(curtidas: List[Curtida]) -> bool:
     """Salva lista de curtidas"""
-    return salvar_json(CURTIDAS_FILE, curtidas)
+    return indice_curtidas.substituir(curtidas)
 
 
 def curtir_post(post_id: int, usuario_id: int) -> bool:
     """Usuário curte um post"""
-    curtidas = carregar_curtidas()
+    # Acrescenta uma linha ao log de curtidas (False se já curtiu)
+    if not indice_curtidas.curtir(post_id, usuario_id):
+        return False
     
-    # Verifica se já curtiu
-    for curtida in curtidas:
-        if curtida.get('post_id') == post_id and curtida.get('usuario_id') == usuario_id:
-            return False  # Já curtiu
+    publicar(CANAL_CURTIDAS, {'post_id': post_id, 'usuario_id': usuario_id, 'curtiu': True})
     
-    # Gera ID único
-    novo_id = max([c.get('id', 0) for c in curtidas], default=0) + 1
-    
-    nova_curtida = {
-        'id': novo_id,
-        'post_id': post_id,
-        'usuario_id': usuario_id,
-        'data': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    
-    curtidas.append(nova_curtida)
-    salvar_curtidas(curtidas)
-    
-    # Cria notificação para o dono do post (se não for ele mesmo curtindo)
-    post = buscar_post_por_id(post_id)
-    if post and post['usuario_id'] != usuario_id:
-        usuario = buscar_usuario_por_id(usuario_id)
-        nome_usuario = usuario.get('apelido_jogador') or usuario.get('nome') or usuario.get('login')
-        
-        # Pega preview do post
-        data_post = datetime.strptime(post['data_criacao'], "%Y-%m-%d %H:%M:%S").strftime("%d/%m/%Y %H:%M")
-        texto_preview = post.get('texto', '')[:10] + '...' if post.get('texto') and len(post.get('texto', '')) > 10 else post.get('texto', '[foto]')
-        
-        criar_notificacao(
-            usuario_id=post['usuario_id'],
-            tipo='curtida_post',
-            mensagem=f'{nome_usuario} curtiu sua postagem de {data_post}: "{texto_preview}"',
-            dados={'post_id': post_id, 'usuario_id': usuario_id}
-        )
+    # Notificação para o dono do post é montada em segundo plano
+    emitir(PostCurtido(post_id=post_id, usuario_id=usuario_id))
     
     return True
 
 
 def descurtir_post(post_id: int, usuario_id: int) -> bool:
     """Usuário remove curtida de um post"""
-    curtidas = carregar_curtidas()
-    
-    for i, curtida in enumerate(curtidas):
-        if curtida.get('post_id') == post_id and curtida.get('usuario_id') == usuario_id:
-            curtidas.pop(i)
-            return salvar_curtidas(curtidas)
+    if not indice_curtidas.descurtir(post_id, usuario_id):
+        return False
     
-    return False
+    publicar(CANAL_CURTIDAS, {'post_id': post_id, 'usuario_id': usuario_id, 'curtiu': False})
+    return True
 
 
 def usuario_curtiu(post_id: int, usuario_id: int) -> bool:
-    """Verifica se usuário curtiu um post"""
-    curtidas = carregar_curtidas()
-    
-    for curtida in curtidas:
-        if curtida.get('post_id') == post_id and curtida.get('usuario_id') == usuario_id:
-            return True
-    
-    return False
+    """Verifica se usuário curtiu um post (busca binária no índice de curtidas)"""
+    return indice_curtidas.curtiu(post_id, usuario_id)
+
+
+def listar_posts_curtidos(usuario_id: int) -> set:
+    """Retorna IDs dos posts que o usuário curtiu"""
+    return set(indice_curtidas.posts_curtidos(usuario_id))
 
 
 def contar_curtidas(post_id: int) -> int:
     """Conta quantas curtidas um post tem"""
-    curtidas = carregar_curtidas()
-    return sum(1 for c in curtidas if c.get('post_id') == post_id)
+    return indice_curtidas.contar(post_id)
 
 
 # ============= FUNÇÕES DE COMENTÁRIOS =============
+#
+# Cada post com comentários tem seus arquivos em data/comentarios/:
+#   post_<id>.json         -> comentários do post, mais antigos primeiro
+#   post_<id>_resumo.json  -> total e os últimos TAMANHO_PREVIA comentários
+# A lista fica ordenada por (data, id) desde a gravação, então uma página é
+# lida do começo do arquivo e parando no último comentário pedido, e o
+# contador e a prévia do feed vêm do resumo, sem abrir a lista. Os ids são
+# globais e crescentes (sequencia.json) e reservados sob uma trava entre
+# processos, junto com a gravação do post, para nunca se repetirem.
 
-def carregar_comentarios() -> List[Dict]:
-    """Carrega lista de comentários"""
-    return carregar_json(COMENTARIOS_FILE)
+COMENTARIOS_POR_PAGINA = 10
+TAMANHO_PREVIA = 3
 
+_comentarios_prontos = False
+_trava_comentarios = TravaProcessos(os.path.join(COMENTARIOS_DIR, ".trava"))
+_resumos: Dict[int, tuple] = {}  # post_id -> (versão do arquivo de resumo, resumo)
 
-def salvar_comentarios(comentarios: List[Dict]) -> bool:
-    """Salva lista de comentários"""
-    return salvar_json(COMENTARIOS_FILE, comentarios)
 
+def _caminho_comentarios(post_id: int) -> str:
+    """Retorna o caminho do arquivo de comentários de um post"""
+    return os.path.join(COMENTARIOS_DIR, f"post_{post_id}.json")
 
-def adicionar_comentario(post_id: int, usuario_id: int, texto: str) -> Optional[Dict]:
-    """Adiciona um comentário em um post"""
-    comentarios = carregar_comentarios()
+
+def _caminho_resumo_comentarios(post_id: int) -> str:
+    """Retorna o caminho do resumo (total e prévia) dos comentários de um post"""
+    return os.path.join(COMENTARIOS_DIR, f"post_{post_id}_resumo.json")
+
+
+def _posts_com_comentarios() -> List[int]:
+    """IDs dos posts que têm arquivo de comentários"""
+    return [int(nome[len('post_'):-len('.json')]) for nome in os.listdir(COMENTARIOS_DIR)
+            if nome.startswith('post_') and nome.endswith('.json') and not nome.endswith('_resumo.json')]
+
+
+def _ordem_comentario(comentario: Dict) -> tuple:
+    return (comentario.get('data', ''), comentario.get('id', 0))
+
+
+def _garantir_comentarios():
+    """Cria o diretório dos comentários e migra o comentarios.json antigo, se houver"""
+    global _comentarios_prontos
+    if _comentarios_prontos:
+        return
     
-    # Gera ID único
-    novo_id = max([c.get('id', 0) for c in comentarios], default=0) + 1
-    
-    novo_comentario = {
-        'id': novo_id,
-        'post_id': post_id,
-        'usuario_id': usuario_id,
-        'texto': texto,
-        'data': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    
-    comentarios.append(novo_comentario)
-    salvar_comentarios(comentarios)
-    
-    # Cria notificação para o dono do post (se não for ele mesmo comentando)
-    post = buscar_post_por_id(post_id)
-    if post and post['usuario_id'] != usuario_id:
-        usuario = buscar_usuario_por_id(usuario_id)
-        nome_usuario = usuario.get('apelido_jogador') or usuario.get('nome') or usuario.get('login')
+    os.makedirs(COMENTARIOS_DIR, exist_ok=True)
+    if not os.path.exists(COMENTARIOS_SEQ_FILE) and os.path.exists(COMENTARIOS_FILE):
+        salvar_comentarios(Comentario.lista(carregar_json(COMENTARIOS_FILE)))
+    
+    _comentarios_prontos = True
+
+
+def _proximo_id_comentario() -> int:
+    """Reserva o próximo id global de comentário"""
+    with _trava_comentarios:
+        sequencia = carregar_json(COMENTARIOS_SEQ_FILE) or {}
+        novo_id = sequencia.get('ultimo_id', 0) + 1
+        salvar_json(COMENTARIOS_SEQ_FILE, {'ultimo_id': novo_id})
+        return novo_id
+
+
+def _salvar_comentarios_post(post_id: int, comentarios: List[Comentario]) -> bool:
+    """Grava a lista (já ordenada) de um post e o seu resumo; sem comentários, apaga os arquivos"""
+    if not comentarios:
+        for caminho in (_caminho_comentarios(post_id), _caminho_resumo_comentarios(post_id)):
+            if os.path.exists(caminho):
+                os.remove(caminho)
+            invalidar(caminho)
+        return True
+    
+    resumo = {'total': len(comentarios), 'ultimos': comentarios[-TAMANHO_PREVIA:]}
+    return salvar_json(_caminho_comentarios(post_id), comentarios) and \
+        salvar_json(_caminho_resumo_comentarios(post_id), resumo)
+
+
+def carregar_comentarios() -> List[Comentario]:
+    """Carrega os comentários de todos os posts"""
+    _garantir_comentarios()
+    comentarios = []
+    
+    for post_id in _posts_com_comentarios():
+        comentarios.extend(Comentario.lista(carregar_json(_caminho_comentarios(post_id))))
+    
+    comentarios.sort(key=lambda x: x.get('id', 0))
+    return comentarios
+
+
+def salvar_comentarios(comentarios: List[Comentario]) -> bool:
+    """Salva uma lista completa de comentários, redistribuindo-os pelos posts"""
+    os.makedirs(COMENTARIOS_DIR, exist_ok=True)
+    
+    por_post = {}
+    for comentario in sorted(comentarios, key=_ordem_comentario):
+        por_post.setdefault(comentario.get('post_id'), []).append(comentario)
+    
+    with _trava_comentarios:
+        sucesso = True
+        for post_id in _posts_com_comentarios():
+            if post_id not in por_post:
+                sucesso = _salvar_comentarios_post(post_id, []) and sucesso
         
-        # Pega preview do post
-        data_post = datetime.strptime(post['data_criacao'], "%Y-%m-%d %H:%M:%S").strftime("%d/%m/%Y %H:%M")
-        texto_preview = post.get('texto', '')[:20] + '...' if post.get('texto') and len(post.get('texto', '')) > 20 else post.get('texto', '[foto]')
+        for post_id, lista in por_post.items():
+            sucesso = _salvar_comentarios_post(post_id, lista) and sucesso
         
-        criar_notificacao(
-            usuario_id=post['usuario_id'],
-            tipo='comentario_post',
-            mensagem=f'{nome_usuario} comentou sua postagem de {data_post}: "{texto_preview}"',
-            dados={'post_id': post_id, 'comentario_id': novo_id}
+        # A sequência nunca volta: ids de comentários apagados não são reaproveitados
+        sequencia = carregar_json(COMENTARIOS_SEQ_FILE) or {}
+        ultimo_id = max([c.get('id', 0) for c in comentarios] + [sequencia.get('ultimo_id', 0)])
+        sucesso = salvar_json(COMENTARIOS_SEQ_FILE, {'ultimo_id': ultimo_id}) and sucesso
+        return sucesso
+
+
+def adicionar_comentario(post_id: int, usuario_id: int, texto: str) -> Optional[Comentario]:
+    """Adiciona um comentário em um post"""
+    with _trava_comentarios:
+        _garantir_comentarios()
+        
+        novo_comentario = Comentario(
+            id=_proximo_id_comentario(),
+            post_id=post_id,
+            usuario_id=usuario_id,
+            texto=texto,
+            data=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         )
+        
+        # Quase sempre entra no fim; a busca binária cobre relógios fora de ordem
+        comentarios = Comentario.lista(carregar_json(_caminho_comentarios(post_id)))
+        insort(comentarios, novo_comentario, key=_ordem_comentario)
+        if not _salvar_comentarios_post(post_id, comentarios):
+            return None
+    
+    # Notificação para o dono do post é montada em segundo plano
+    emitir(ComentarioAdicionado(post_id=post_id, usuario_id=usuario_id, comentario_id=novo_comentario.id))
     
     return novo_comentario
 
 
-def excluir_comentario(comentario_id: int) -> bool:
-    """Exclui um comentário"""
-    comentarios = carregar_comentarios()
+def excluir_comentario(comentario_id: int, post_id: Optional[int] = None) -> bool:
+    """Exclui um comentário (informar o post evita procurar em todos)"""
+    _garantir_comentarios()
+    posts_ids = [post_id] if post_id is not None else _posts_com_comentarios()
     
-    for i, comentario in enumerate(comentarios):
-        if comentario.get('id') == comentario_id:
-            comentarios.pop(i)
-            return salvar_comentarios(comentarios)
+    with _trava_comentarios:
+        for pid in posts_ids:
+            comentarios = Comentario.lista(carregar_json(_caminho_comentarios(pid)))
+            for i, comentario in enumerate(comentarios):
+                if comentario.id == comentario_id:
+                    comentarios.pop(i)
+                    return _salvar_comentarios_post(pid, comentarios)
     
     return False
 
 
-def listar_comentarios_post(post_id: int) -> List[Dict]:
-    """Lista comentários de um post"""
-    comentarios = carregar_comentarios()
-    comentarios_post = [c for c in comentarios if c.get('post_id') == post_id]
-    # Ordena por data (mais antigo primeiro)
-    comentarios_post.sort(key=lambda x: x.get('data', ''))
-    return comentarios_post
+def excluir_comentarios_post(post_id: int) -> bool:
+    """Apaga todos os comentários de um post"""
+    with _trava_comentarios:
+        return _salvar_comentarios_post(post_id, [])
+
+
+def listar_comentarios_post(post_id: int, inicio: int = 0, limite: Optional[int] = None) -> List[Comentario]:
+    """
+    Lista comentários de um post (mais antigos primeiro). Com limite, para de
+    ler o arquivo no último comentário pedido
+    """
+    _garantir_comentarios()
+    fim = None if limite is None else inicio + limite
+    return [Comentario.de_dict(c) for c in islice(iterar_json(_caminho_comentarios(post_id)), inicio, fim)]
+
+
+def resumo_comentarios(post_id: int) -> Dict:
+    """Total e últimos comentários de um post, guardados em memória enquanto o resumo não muda"""
+    _garantir_comentarios()
+    caminho = _caminho_resumo_comentarios(post_id)
+    versao = versao_colecao(caminho)
+    
+    guardado = _resumos.get(post_id)
+    if guardado is None or guardado[0] != versao:
+        dados = carregar_json(caminho) if versao[1] is not None else {}
+        resumo = {'total': dados.get('total', 0), 'ultimos': Comentario.lista(dados.get('ultimos', []))}
+        guardado = _resumos[post_id] = (versao, resumo)
+    
+    resumo = guardado[1]
+    return {'total': resumo['total'], 'ultimos': list(resumo['ultimos'])}
 
 
 def contar_comentarios(post_id: int) -> int:
     """Conta quantos comentários um post tem"""
-    comentarios = carregar_comentarios()
-    return sum(1 for c in comentarios if c.get('post_id') == post_id)
+    return resumo_comentarios(post_id)['total']
+
+
+def _com_autores(comentarios: List[Comentario]) -> List[Dict]:
+    """Comentários acrescidos do nome de exibição do autor, buscando os autores de uma vez"""
+    autores = buscar_usuarios_por_ids({c.usuario_id for c in comentarios})
+    return [{**c, 'nome_autor': nome_exibicao(autores.get(c.usuario_id))} for c in comentarios]
+
+
+def pagina_comentarios(post_id: int, inicio: int = 0, limite: int = COMENTARIOS_POR_PAGINA) -> Dict:
+    """
+    Uma página de comentários de um post com o nome dos autores, a partir da
+    posição `inicio` ("ver mais comentários" pede só a página seguinte, com
+    inicio = quantos já foram mostrados).
+    Retorna {'comentarios': [...], 'total': n, 'tem_mais': bool}
+    """
+    comentarios = listar_comentarios_post(post_id, inicio=inicio, limite=limite)
+    total = contar_comentarios(post_id)
+    return {'comentarios': _com_autores(comentarios), 'total': total, 'tem_mais': total > inicio + len(comentarios)}
+
+
+def previa_comentarios(post_id: int) -> List[Dict]:
+    """Últimos comentários de um post com o nome dos autores (lidos do resumo)"""
+    return _com_autores(resumo_comentarios(post_id)['ultimos'])
+
+
+# ============= TRATADORES DE EVENTOS DO FEED =============
+# Rodam nas threads de utils_eventos, fora do caminho da requisição
+
+def _preview_post(post: Post, tamanho: int) -> str:
+    """Trecho do texto do post usado nas notificações"""
+    texto = post.get('texto', '')
+    if texto and len(texto) > tamanho:
+        return texto[:tamanho] + '...'
+    return post.get('texto', '[foto]')
+
+
+def _notificar_usuario_seguido(evento: UsuarioSeguido):
+    """Avisa quem ganhou um novo seguidor"""
+    nome_seguidor = nome_exibicao(buscar_usuario_por_id(evento.seguidor_id))
+    
+    criar_notificacao(
+        usuario_id=evento.seguido_id,
+        tipo='novo_seguidor',
+        dados={'seguidor_id': evento.seguidor_id},
+        ator=nome_seguidor,
+        acao='começou a seguir você!',
+        acao_plural='começaram a seguir você!'
+    )
+
+
+def _notificar_post_curtido(evento: PostCurtido):
+    """Avisa o dono do post sobre a curtida (se não for ele mesmo curtindo)"""
+    post = buscar_post_por_id(evento.post_id)
+    if not post or post['usuario_id'] == evento.usuario_id:
+        return
+    
+    nome_usuario = nome_exibicao(buscar_usuario_por_id(evento.usuario_id))
+    data_post = datetime.strptime(post['data_criacao'], "%Y-%m-%d %H:%M:%S").strftime("%d/%m/%Y %H:%M")
+    
+    alvo = f'sua postagem de {data_post}: "{_preview_post(post, 10)}"'
+    criar_notificacao(
+        usuario_id=post['usuario_id'],
+        tipo='curtida_post',
+        dados={'post_id': evento.post_id, 'usuario_id': evento.usuario_id},
+        ator=nome_usuario,
+        acao=f'curtiu {alvo}',
+        acao_plural=f'curtiram {alvo}'
+    )
+
+
+def _notificar_comentario(evento: ComentarioAdicionado):
+    """Avisa o dono do post sobre o comentário (se não for ele mesmo comentando)"""
+    post = buscar_post_por_id(evento.post_id)
+    if not post or post['usuario_id'] == evento.usuario_id:
+        return
+    
+    nome_usuario = nome_exibicao(buscar_usuario_por_id(evento.usuario_id))
+    data_post = datetime.strptime(post['data_criacao'], "%Y-%m-%d %H:%M:%S").strftime("%d/%m/%Y %H:%M")
+    
+    criar_notificacao(
+        usuario_id=post['usuario_id'],
+        tipo='comentario_post',
+        mensagem=f'{nome_usuario} comentou sua postagem de {data_post}: "{_preview_post(post, 20)}"',
+        dados={'post_id': evento.post_id, 'comentario_id': evento.comentario_id}
+    )
+
+
+registrar_tratador(UsuarioSeguido, _notificar_usuario_seguido)
+registrar_tratador(PostCurtido, _notificar_post_curtido)
+registrar_tratador(ComentarioAdicionado, _notificar_comentario)
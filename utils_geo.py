@@ -0,0 +1,189 @@
+"""
+Busca de campos e jogos por distância
+Os campos podem ter latitude/longitude no campos.json; quando não têm, a
+posição vem da tabela local de geocodificação (data/geocodificacao.json),
+procurando no endereço o nome de uma região conhecida. Tudo funciona offline.
+Os campos ficam numa grade de células de tamanho fixo, então a busca por raio
+só mede a distância dos campos das células vizinhas
+"""
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from utils import obter_catalogo_campos, listar_jogos_futuros
+
+
+# Caminhos dos arquivos
+DATA_DIR = "data"
+GEOCODIFICACAO_FILE = os.path.join(DATA_DIR, "geocodificacao.json")
+
+TAMANHO_CELULA = 0.05  # graus (cerca de 5,5 km)
+RAIO_TERRA_KM = 6371.0
+
+_tabela: Dict[str, Tuple[float, float]] = {}  # nome normalizado -> (lat, lon)
+_nomes_locais: List[str] = []
+_carimbo_tabela: Optional[Tuple[int, int]] = None
+
+_grade: Dict[Tuple[int, int], List[Tuple[Mapping, float, float]]] = {}
+_catalogo_indexado = None
+_trava = threading.Lock()
+
+
+# ============= GEOCODIFICAÇÃO =============
+
+def _normalizar(texto: str) -> str:
+    """Palavras em minúsculas e sem acentos (sem pontuação), separadas por um espaço"""
+    sem_acento = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    return " ".join(re.findall(r"\w+", sem_acento.lower()))
+
+
+def _carimbo(arquivo: str) -> Optional[Tuple[int, int]]:
+    """Data de modificação e tamanho de um arquivo, para saber se mudou"""
+    try:
+        stat = os.stat(arquivo)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def _garantir_tabela() -> bool:
+    """Carrega a tabela de geocodificação (de novo, se o arquivo mudou). Retorna True se recarregou"""
+    global _carimbo_tabela
+
+    carimbo = _carimbo(GEOCODIFICACAO_FILE)
+    if carimbo == _carimbo_tabela:
+        return False
+
+    try:
+        with open(GEOCODIFICACAO_FILE, 'r', encoding='utf-8') as f:
+            locais = json.load(f)
+    except (OSError, ValueError):
+        locais = []
+
+    _tabela.clear()
+    for local in locais:
+        _tabela[_normalizar(local['nome'])] = (local['latitude'], local['longitude'])
+    _nomes_locais[:] = sorted(local['nome'] for local in locais)
+    _carimbo_tabela = carimbo
+    return True
+
+
+def listar_locais() -> List[str]:
+    """Nomes das regiões da tabela de geocodificação, em ordem alfabética"""
+    with _trava:
+        _garantir_tabela()
+        return list(_nomes_locais)
+
+
+def geocodificar(texto: str) -> Optional[Tuple[float, float]]:
+    """
+    Coordenadas (lat, lon) de um lugar pela tabela local
+    Aceita o nome exato de uma região ou um endereço que contenha o nome
+    como palavras inteiras ("Gama" não casa com "Gamaleira"); o nome mais
+    longo encontrado vence: "Asa Norte" antes de "Norte"
+    """
+    with _trava:
+        _garantir_tabela()
+        normalizado = _normalizar(texto or '')
+        if normalizado in _tabela:
+            return _tabela[normalizado]
+
+        palavras = f" {normalizado} "
+        encontrados = [nome for nome in _tabela if f" {nome} " in palavras]
+        if not encontrados:
+            return None
+        return _tabela[max(encontrados, key=len)]
+
+
+def coordenadas_campo(campo: Mapping) -> Optional[Tuple[float, float]]:
+    """Coordenadas do campo: as cadastradas ou, sem elas, as do endereço"""
+    if campo.get('latitude') is not None and campo.get('longitude') is not None:
+        return (campo['latitude'], campo['longitude'])
+    return geocodificar(campo.get('endereco', ''))
+
+
+# ============= ÍNDICE ESPACIAL =============
+
+def _celula(lat: float, lon: float) -> Tuple[int, int]:
+    """Célula da grade que contém um ponto"""
+    return (math.floor(lat / TAMANHO_CELULA), math.floor(lon / TAMANHO_CELULA))
+
+
+def _garantir_grade() -> None:
+    """Remonta a grade se o catálogo de campos ou a tabela de geocodificação mudou"""
+    global _catalogo_indexado
+
+    catalogo = obter_catalogo_campos()
+    with _trava:
+        tabela_mudou = _garantir_tabela()
+        if catalogo is _catalogo_indexado and not tabela_mudou:
+            return
+
+    grade: Dict[Tuple[int, int], List[Tuple[Mapping, float, float]]] = {}
+    for campo in catalogo.campos:
+        coordenadas = coordenadas_campo(campo)
+        if coordenadas:
+            lat, lon = coordenadas
+            grade.setdefault(_celula(lat, lon), []).append((campo, lat, lon))
+
+    with _trava:
+        _grade.clear()
+        _grade.update(grade)
+        _catalogo_indexado = catalogo
+
+
+def distancia_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distância em linha reta entre dois pontos (fórmula de haversine)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(math.sqrt(a))
+
+
+def campos_proximos(lat: float, lon: float, raio_km: float) -> List[Tuple[Mapping, float]]:
+    """Campos a até raio_km do ponto, do mais perto ao mais longe: [(campo, distância), ...]"""
+    _garantir_grade()
+
+    # Células que cobrem o quadrado em volta do círculo de busca
+    delta_lat = raio_km / 110.57
+    delta_lon = raio_km / (111.32 * max(math.cos(math.radians(lat)), 0.01))
+    lat_min, lon_min = _celula(lat - delta_lat, lon - delta_lon)
+    lat_max, lon_max = _celula(lat + delta_lat, lon + delta_lon)
+
+    resultado = []
+    with _trava:
+        for i in range(lat_min, lat_max + 1):
+            for j in range(lon_min, lon_max + 1):
+                for campo, campo_lat, campo_lon in _grade.get((i, j), []):
+                    distancia = distancia_km(lat, lon, campo_lat, campo_lon)
+                    if distancia <= raio_km:
+                        resultado.append((campo, distancia))
+
+    resultado.sort(key=lambda x: x[1])
+    return resultado
+
+
+# ============= BUSCA DE JOGOS =============
+
+def buscar_jogos_proximos(lat: float, lon: float, raio_km: float,
+                          data_inicial: Optional[str] = None, data_final: Optional[str] = None) -> List[Dict]:
+    """
+    Jogos futuros em campos a até raio_km do ponto, ordenados por distância,
+    data e horário. Cada jogo vem com 'distancia_km'
+    """
+    distancias = {campo['id']: distancia for campo, distancia in campos_proximos(lat, lon, raio_km)}
+    if not distancias:
+        return []
+
+    jogos = [
+        {**jogo, 'distancia_km': distancias[jogo['campo_id']]}
+        for jogo in listar_jogos_futuros(data_inicial)
+        if jogo.get('campo_id') in distancias and (not data_final or jogo.get('data', '') <= data_final)
+    ]
+    jogos.sort(key=lambda j: (j['distancia_km'], j.get('data', ''), j.get('hora_inicio', '')))
+    return jogos
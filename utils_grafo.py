@@ -0,0 +1,252 @@
+"""
+Grafo de seguidores em memória
+Guarda, para cada usuário, os ids de quem ele segue e de quem o segue em
+arrays ordenados de inteiros (módulo array), então "A segue B?" é uma busca
+binária e consultas em lote ("quais destes 50 eu sigo?", seguidores mútuos)
+são interseções de listas ordenadas. O seguindo.json continua sendo a fonte
+dos dados; o grafo fica salvo também num arquivo binário compacto (formato
+CSR) que evita reprocessar o JSON ao iniciar
+"""
+import json
+import os
+import threading
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# Caminhos dos arquivos
+DATA_DIR = "data"
+SEGUINDO_FILE = os.path.join(DATA_DIR, "seguindo.json")
+GRAFO_FILE = os.path.join(DATA_DIR, "seguindo.grafo")
+
+_MAGICO = b"JFGRAFO1"
+_TIPO_ID = 'i'  # inteiros de 32 bits
+
+_seguindo: Dict[int, array] = {}
+_seguidores: Dict[int, array] = {}
+_carimbo_origem: Optional[Tuple[int, int]] = None  # (mtime_ns, tamanho) do seguindo.json carregado
+_trava = threading.RLock()
+
+
+# ============= CARREGAMENTO =============
+
+def _carimbo(arquivo: str) -> Optional[Tuple[int, int]]:
+    """Data de modificação e tamanho de um arquivo, para saber se mudou"""
+    try:
+        stat = os.stat(arquivo)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def _montar(arestas: Iterable[Tuple[int, int]]) -> None:
+    """Monta as listas de adjacência (direta e reversa) a partir das arestas"""
+    seguindo: Dict[int, List[int]] = {}
+    seguidores: Dict[int, List[int]] = {}
+
+    for seguidor_id, seguido_id in arestas:
+        seguindo.setdefault(seguidor_id, []).append(seguido_id)
+        seguidores.setdefault(seguido_id, []).append(seguidor_id)
+
+    _seguindo.clear()
+    _seguidores.clear()
+    for destino, origem in ((_seguindo, seguindo), (_seguidores, seguidores)):
+        for usuario_id, ids in origem.items():
+            destino[usuario_id] = array(_TIPO_ID, sorted(set(ids)))
+
+
+def _ler_snapshot(carimbo_origem: Tuple[int, int]) -> bool:
+    """Carrega o grafo do arquivo binário se ele corresponder ao seguindo.json atual"""
+    try:
+        with open(GRAFO_FILE, 'rb') as f:
+            if f.read(len(_MAGICO)) != _MAGICO:
+                return False
+
+            cabecalho = array('q')
+            cabecalho.fromfile(f, 4)
+            mtime_ns, tamanho, num_usuarios, num_arestas = cabecalho
+            if (mtime_ns, tamanho) != carimbo_origem:
+                return False
+
+            usuarios, inicios, vizinhos = array(_TIPO_ID), array('q'), array(_TIPO_ID)
+            usuarios.fromfile(f, num_usuarios)
+            inicios.fromfile(f, num_usuarios + 1)
+            vizinhos.fromfile(f, num_arestas)
+    except (OSError, EOFError, ValueError):
+        return False
+
+    # As listas diretas já vêm ordenadas; as reversas saem ordenadas porque
+    # os usuários são percorridos em ordem crescente
+    seguidores: Dict[int, array] = {}
+    _seguindo.clear()
+    for i, usuario_id in enumerate(usuarios):
+        ids = vizinhos[inicios[i]:inicios[i + 1]]
+        _seguindo[usuario_id] = ids
+        for seguido_id in ids:
+            seguidores.setdefault(seguido_id, array(_TIPO_ID)).append(usuario_id)
+
+    _seguidores.clear()
+    _seguidores.update(seguidores)
+    return True
+
+
+def _salvar_snapshot() -> bool:
+    """Grava o grafo no formato binário (usuários, início de cada lista e vizinhos)"""
+    carimbo_origem = _carimbo(SEGUINDO_FILE)
+    if carimbo_origem is None:
+        return False
+
+    usuarios, inicios, vizinhos = array(_TIPO_ID), array('q', [0]), array(_TIPO_ID)
+    for usuario_id in sorted(_seguindo):
+        usuarios.append(usuario_id)
+        vizinhos.extend(_seguindo[usuario_id])
+        inicios.append(len(vizinhos))
+
+    temporario = GRAFO_FILE + ".tmp"
+    try:
+        with open(temporario, 'wb') as f:
+            f.write(_MAGICO)
+            array('q', [*carimbo_origem, len(usuarios), len(vizinhos)]).tofile(f)
+            usuarios.tofile(f)
+            inicios.tofile(f)
+            vizinhos.tofile(f)
+        os.replace(temporario, GRAFO_FILE)
+        return True
+    except OSError:
+        return False
+
+
+def _garantir_grafo() -> None:
+    """Recarrega o grafo se o seguindo.json mudou desde a última leitura (custa um stat)"""
+    global _carimbo_origem
+
+    carimbo_origem = _carimbo(SEGUINDO_FILE)
+    if carimbo_origem == _carimbo_origem and carimbo_origem is not None:
+        return
+
+    with _trava:
+        if carimbo_origem == _carimbo_origem and carimbo_origem is not None:
+            return
+
+        if carimbo_origem is None:
+            _montar([])
+        elif not _ler_snapshot(carimbo_origem):
+            try:
+                with open(SEGUINDO_FILE, 'r', encoding='utf-8') as f:
+                    relacoes = json.load(f)
+            except (OSError, ValueError):
+                relacoes = []
+            _montar((r.get('seguidor_id'), r.get('seguido_id')) for r in relacoes)
+            _salvar_snapshot()
+
+        _carimbo_origem = carimbo_origem
+
+
+# ============= ATUALIZAÇÃO (chamada pelas funções de escrita) =============
+
+def _ja_contem(ids: array, valor: int) -> bool:
+    """Busca binária em um array ordenado"""
+    i = bisect_left(ids, valor)
+    return i < len(ids) and ids[i] == valor
+
+
+def registrar_seguir(seguidor_id: int, seguido_id: int) -> None:
+    """Inclui uma aresta depois que o seguindo.json foi salvo"""
+    global _carimbo_origem
+
+    with _trava:
+        if _carimbo_origem is None:
+            _garantir_grafo()
+        for mapa, origem, destino in ((_seguindo, seguidor_id, seguido_id), (_seguidores, seguido_id, seguidor_id)):
+            ids = mapa.setdefault(origem, array(_TIPO_ID))
+            if not _ja_contem(ids, destino):
+                insort(ids, destino)
+        _carimbo_origem = _carimbo(SEGUINDO_FILE)
+        _salvar_snapshot()
+
+
+def registrar_deixar_seguir(seguidor_id: int, seguido_id: int) -> None:
+    """Remove uma aresta depois que o seguindo.json foi salvo"""
+    global _carimbo_origem
+
+    with _trava:
+        if _carimbo_origem is None:
+            _garantir_grafo()
+        for mapa, origem, destino in ((_seguindo, seguidor_id, seguido_id), (_seguidores, seguido_id, seguidor_id)):
+            ids = mapa.get(origem)
+            if ids is not None and _ja_contem(ids, destino):
+                del ids[bisect_left(ids, destino)]
+        _carimbo_origem = _carimbo(SEGUINDO_FILE)
+        _salvar_snapshot()
+
+
+# ============= CONSULTAS =============
+
+def segue(seguidor_id: int, seguido_id: int) -> bool:
+    """Verifica se um usuário segue outro (busca binária)"""
+    _garantir_grafo()
+    return _ja_contem(_seguindo.get(seguidor_id, ()), seguido_id)
+
+
+def ids_seguindo(usuario_id: int) -> array:
+    """IDs (ordenados) de quem o usuário segue"""
+    _garantir_grafo()
+    return array(_TIPO_ID, _seguindo.get(usuario_id, ()))
+
+
+def ids_seguidores(usuario_id: int) -> array:
+    """IDs (ordenados) de quem segue o usuário"""
+    _garantir_grafo()
+    return array(_TIPO_ID, _seguidores.get(usuario_id, ()))
+
+
+def contar_seguindo(usuario_id: int) -> int:
+    """Quantos usuários o usuário segue"""
+    _garantir_grafo()
+    return len(_seguindo.get(usuario_id, ()))
+
+
+def contar_seguidores(usuario_id: int) -> int:
+    """Quantos seguidores o usuário tem"""
+    _garantir_grafo()
+    return len(_seguidores.get(usuario_id, ()))
+
+
+def _intersecao(a: Iterable[int], b: Iterable[int]) -> List[int]:
+    """Interseção de duas sequências ordenadas, percorrendo cada uma uma vez"""
+    resultado = []
+    ia, ib = iter(a), iter(b)
+    x, y = next(ia, None), next(ib, None)
+    while x is not None and y is not None:
+        if x == y:
+            resultado.append(x)
+            x, y = next(ia, None), next(ib, None)
+        elif x < y:
+            x = next(ia, None)
+        else:
+            y = next(ib, None)
+    return resultado
+
+
+def quais_segue(seguidor_id: int, candidatos: Iterable[int]) -> Set[int]:
+    """Em lote: quais dos candidatos o usuário segue"""
+    _garantir_grafo()
+    return set(_intersecao(_seguindo.get(seguidor_id, ()), sorted(set(candidatos))))
+
+
+def quais_seguem(seguido_id: int, candidatos: Iterable[int]) -> Set[int]:
+    """Em lote: quais dos candidatos seguem o usuário"""
+    _garantir_grafo()
+    return set(_intersecao(_seguidores.get(seguido_id, ()), sorted(set(candidatos))))
+
+
+def ids_mutuos(usuario_id: int) -> List[int]:
+    """IDs de quem o usuário segue e também o segue de volta"""
+    _garantir_grafo()
+    return _intersecao(_seguindo.get(usuario_id, ()), _seguidores.get(usuario_id, ()))
+
+
+def seguem_mutuamente(usuario_a: int, usuario_b: int) -> bool:
+    """Verifica se dois usuários se seguem"""
+    return segue(usuario_a, usuario_b) and segue(usuario_b, usuario_a)
@@ -0,0 +1,507 @@
+"""
+Verificação e reparo da integridade dos dados
+Como as gravações não são atômicas e as atualizações entre coleções não são
+transacionais, podem sobrar curtidas e comentários de posts apagados,
+vagas_ocupadas fora de sincronia com as inscrições aprovadas, ids
+duplicados e fotos sem dono. O verificador lê cada arquivo uma única vez, um
+registro por vez, guardando só ids e contadores (nunca a coleção inteira).
+Os reparos seguros são aplicados numa única gravação por coleção; sem
+--reparar nada é gravado. Arquivos truncados são só relatados e bloqueiam
+o reparo, para não perder os registros depois do corte nem corrigir as
+outras coleções com base em dados incompletos.
+Rodar com o app parado:
+    python -m utils_integridade
+    python -m utils_integridade --reparar
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from utils import (
+    USUARIOS_FILE, CAMPOS_FILE, JOGOS_FILE, INSCRICOES_FILE,
+    NOTIFICACOES_DIR, NOTIFICACOES_SEQ_FILE, FOTOS_DIR, DATA_DIR, iterar_json
+)
+from utils_feed import (
+    POSTS_FILE, CURTIDAS_FILE, COMENTARIOS_DIR, COMENTARIOS_SEQ_FILE, SEGUINDO_FILE, POSTS_FOTOS_DIR,
+    TAMANHO_PREVIA
+)
+from utils_cache import invalidar
+from utils_snapshot import descartar_snapshot
+import utils_curtidas as indice_curtidas
+
+
+ORFAS_DIR = os.path.join(DATA_DIR, "orfas")  # fotos sem dono são movidas para cá, não apagadas
+MAX_EXEMPLOS = 10
+STATUS_INSCRICAO = {'pendente', 'aprovada', 'reprovada', 'cancelada'}
+
+
+# ============= REGRAVAÇÃO =============
+
+def _regravar(arquivo: str, remover: Set[int], alterar: Dict[int, Dict]) -> Optional[int]:
+    """
+    Regrava uma coleção numa única gravação (arquivo temporário + troca atômica),
+    pulando as posições em remover e aplicando as alterações por posição.
+    Mantém a formatação do salvar_json. Retorna quantos registros foram gravados,
+    ou None se o arquivo está truncado (fica como estava)
+    """
+    temporario = f"{arquivo}.reparo"
+    gravados = 0
+    try:
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write("[")
+            for posicao, registro in enumerate(iterar_json(arquivo, estrito=True)):
+                if posicao in remover:
+                    continue
+                if posicao in alterar:
+                    registro = {**registro, **alterar[posicao]}
+                texto = json.dumps(registro, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+                f.write(("," if gravados else "") + "\n  " + texto)
+                gravados += 1
+            f.write("\n]" if gravados else "]")
+    except ValueError:
+        os.remove(temporario)
+        return None
+    os.replace(temporario, arquivo)
+    descartar_snapshot(arquivo)
+    invalidar(arquivo)
+    return gravados
+
+
+# ============= VERIFICAÇÃO =============
+
+class Verificacao:
+    """Violações encontradas e reparos planejados (por posição do registro no arquivo)"""
+
+    def __init__(self):
+        self.violacoes: Dict[str, Dict] = {}
+        self.remover: Dict[str, Set[int]] = {}
+        self.alterar: Dict[str, Dict[int, Dict]] = {}
+        self.fotos_orfas: List[str] = []
+        self.estados: Dict[int, Dict] = {}  # usuario_id -> estado da caixa corrigido
+        self.sequencia: Optional[int] = None  # novo ultimo_id da sequência de notificações
+        self.resumos: Dict[int, Dict] = {}  # post_id -> resumo dos comentários corrigido
+        self.sequencia_comentarios: Optional[int] = None
+        self.truncados: Set[str] = set()  # arquivos que o reparo não regrava
+
+    def registrar(self, nome: str, exemplo, reparavel: bool = False) -> None:
+        v = self.violacoes.setdefault(nome, {'total': 0, 'reparavel': reparavel, 'exemplos': []})
+        v['total'] += 1
+        if len(v['exemplos']) < MAX_EXEMPLOS:
+            v['exemplos'].append(exemplo)
+
+    def remover_registro(self, arquivo: str, posicao: int) -> None:
+        self.remover.setdefault(arquivo, set()).add(posicao)
+
+    def alterar_registro(self, arquivo: str, posicao: int, campos: Dict) -> None:
+        self.alterar.setdefault(arquivo, {}).setdefault(posicao, {}).update(campos)
+
+    def relatorio(self) -> Dict:
+        return {
+            'violacoes': self.violacoes,
+            'total': sum(v['total'] for v in self.violacoes.values()),
+            'reparaveis': sum(v['total'] for v in self.violacoes.values() if v['reparavel'])
+        }
+
+
+def _par(a, b) -> int:
+    """Chave compacta para um par de ids (menos memória que uma tupla)"""
+    return (int(a or 0) << 32) | int(b or 0)
+
+
+def _registros(v: Verificacao, arquivo: str, registros: Optional[Iterable[Dict]] = None) -> Iterator:
+    """(posição, registro) de uma coleção; um arquivo truncado vira violação em vez de parar em silêncio"""
+    posicao = -1
+    try:
+        for posicao, registro in enumerate(registros if registros is not None else iterar_json(arquivo, estrito=True)):
+            yield posicao, registro
+    except ValueError:
+        v.registrar("arquivo_truncado", {'arquivo': os.path.relpath(arquivo, DATA_DIR), 'registros_lidos': posicao + 1})
+        v.truncados.add(arquivo)
+
+
+def _ids_unicos(v: Verificacao, arquivo: str, nome: str, reatribuir: bool = False,
+                registros: Optional[Iterable[Dict]] = None) -> Iterator:
+    """
+    Percorre a coleção gerando (posição, registro) e conferindo ids duplicados.
+    Com reatribuir, os repetidos ganham ids novos no reparo (só para coleções
+    cujos ids ninguém referencia)
+    """
+    vistos: Set[int] = set()
+    repetidos = []
+    maior = 0
+    for posicao, registro in _registros(v, arquivo, registros):
+        id_ = registro.get('id')
+        if id_ in vistos:
+            v.registrar(f"id_duplicado.{nome}", {'id': id_, 'posicao': posicao}, reparavel=reatribuir)
+            repetidos.append(posicao)
+        vistos.add(id_)
+        maior = max(maior, id_ or 0)
+        yield posicao, registro
+
+    if reatribuir:
+        for deslocamento, posicao in enumerate(repetidos, start=1):
+            v.alterar_registro(arquivo, posicao, {'id': maior + deslocamento})
+
+
+def verificar(compactar_curtidas: bool = False) -> Verificacao:
+    """
+    Confere todas as invariantes lendo cada coleção uma única vez, sem gravar
+    nada. Para reparar, compactar_curtidas leva antes o log de curtidas para o
+    curtidas.json (os reparos apontam posições no arquivo)
+    """
+    v = Verificacao()
+
+    # Curtidas ainda no log: no reparo entram no curtidas.json antes de ele ser
+    # lido; só verificando, são aplicadas em memória
+    curtidas = None
+    if compactar_curtidas:
+        indice_curtidas.compactar()
+    elif indice_curtidas.tem_log_pendente():
+        curtidas = indice_curtidas.carregar_curtidas()
+
+    # Usuários e campos
+    usuarios: Set[int] = set()
+    fotos_usuarios: Set[str] = set()
+    for _, usuario in _ids_unicos(v, USUARIOS_FILE, 'usuarios'):
+        usuarios.add(usuario.get('id'))
+        if usuario.get('foto'):
+            fotos_usuarios.add(usuario['foto'])
+
+    campos = {campo.get('id') for _, campo in _ids_unicos(v, CAMPOS_FILE, 'campos')}
+
+    # Posts
+    posts: Set[int] = set()
+    fotos_posts: Set[str] = set()
+    for posicao, post in _ids_unicos(v, POSTS_FILE, 'posts'):
+        posts.add(post.get('id'))
+        if post.get('usuario_id') not in usuarios:
+            v.registrar("post_sem_autor", {'post_id': post.get('id'), 'usuario_id': post.get('usuario_id')})
+        if post.get('foto'):
+            if os.path.exists(os.path.join(POSTS_FOTOS_DIR, post['foto'])):
+                fotos_posts.add(post['foto'])
+            else:
+                v.registrar("post_com_foto_inexistente", {'post_id': post.get('id'), 'foto': post['foto']}, reparavel=True)
+                v.alterar_registro(POSTS_FILE, posicao, {'foto': ''})
+
+    # Jogos (as vagas são conferidas depois das inscrições)
+    jogos: Dict[int, tuple] = {}  # id -> (posição, vagas_ocupadas gravado, vagas_total)
+    for posicao, jogo in _ids_unicos(v, JOGOS_FILE, 'jogos'):
+        jogos[jogo.get('id')] = (posicao, jogo.get('vagas_ocupadas', 0), jogo.get('vagas_total', 0))
+        if jogo.get('campo_id') not in campos:
+            v.registrar("jogo_sem_campo", {'jogo_id': jogo.get('id'), 'campo_id': jogo.get('campo_id')})
+        if jogo.get('organizador_id') not in usuarios:
+            v.registrar("jogo_sem_organizador", {'jogo_id': jogo.get('id'), 'organizador_id': jogo.get('organizador_id')})
+
+    # Inscrições
+    aprovadas: Dict[int, int] = {}
+    pares: Set[int] = set()
+    for posicao, insc in _ids_unicos(v, INSCRICOES_FILE, 'inscricoes'):
+        jogo_id, jogador_id = insc.get('jogo_id'), insc.get('jogador_id')
+        if jogo_id not in jogos or jogador_id not in usuarios:
+            v.registrar("inscricao_orfa", {'inscricao_id': insc.get('id'), 'jogo_id': jogo_id, 'jogador_id': jogador_id},
+                        reparavel=True)
+            v.remover_registro(INSCRICOES_FILE, posicao)
+            continue
+        par = _par(jogo_id, jogador_id)
+        if par in pares:
+            v.registrar("inscricao_duplicada", {'inscricao_id': insc.get('id'), 'jogo_id': jogo_id, 'jogador_id': jogador_id})
+        pares.add(par)
+        if insc.get('status') not in STATUS_INSCRICAO:
+            v.registrar("inscricao_status_invalido", {'inscricao_id': insc.get('id'), 'status': insc.get('status')})
+        if insc.get('status') == 'aprovada':
+            aprovadas[jogo_id] = aprovadas.get(jogo_id, 0) + 1
+    del pares
+
+    for jogo_id, (posicao, ocupadas, total) in jogos.items():
+        contadas = aprovadas.get(jogo_id, 0)
+        if ocupadas != contadas:
+            v.registrar("vagas_ocupadas_divergente", {'jogo_id': jogo_id, 'gravado': ocupadas, 'aprovadas': contadas},
+                        reparavel=True)
+            v.alterar_registro(JOGOS_FILE, posicao, {'vagas_ocupadas': contadas})
+        if contadas > total:
+            v.registrar("jogo_acima_da_capacidade", {'jogo_id': jogo_id, 'vagas_total': total, 'aprovadas': contadas})
+    del jogos, aprovadas
+
+    # Curtidas, comentários e seguidores: ids ninguém referencia, então repetidos ganham id novo
+    pares = set()
+    for posicao, curtida in _ids_unicos(v, CURTIDAS_FILE, 'curtidas', reatribuir=True, registros=curtidas):
+        post_id, usuario_id = curtida.get('post_id'), curtida.get('usuario_id')
+        if post_id not in posts or usuario_id not in usuarios:
+            v.registrar("curtida_orfa", {'curtida_id': curtida.get('id'), 'post_id': post_id, 'usuario_id': usuario_id},
+                        reparavel=True)
+            v.remover_registro(CURTIDAS_FILE, posicao)
+            continue
+        par = _par(post_id, usuario_id)
+        if par in pares:
+            v.registrar("curtida_duplicada", {'curtida_id': curtida.get('id'), 'post_id': post_id, 'usuario_id': usuario_id},
+                        reparavel=True)
+            v.remover_registro(CURTIDAS_FILE, posicao)
+        pares.add(par)
+
+    _verificar_comentarios(v, posts, usuarios)
+
+    pares = set()
+    for posicao, relacao in _ids_unicos(v, SEGUINDO_FILE, 'seguindo', reatribuir=True):
+        seguidor_id, seguido_id = relacao.get('seguidor_id'), relacao.get('seguido_id')
+        if seguidor_id not in usuarios or seguido_id not in usuarios or seguidor_id == seguido_id:
+            v.registrar("seguindo_invalido", {'id': relacao.get('id'), 'seguidor_id': seguidor_id, 'seguido_id': seguido_id},
+                        reparavel=True)
+            v.remover_registro(SEGUINDO_FILE, posicao)
+            continue
+        par = _par(seguidor_id, seguido_id)
+        if par in pares:
+            v.registrar("seguindo_duplicado", {'id': relacao.get('id'), 'seguidor_id': seguidor_id, 'seguido_id': seguido_id},
+                        reparavel=True)
+            v.remover_registro(SEGUINDO_FILE, posicao)
+        pares.add(par)
+    del pares, posts
+
+    _verificar_notificacoes(v, usuarios)
+    _verificar_fotos(v, POSTS_FOTOS_DIR, fotos_posts)
+    _verificar_fotos(v, FOTOS_DIR, fotos_usuarios)
+    return v
+
+
+def _verificar_notificacoes(v: Verificacao, usuarios: Set[int]) -> None:
+    """Ids únicos entre as caixas, dono de cada caixa, contadores do estado e a sequência"""
+    if not os.path.isdir(NOTIFICACOES_DIR):
+        return
+
+    vistos: Set[int] = set()
+    maior = 0
+    for nome in sorted(os.listdir(NOTIFICACOES_DIR)):
+        if not nome.startswith("usuario_") or nome.endswith("_estado.json") or not nome.endswith(".json"):
+            continue
+        try:
+            usuario_id = int(nome[len("usuario_"):-len(".json")])
+        except ValueError:
+            continue
+        if usuario_id not in usuarios:
+            v.registrar("caixa_sem_usuario", {'arquivo': nome})
+
+        arquivo_estado = os.path.join(NOTIFICACOES_DIR, f"usuario_{usuario_id}_estado.json")
+        try:
+            with open(arquivo_estado, 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+        except (OSError, ValueError):
+            estado = {}
+        lidas_ate, lidas = estado.get('lidas_ate', 0), set(estado.get('lidas', []))
+
+        nao_lidas, maior_caixa = 0, 0
+        caixa = os.path.join(NOTIFICACOES_DIR, nome)
+        for _, notificacao in _registros(v, caixa):
+            id_ = notificacao.get('id', 0)
+            if id_ in vistos:
+                v.registrar("id_duplicado.notificacoes", {'id': id_, 'arquivo': nome})
+            vistos.add(id_)
+            if notificacao.get('usuario_id') != usuario_id:
+                v.registrar("notificacao_na_caixa_errada", {'id': id_, 'usuario_id': notificacao.get('usuario_id'), 'arquivo': nome})
+            maior_caixa = max(maior_caixa, id_)
+            if not (id_ <= lidas_ate or id_ in lidas):
+                nao_lidas += 1
+        maior = max(maior, maior_caixa)
+
+        if caixa in v.truncados:
+            continue  # Contadores de uma caixa truncada não são corrigidos
+        if estado.get('nao_lidas', 0) != nao_lidas or estado.get('ultimo_id', 0) < maior_caixa:
+            v.registrar("estado_caixa_divergente", {'usuario_id': usuario_id, 'nao_lidas_gravado': estado.get('nao_lidas', 0),
+                                                    'nao_lidas': nao_lidas}, reparavel=True)
+            v.estados[usuario_id] = {
+                'lidas_ate': lidas_ate,
+                'lidas': sorted(lidas),
+                'nao_lidas': nao_lidas,
+                'ultimo_id': max(estado.get('ultimo_id', 0), maior_caixa)
+            }
+
+    try:
+        with open(NOTIFICACOES_SEQ_FILE, 'r', encoding='utf-8') as f:
+            ultimo_id = json.load(f).get('ultimo_id', 0)
+    except (OSError, ValueError):
+        ultimo_id = 0
+    if ultimo_id < maior:
+        v.registrar("sequencia_notificacoes_atrasada", {'ultimo_id': ultimo_id, 'maior_id': maior}, reparavel=True)
+        v.sequencia = maior
+
+
+def _verificar_comentarios(v: Verificacao, posts: Set[int], usuarios: Set[int]) -> None:
+    """
+    Arquivos de comentários por post: post e autor existentes, ids únicos entre
+    os posts (repetidos ganham id novo), ordem por data, resumo e sequência
+    """
+    if not os.path.isdir(COMENTARIOS_DIR):
+        return
+
+    vistos: Set[int] = set()
+    repetidos = []  # (arquivo, posição, registro)
+    resumos = []    # (post_id, resumo gravado, total, últimos mantidos)
+    maior = 0
+    for nome in sorted(os.listdir(COMENTARIOS_DIR)):
+        if not nome.startswith("post_") or nome.endswith("_resumo.json") or not nome.endswith(".json"):
+            continue
+        try:
+            post_id = int(nome[len("post_"):-len(".json")])
+        except ValueError:
+            continue
+        arquivo = os.path.join(COMENTARIOS_DIR, nome)
+
+        mantidos, ultimos, anterior = 0, deque(maxlen=TAMANHO_PREVIA), None
+        for posicao, comentario in _registros(v, arquivo):
+            id_ = comentario.get('id', 0)
+            if comentario.get('post_id') != post_id:
+                v.registrar("comentario_no_post_errado", {'id': id_, 'post_id': comentario.get('post_id'), 'arquivo': nome})
+            if post_id not in posts or comentario.get('usuario_id') not in usuarios:
+                v.registrar("comentario_orfao", {'comentario_id': id_, 'post_id': post_id,
+                                                 'usuario_id': comentario.get('usuario_id')}, reparavel=True)
+                v.remover_registro(arquivo, posicao)
+                continue
+            ordem = (comentario.get('data', ''), id_)
+            if anterior is not None and ordem < anterior:
+                v.registrar("comentarios_fora_de_ordem", {'id': id_, 'arquivo': nome})
+            anterior = ordem
+            if id_ in vistos:
+                v.registrar("id_duplicado.comentarios", {'id': id_, 'arquivo': nome}, reparavel=True)
+                repetidos.append((arquivo, posicao, comentario))
+            vistos.add(id_)
+            maior = max(maior, id_)
+            mantidos += 1
+            ultimos.append(comentario)
+
+        try:
+            with open(os.path.join(COMENTARIOS_DIR, f"post_{post_id}_resumo.json"), 'r', encoding='utf-8') as f:
+                gravado = json.load(f)
+        except (OSError, ValueError):
+            gravado = {}
+        if arquivo not in v.truncados:
+            resumos.append((post_id, gravado, mantidos, ultimos))
+
+    # Os repetidos ganham ids novos antes de os resumos serem comparados
+    for deslocamento, (arquivo, posicao, comentario) in enumerate(repetidos, start=1):
+        comentario['id'] = maior + deslocamento
+        v.alterar_registro(arquivo, posicao, {'id': comentario['id']})
+    maior += len(repetidos)
+
+    for post_id, gravado, total, ultimos in resumos:
+        resumo = {'total': total, 'ultimos': list(ultimos)}
+        if gravado != resumo:
+            v.registrar("resumo_comentarios_divergente", {'post_id': post_id, 'total_gravado': gravado.get('total'),
+                                                          'total': total}, reparavel=True)
+            v.resumos[post_id] = resumo
+
+    try:
+        with open(COMENTARIOS_SEQ_FILE, 'r', encoding='utf-8') as f:
+            ultimo_id = json.load(f).get('ultimo_id', 0)
+    except (OSError, ValueError):
+        ultimo_id = 0
+    if ultimo_id < maior:
+        v.registrar("sequencia_comentarios_atrasada", {'ultimo_id': ultimo_id, 'maior_id': maior}, reparavel=True)
+        v.sequencia_comentarios = maior
+
+
+def _verificar_fotos(v: Verificacao, diretorio: str, referenciadas: Set[str]) -> None:
+    """Arquivos de foto que nenhum registro referencia"""
+    if not os.path.isdir(diretorio):
+        return
+    for nome in sorted(os.listdir(diretorio)):
+        caminho = os.path.join(diretorio, nome)
+        if os.path.isfile(caminho) and nome not in referenciadas:
+            v.registrar("foto_sem_dono", {'arquivo': caminho}, reparavel=True)
+            v.fotos_orfas.append(caminho)
+
+
+# ============= REPARO =============
+
+def reparar(v: Verificacao) -> Dict[str, int]:
+    """
+    Aplica os reparos seguros planejados pela verificação: uma gravação por coleção,
+    fotos sem dono movidas para data/orfas. Retorna quantas correções por item.
+    Com algum arquivo truncado nada é aplicado: as referências entre coleções
+    (órfãos, vagas, contadores) não são confiáveis até ele ser restaurado
+    """
+    reparos = {}
+    if v.truncados:
+        return reparos
+
+    for arquivo in sorted((set(v.remover) | set(v.alterar)) - v.truncados):
+        remover, alterar = v.remover.get(arquivo, set()), v.alterar.get(arquivo, {})
+        if _regravar(arquivo, remover, alterar) is None:
+            v.registrar("arquivo_truncado", {'arquivo': os.path.relpath(arquivo, DATA_DIR)})
+            continue
+        reparos[os.path.basename(arquivo)] = len(remover) + len(set(alterar) - remover)
+
+    for usuario_id, estado in v.estados.items():
+        arquivo = os.path.join(NOTIFICACOES_DIR, f"usuario_{usuario_id}_estado.json")
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            json.dump(estado, f, ensure_ascii=False, indent=2)
+        invalidar(arquivo)
+    if v.estados:
+        reparos['notificacoes/*_estado.json'] = len(v.estados)
+
+    if v.sequencia is not None:
+        with open(NOTIFICACOES_SEQ_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'ultimo_id': v.sequencia}, f, ensure_ascii=False, indent=2)
+        invalidar(NOTIFICACOES_SEQ_FILE)
+        reparos['notificacoes/sequencia.json'] = 1
+
+    for post_id, resumo in v.resumos.items():
+        arquivo = os.path.join(COMENTARIOS_DIR, f"post_{post_id}_resumo.json")
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            json.dump(resumo, f, ensure_ascii=False, indent=2)
+        invalidar(arquivo)
+    if v.resumos:
+        reparos['comentarios/*_resumo.json'] = len(v.resumos)
+
+    if v.sequencia_comentarios is not None:
+        with open(COMENTARIOS_SEQ_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'ultimo_id': v.sequencia_comentarios}, f, ensure_ascii=False, indent=2)
+        invalidar(COMENTARIOS_SEQ_FILE)
+        reparos['comentarios/sequencia.json'] = 1
+
+    for caminho in v.fotos_orfas:
+        destino = os.path.join(ORFAS_DIR, os.path.relpath(caminho, DATA_DIR))
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        shutil.move(caminho, destino)
+    if v.fotos_orfas:
+        reparos['fotos movidas para data/orfas'] = len(v.fotos_orfas)
+
+    return reparos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica (e repara) a integridade dos dados em data/")
+    parser.add_argument("--reparar", action="store_true", help="aplica os reparos seguros")
+    parser.add_argument("--json", help="grava o relatório neste arquivo")
+    args = parser.parse_args()
+
+    v = verificar(compactar_curtidas=args.reparar)
+    relatorio = v.relatorio()
+
+    if not relatorio['violacoes']:
+        print("Nenhuma violação encontrada")
+    for nome, dados in sorted(relatorio['violacoes'].items()):
+        marca = "reparável" if dados['reparavel'] else "manual"
+        print(f"  {nome:<36} {dados['total']:>7}  ({marca})  ex: {json.dumps(dados['exemplos'][:2], ensure_ascii=False)}")
+
+    if args.reparar and relatorio['reparaveis']:
+        relatorio['reparos'] = reparar(v)
+        if v.truncados:
+            print("\nNenhum reparo aplicado: restaure os arquivos truncados primeiro")
+        else:
+            print("\nReparos aplicados:")
+            for item, total in relatorio['reparos'].items():
+                print(f"  {item:<36} {total:>7}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+
+    # Código 1 se sobrou algo por corrigir
+    pendentes = relatorio['total'] - (relatorio['reparaveis'] if args.reparar else 0)
+    sys.exit(1 if pendentes else 0)
+
+
+if __name__ == "__main__":
+    main()
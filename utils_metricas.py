@@ -0,0 +1,276 @@
+"""
+Métricas de desempenho
+Contadores, medidores e histogramas de latência em memória (por processo),
+preenchidos pelas funções de armazenamento, pelos carregadores de imagem,
+pela criação de notificações e pela renderização das páginas. As métricas
+saem no formato de texto do Prometheus, por um endpoint HTTP local
+(JOGOFACIL_METRICAS_PORTA) ou num arquivo regravado periodicamente
+(JOGOFACIL_METRICAS_ARQUIVO)
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils_cache import estatisticas_cache
+
+
+# Limites dos baldes dos histogramas (segundos)
+BALDES_PADRAO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+INTERVALO_GRAVACAO = 15  # segundos entre gravações do arquivo de métricas
+
+DESCRICOES = {
+    'jogofacil_armazenamento_operacoes_total': ('counter', "Leituras e gravações de arquivos JSON"),
+    'jogofacil_armazenamento_bytes_total': ('counter', "Bytes lidos e gravados nos arquivos JSON"),
+    'jogofacil_armazenamento_segundos': ('histogram', "Duração das leituras e gravações de arquivos JSON"),
+    'jogofacil_arquivo_bytes': ('gauge', "Tamanho de cada arquivo na última leitura ou gravação"),
+    'jogofacil_imagem_segundos': ('histogram', "Duração da abertura de imagens"),
+    'jogofacil_notificacoes_segundos': ('histogram', "Duração da criação de notificações"),
+    'jogofacil_pagina_segundos': ('histogram', "Duração da renderização de cada página"),
+    'jogofacil_cache_acertos_total': ('counter', "Acertos do cache de leitura por função"),
+    'jogofacil_cache_faltas_total': ('counter', "Faltas do cache de leitura por função"),
+    'jogofacil_cache_taxa_acerto': ('gauge', "Taxa de acerto do cache de leitura por função"),
+    'jogofacil_cache_entradas': ('gauge', "Entradas guardadas no cache de leitura por função"),
+}
+
+Rotulos = Tuple[Tuple[str, str], ...]
+
+_contadores: Dict[Tuple[str, Rotulos], float] = {}
+_medidores: Dict[Tuple[str, Rotulos], float] = {}
+_histogramas: Dict[Tuple[str, Rotulos], Dict] = {}  # -> {'baldes': [...], 'soma': float, 'contagem': int}
+_trava = threading.Lock()
+
+_servidor: Optional[ThreadingHTTPServer] = None
+_gravador: Optional[threading.Thread] = None
+_trava_exportacao = threading.Lock()
+
+
+# ============= REGISTRO =============
+
+def _chave(nome: str, rotulos: Dict[str, str]) -> Tuple[str, Rotulos]:
+    return (nome, tuple(sorted((k, str(v)) for k, v in rotulos.items())))
+
+
+def incrementar(nome: str, valor: float = 1, **rotulos) -> None:
+    """Soma valor a um contador"""
+    chave = _chave(nome, rotulos)
+    with _trava:
+        _contadores[chave] = _contadores.get(chave, 0) + valor
+
+
+def definir(nome: str, valor: float, **rotulos) -> None:
+    """Define o valor atual de um medidor"""
+    with _trava:
+        _medidores[_chave(nome, rotulos)] = valor
+
+
+def observar(nome: str, segundos: float, **rotulos) -> None:
+    """Registra uma duração num histograma"""
+    chave = _chave(nome, rotulos)
+    with _trava:
+        histograma = _histogramas.get(chave)
+        if histograma is None:
+            histograma = {'baldes': [0] * len(BALDES_PADRAO), 'soma': 0.0, 'contagem': 0}
+            _histogramas[chave] = histograma
+        for i, limite in enumerate(BALDES_PADRAO):
+            if segundos <= limite:
+                histograma['baldes'][i] += 1
+        histograma['soma'] += segundos
+        histograma['contagem'] += 1
+
+
+@contextmanager
+def cronometro(nome: str, **rotulos):
+    """Mede a duração do bloco num histograma (também quando o bloco levanta exceção)"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        observar(nome, time.perf_counter() - inicio, **rotulos)
+
+
+def medido(nome: str, **rotulos) -> Callable:
+    """Decora uma função para medir a duração de cada chamada num histograma"""
+    def decorador(funcao: Callable) -> Callable:
+        @wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with cronometro(nome, **rotulos):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+def zerar_metricas() -> None:
+    """Descarta todas as métricas registradas"""
+    with _trava:
+        _contadores.clear()
+        _medidores.clear()
+        _histogramas.clear()
+
+
+# ============= ARMAZENAMENTO =============
+
+def colecao_do_arquivo(arquivo: str) -> str:
+    """Nome da coleção de um arquivo; as caixas de notificações e os comentários por post ficam agrupados"""
+    partes = os.path.normpath(arquivo).split(os.sep)
+    for pasta in ('notificacoes', 'comentarios'):
+        if pasta in partes[:-1]:
+            return f"{pasta}/" + ("sequencia.json" if partes[-1] == "sequencia.json" else "*")
+    return partes[-1]
+
+
+def medir_armazenamento(operacao: str) -> Callable:
+    """
+    Decora carregar_json/salvar_json (operacao 'carregar' ou 'salvar'):
+    conta as chamadas e os bytes, mede a duração e guarda o tamanho do arquivo
+    """
+    def decorador(funcao: Callable) -> Callable:
+        @wraps(funcao)
+        def envolvida(arquivo: str, *args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(arquivo, *args, **kwargs)
+            finally:
+                duracao = time.perf_counter() - inicio
+                colecao = colecao_do_arquivo(arquivo)
+                try:
+                    tamanho = os.path.getsize(arquivo)
+                except OSError:
+                    tamanho = 0
+                incrementar('jogofacil_armazenamento_operacoes_total', operacao=operacao, colecao=colecao)
+                incrementar('jogofacil_armazenamento_bytes_total', tamanho, operacao=operacao, colecao=colecao)
+                observar('jogofacil_armazenamento_segundos', duracao, operacao=operacao, colecao=colecao)
+                if not colecao.endswith("*"):
+                    definir('jogofacil_arquivo_bytes', tamanho, colecao=colecao)
+        return envolvida
+    return decorador
+
+
+# ============= EXPORTAÇÃO =============
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _formatar_rotulos(rotulos: Rotulos, extra: Optional[Tuple[str, str]] = None) -> str:
+    pares = list(rotulos) + ([extra] if extra else [])
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+def _formatar_numero(valor: float) -> str:
+    if valor == float('inf'):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) and not valor.is_integer() else str(int(valor))
+
+
+def _metricas_cache() -> None:
+    """Copia as estatísticas do cache de leitura para as métricas"""
+    for funcao, estado in estatisticas_cache().items():
+        with _trava:
+            _contadores[_chave('jogofacil_cache_acertos_total', {'funcao': funcao})] = estado['acertos']
+            _contadores[_chave('jogofacil_cache_faltas_total', {'funcao': funcao})] = estado['faltas']
+            _medidores[_chave('jogofacil_cache_taxa_acerto', {'funcao': funcao})] = estado['taxa_acerto']
+            _medidores[_chave('jogofacil_cache_entradas', {'funcao': funcao})] = estado['entradas']
+
+
+def exportar_prometheus() -> str:
+    """Todas as métricas no formato de texto do Prometheus (versão 0.0.4)"""
+    _metricas_cache()
+
+    with _trava:
+        series: Dict[str, List[str]] = {}
+        for (nome, rotulos), valor in sorted(_contadores.items()):
+            series.setdefault(nome, []).append(f"{nome}{_formatar_rotulos(rotulos)} {_formatar_numero(valor)}")
+        for (nome, rotulos), valor in sorted(_medidores.items()):
+            series.setdefault(nome, []).append(f"{nome}{_formatar_rotulos(rotulos)} {_formatar_numero(valor)}")
+        for (nome, rotulos), histograma in sorted(_histogramas.items()):
+            linhas = series.setdefault(nome, [])
+            for limite, total in zip(BALDES_PADRAO, histograma['baldes']):
+                linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos, ('le', str(limite)))} {total}")
+            linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos, ('le', '+Inf'))} {histograma['contagem']}")
+            linhas.append(f"{nome}_sum{_formatar_rotulos(rotulos)} {_formatar_numero(histograma['soma'])}")
+            linhas.append(f"{nome}_count{_formatar_rotulos(rotulos)} {histograma['contagem']}")
+
+    saida = []
+    for nome in sorted(series):
+        tipo, descricao = DESCRICOES.get(nome, ('untyped', None))
+        if descricao:
+            saida.append(f"# HELP {nome} {descricao}")
+        saida.append(f"# TYPE {nome} {tipo}")
+        saida.extend(series[nome])
+    return "\n".join(saida) + "\n"
+
+
+def gravar_metricas(arquivo: str) -> bool:
+    """Grava as métricas num arquivo (troca atômica, para o leitor nunca ver o arquivo pela metade)"""
+    temporario = f"{arquivo}.tmp"
+    try:
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write(exportar_prometheus())
+        os.replace(temporario, arquivo)
+        return True
+    except OSError:
+        return False
+
+
+class _TratadorMetricas(BaseHTTPRequestHandler):
+    """Responde GET /metrics com as métricas"""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        corpo = exportar_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass  # Sem log a cada coleta
+
+
+def iniciar_servidor_metricas(porta: int, endereco: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics numa thread (uma vez por processo)"""
+    global _servidor
+
+    with _trava_exportacao:
+        if _servidor is None:
+            _servidor = ThreadingHTTPServer((endereco, porta), _TratadorMetricas)
+            threading.Thread(target=_servidor.serve_forever, name="metricas-http", daemon=True).start()
+        return _servidor
+
+
+def iniciar_gravacao_metricas(arquivo: str, intervalo: float = INTERVALO_GRAVACAO) -> None:
+    """Regrava o arquivo de métricas periodicamente numa thread (uma vez por processo)"""
+    global _gravador
+
+    def gravar():
+        while True:
+            gravar_metricas(arquivo)
+            time.sleep(intervalo)
+
+    with _trava_exportacao:
+        if _gravador is None:
+            _gravador = threading.Thread(target=gravar, name="metricas-arquivo", daemon=True)
+            _gravador.start()
+
+
+def iniciar_exportacao() -> None:
+    """Liga a exportação configurada nas variáveis JOGOFACIL_METRICAS_PORTA e JOGOFACIL_METRICAS_ARQUIVO"""
+    porta = os.environ.get("JOGOFACIL_METRICAS_PORTA")
+    if porta:
+        try:
+            iniciar_servidor_metricas(int(porta))
+        except (ValueError, OSError):
+            pass  # Porta inválida ou ocupada: o app continua sem o endpoint
+
+    arquivo = os.environ.get("JOGOFACIL_METRICAS_ARQUIVO")
+    if arquivo:
+        iniciar_gravacao_metricas(arquivo)
@@ -0,0 +1,159 @@
+"""
+Recomendações de quem seguir
+Combina dois sinais: amigos de amigos (pelo grafo de seguidores) e jogadores
+que estiveram nos mesmos jogos (inscrições aprovadas). As pontuações são
+somadas em vetores esparsos (Counter) e o resultado fica em cache por
+usuário; quando expira, a versão antiga continua sendo servida enquanto uma
+thread recalcula, então a aba Amigos não espera pelo cálculo
+"""
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+from utils import carregar_inscricoes, INSCRICOES_FILE
+from utils_feed import CANAL_SEGUINDO
+from utils_barramento import assinar, EVENTO_REINICIO
+from utils_cache import versao_colecao
+import utils_grafo as grafo
+
+
+# Peso de cada sinal na pontuação e validade das recomendações em cache
+PESO_AMIGO_EM_COMUM = 1
+PESO_JOGO_EM_COMUM = 2
+VALIDADE_RECOMENDACOES = 600  # segundos
+MAX_RECOMENDACOES = 20
+
+_recomendacoes: Dict[int, Dict] = {}  # usuario_id -> {'calculado_em', 'itens'}
+_recalculando: Set[int] = set()
+_trava = threading.Lock()
+
+# Índice de participação: quem jogou em cada jogo e em que jogos cada um jogou
+_jogadores_por_jogo: Dict[int, List[int]] = {}
+_jogos_por_jogador: Dict[int, List[int]] = {}
+_versao_indice: Optional[tuple] = None
+
+
+# ============= ÍNDICE DE PARTICIPAÇÃO =============
+
+def _garantir_indice() -> None:
+    """Remonta o índice de participação se o inscricoes.json mudou"""
+    global _versao_indice
+
+    versao = versao_colecao(INSCRICOES_FILE)
+    if versao == _versao_indice:
+        return
+
+    jogadores_por_jogo: Dict[int, List[int]] = {}
+    jogos_por_jogador: Dict[int, List[int]] = {}
+    for insc in carregar_inscricoes():
+        if insc.get('status') == 'aprovada':
+            jogadores_por_jogo.setdefault(insc['jogo_id'], []).append(insc['jogador_id'])
+            jogos_por_jogador.setdefault(insc['jogador_id'], []).append(insc['jogo_id'])
+
+    with _trava:
+        _jogadores_por_jogo.clear()
+        _jogadores_por_jogo.update(jogadores_por_jogo)
+        _jogos_por_jogador.clear()
+        _jogos_por_jogador.update(jogos_por_jogador)
+        _versao_indice = versao
+
+
+# ============= CÁLCULO =============
+
+def calcular_recomendacoes(usuario_id: int, limite: int = MAX_RECOMENDACOES) -> List[Dict]:
+    """
+    Calcula as recomendações de um usuário (sem cache)
+    Retorna lista com usuario_id, pontuação, amigos e jogos em comum
+    """
+    _garantir_indice()
+
+    seguindo = grafo.ids_seguindo(usuario_id)
+    excluidos = set(seguindo)
+    excluidos.add(usuario_id)
+
+    # Amigos de amigos: quantos dos que eu sigo seguem cada candidato
+    amigos_em_comum = Counter()
+    for amigo_id in seguindo:
+        amigos_em_comum.update(grafo.ids_seguindo(amigo_id))
+
+    # Jogaram comigo: em quantos jogos aprovados estivemos juntos
+    jogos_em_comum = Counter()
+    for jogo_id in _jogos_por_jogador.get(usuario_id, []):
+        jogos_em_comum.update(_jogadores_por_jogo.get(jogo_id, []))
+
+    pontuacao = Counter()
+    for candidato_id, n in amigos_em_comum.items():
+        pontuacao[candidato_id] += n * PESO_AMIGO_EM_COMUM
+    for candidato_id, n in jogos_em_comum.items():
+        pontuacao[candidato_id] += n * PESO_JOGO_EM_COMUM
+
+    for candidato_id in excluidos:
+        pontuacao.pop(candidato_id, None)
+
+    return [
+        {
+            'usuario_id': candidato_id,
+            'pontuacao': pontos,
+            'amigos_em_comum': amigos_em_comum.get(candidato_id, 0),
+            'jogos_em_comum': jogos_em_comum.get(candidato_id, 0)
+        }
+        for candidato_id, pontos in pontuacao.most_common(limite)
+    ]
+
+
+def _recalcular(usuario_id: int) -> None:
+    """Recalcula e guarda as recomendações de um usuário"""
+    try:
+        itens = calcular_recomendacoes(usuario_id)
+        with _trava:
+            _recomendacoes[usuario_id] = {'calculado_em': time.monotonic(), 'itens': itens}
+    finally:
+        with _trava:
+            _recalculando.discard(usuario_id)
+
+
+# ============= CONSULTA =============
+
+def recomendar_usuarios(usuario_id: int, limite: int = 10) -> List[Dict]:
+    """
+    Recomendações de quem seguir para um usuário
+    Só calcula na hora na primeira consulta; depois serve o cache e, se ele
+    tiver expirado, agenda o recálculo em segundo plano
+    """
+    with _trava:
+        guardado = _recomendacoes.get(usuario_id)
+        expirado = guardado is None or time.monotonic() - guardado['calculado_em'] > VALIDADE_RECOMENDACOES
+        agendar = guardado is not None and expirado and usuario_id not in _recalculando
+        if agendar:
+            _recalculando.add(usuario_id)
+
+    if guardado is None:
+        _recalcular(usuario_id)
+        guardado = _recomendacoes.get(usuario_id, {'itens': []})
+    elif agendar:
+        threading.Thread(target=_recalcular, args=(usuario_id,), daemon=True).start()
+
+    # Quem o usuário passou a seguir depois do cálculo sai da lista na hora
+    seguindo = grafo.quais_segue(usuario_id, [i['usuario_id'] for i in guardado['itens']])
+    return [i for i in guardado['itens'] if i['usuario_id'] not in seguindo][:limite]
+
+
+def expirar_recomendacoes(usuario_id: Optional[int] = None) -> None:
+    """Marca as recomendações de um usuário (ou de todos) para recálculo em segundo plano"""
+    with _trava:
+        guardados = _recomendacoes.values() if usuario_id is None else [_recomendacoes.get(usuario_id)]
+        for guardado in guardados:
+            if guardado:
+                guardado['calculado_em'] = float('-inf')
+
+
+def _ao_seguir(evento: Dict) -> None:
+    """Quem segue alguém novo ganha novos amigos de amigos"""
+    if evento == EVENTO_REINICIO:
+        expirar_recomendacoes()
+    else:
+        expirar_recomendacoes(evento['seguidor_id'])
+
+
+assinar(CANAL_SEGUINDO, _ao_seguir)
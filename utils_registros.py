@@ -0,0 +1,248 @@
+"""
+Registros tipados das coleções
+Cada registro (usuário, campo, jogo, inscrição, notificação, post, curtida,
+comentário, seguindo) é um objeto com __slots__ em vez de um dict: ocupa
+menos memória no cache e os campos são lidos como atributos (jogo.status).
+Durante a migração os registros também se comportam como dicionários
+(jogo['status'], jogo.get('serie_id'), {**jogo}), e os status são enums
+que continuam iguais aos textos gravados no JSON ('pendente', 'ativo', ...)
+"""
+from collections.abc import MutableMapping
+from enum import StrEnum
+from typing import Any, Dict, Iterable, Iterator, List
+
+
+_AUSENTE = object()
+_definir = object.__setattr__
+
+
+# ============= STATUS =============
+
+class StatusJogo(StrEnum):
+    ATIVO = 'ativo'
+    CANCELADO = 'cancelado'
+    FINALIZADO = 'finalizado'
+
+
+class StatusInscricao(StrEnum):
+    PENDENTE = 'pendente'
+    APROVADA = 'aprovada'
+    REPROVADA = 'reprovada'
+    CANCELADA = 'cancelada'
+
+
+def _conversor_enum(tipo: type):
+    """Texto gravado -> membro do enum (textos desconhecidos ficam como estão)"""
+    membros = {membro.value: membro for membro in tipo}
+    return lambda valor: membros.get(valor, valor)
+
+
+# ============= REGISTRO BASE =============
+
+class Registro(MutableMapping):
+    """
+    Base dos registros: os campos conhecidos ficam nos __slots__ da subclasse
+    (campo não definido = chave ausente) e chaves desconhecidas num dict à parte.
+    Atribuições por atributo não convertem o status: use o enum (jogo.status = StatusJogo.ATIVO)
+    """
+    __slots__ = ('_extras',)
+
+    ENUMS: Dict[str, type] = {}  # campo -> enum do valor
+    SOMENTE_LEITURA = False
+
+    _CAMPOS: tuple = ()
+    _NOMES: frozenset = frozenset()
+    _CONVERSORES: Dict[str, Any] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._CAMPOS = tuple(cls.__slots__)
+        cls._NOMES = frozenset(cls._CAMPOS)
+        cls._CONVERSORES = {campo: _conversor_enum(tipo) for campo, tipo in cls.ENUMS.items()}
+
+    def __init__(self, **campos):
+        _definir(self, '_extras', None)
+        for chave, valor in campos.items():
+            self._definir_campo(chave, valor)
+
+    @classmethod
+    def de_dict(cls, dados: Dict) -> 'Registro':
+        """
+        Monta o registro a partir de um dict lido do JSON: chave ausente deixa o
+        slot vazio e chaves desconhecidas vão para os extras. Grava direto nos
+        slots, então serve também para os registros somente leitura
+        """
+        registro = object.__new__(cls)
+        _definir(registro, '_extras', None)
+        conversores = cls._CONVERSORES
+        usados = 0
+        for campo in cls._CAMPOS:
+            valor = dados.get(campo, _AUSENTE)
+            if valor is not _AUSENTE:
+                converter = conversores.get(campo)
+                _definir(registro, campo, converter(valor) if converter else valor)
+                usados += 1
+        if usados != len(dados):
+            registro._guardar_extras(dados)
+        return registro
+
+    @classmethod
+    def lista(cls, dados: Iterable[Dict]) -> List['Registro']:
+        """Converte uma lista de dicts lida do JSON"""
+        de_dict = cls.de_dict
+        return [de_dict(d) for d in dados]
+
+    def como_dict(self) -> Dict:
+        """Dict com as chaves na ordem dos campos (formato gravado no JSON)"""
+        dados = {}
+        for campo in self._CAMPOS:
+            valor = getattr(self, campo, _AUSENTE)
+            if valor is not _AUSENTE:
+                dados[campo] = valor
+        if self._extras:
+            dados.update(self._extras)
+        return dados
+
+    def copiar(self, **alteracoes) -> 'Registro':
+        """Cópia rasa, opcionalmente com alguns campos trocados"""
+        copia = object.__new__(type(self))
+        _definir(copia, '_extras', dict(self._extras) if self._extras else None)
+        for campo in self._CAMPOS:
+            valor = getattr(self, campo, _AUSENTE)
+            if valor is not _AUSENTE:
+                _definir(copia, campo, valor)
+        for chave, valor in alteracoes.items():
+            copia._definir_campo(chave, valor)
+        return copia
+
+    __copy__ = copiar
+
+    # ----- Escrita -----
+
+    def _guardar_extras(self, dados: Dict) -> None:
+        for chave, valor in dados.items():
+            if chave not in self._NOMES:
+                self._guardar_extra(chave, valor)
+
+    def _guardar_extra(self, chave: str, valor: Any) -> None:
+        if self._extras is None:
+            _definir(self, '_extras', {})
+        self._extras[chave] = valor
+
+    def _definir_campo(self, chave: str, valor: Any) -> None:
+        if chave in self._NOMES:
+            converter = self._CONVERSORES.get(chave)
+            _definir(self, chave, converter(valor) if converter else valor)
+        else:
+            self._guardar_extra(chave, valor)
+
+    def _checar_escrita(self) -> None:
+        if self.SOMENTE_LEITURA:
+            raise TypeError(f"{type(self).__name__} é somente leitura")
+
+    def __setitem__(self, chave: str, valor: Any) -> None:
+        self._checar_escrita()
+        self._definir_campo(chave, valor)
+
+    def __delitem__(self, chave: str) -> None:
+        self._checar_escrita()
+        if chave in self._NOMES:
+            try:
+                object.__delattr__(self, chave)
+                return
+            except AttributeError:
+                pass
+        elif self._extras and chave in self._extras:
+            del self._extras[chave]
+            return
+        raise KeyError(chave)
+
+    # ----- Leitura (interface de dict) -----
+
+    def __getitem__(self, chave: str) -> Any:
+        if chave in self._NOMES:
+            valor = getattr(self, chave, _AUSENTE)
+            if valor is not _AUSENTE:
+                return valor
+        elif self._extras and chave in self._extras:
+            return self._extras[chave]
+        raise KeyError(chave)
+
+    def get(self, chave: str, padrao: Any = None) -> Any:
+        if chave in self._NOMES:
+            return getattr(self, chave, padrao)
+        return self._extras.get(chave, padrao) if self._extras else padrao
+
+    def __contains__(self, chave: object) -> bool:
+        if chave in self._NOMES:
+            return hasattr(self, chave)
+        return bool(self._extras) and chave in self._extras
+
+    def __iter__(self) -> Iterator[str]:
+        for campo in self._CAMPOS:
+            if hasattr(self, campo):
+                yield campo
+        if self._extras:
+            yield from self._extras
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{k}={v!r}' for k, v in self.items())})"
+
+
+def para_json(valor: Any) -> Any:
+    """Parâmetro default do json.dump: grava registros como dicts"""
+    if isinstance(valor, Registro):
+        return valor.como_dict()
+    raise TypeError(f"Object of type {type(valor).__name__} is not JSON serializable")
+
+
+# ============= REGISTROS DAS COLEÇÕES =============
+
+class Usuario(Registro):
+    __slots__ = ('id', 'login', 'senha', 'telefone', 'nome', 'apelido_jogador', 'foto')
+
+
+class Campo(Registro):
+    """Campo do catálogo (compartilhado entre as sessões, por isso somente leitura)"""
+    __slots__ = ('id', 'nome', 'endereco', 'tipo', 'dimensoes', 'formato', 'jogadores_por_time',
+                 'latitude', 'longitude')
+    SOMENTE_LEITURA = True
+
+    def __setattr__(self, nome: str, valor: Any) -> None:
+        self._checar_escrita()
+
+
+class Jogo(Registro):
+    __slots__ = ('id', 'organizador_id', 'campo_id', 'data', 'hora_inicio', 'hora_fim', 'valor',
+                 'vagas_total', 'vagas_ocupadas', 'status', 'serie_id')
+    ENUMS = {'status': StatusJogo}
+
+
+class Inscricao(Registro):
+    __slots__ = ('id', 'jogo_id', 'jogador_id', 'status', 'data_inscricao', 'fila_espera')
+    ENUMS = {'status': StatusInscricao}
+
+
+class Notificacao(Registro):
+    """Notificação de uma caixa ('lida' só existe nas listagens, não é gravado)"""
+    __slots__ = ('id', 'usuario_id', 'tipo', 'mensagem', 'dados', 'data_criacao', 'lida')
+
+
+class Post(Registro):
+    __slots__ = ('id', 'usuario_id', 'texto', 'foto', 'data_criacao', 'data_edicao')
+
+
+class Curtida(Registro):
+    __slots__ = ('id', 'post_id', 'usuario_id', 'data')
+
+
+class Comentario(Registro):
+    __slots__ = ('id', 'post_id', 'usuario_id', 'texto', 'data')
+
+
+class Seguindo(Registro):
+    __slots__ = ('id', 'seguidor_id', 'seguido_id', 'data_inicio')
+
@@ -0,0 +1,123 @@
+"""
+Contexto da sessão do usuário logado
+Carrega uma vez por sessão o cadastro do usuário, quem ele segue, quem o
+segue, suas inscrições e os posts que curtiu. As funções de escrita publicam
+no barramento o que mudaram e os contextos vivos se atualizam sozinhos, então
+checagens como "estou seguindo?" e "já curti?" viram consultas em conjuntos
+"""
+import threading
+import weakref
+from typing import Dict, List, Optional, Set
+
+from utils import (
+    buscar_usuario_por_id, listar_inscricoes_por_jogador,
+    CANAL_USUARIOS, CANAL_INSCRICOES
+)
+from utils_feed import (
+    listar_ids_seguindo, listar_ids_seguidores, listar_posts_curtidos,
+    CANAL_SEGUINDO, CANAL_CURTIDAS
+)
+from utils_barramento import assinar, EVENTO_REINICIO
+
+
+# Contextos das sessões abertas neste processo; somem junto com a sessão
+_contextos: "weakref.WeakSet[ContextoSessao]" = weakref.WeakSet()
+_trava = threading.Lock()
+
+
+class ContextoSessao:
+    """Retrato do usuário logado e das suas relações, mantido em dia pelos eventos"""
+
+    def __init__(self, usuario_id: int):
+        self.usuario_id = usuario_id
+        self.recarregar()
+        with _trava:
+            _contextos.add(self)
+
+    def recarregar(self) -> None:
+        """Lê novamente tudo do disco (ou do cache de leitura)"""
+        self.usuario: Optional[Dict] = buscar_usuario_por_id(self.usuario_id)
+        self.seguindo: Set[int] = listar_ids_seguindo(self.usuario_id)
+        self.seguidores: Set[int] = listar_ids_seguidores(self.usuario_id)
+        self.posts_curtidos: Set[int] = listar_posts_curtidos(self.usuario_id)
+        self._inscricoes: Optional[List[Dict]] = None
+
+    # ============= CONSULTAS =============
+
+    def segue(self, outro_id: int) -> bool:
+        """Verifica se o usuário logado segue outro usuário"""
+        return outro_id in self.seguindo
+
+    def curtiu(self, post_id: int) -> bool:
+        """Verifica se o usuário logado curtiu um post"""
+        return post_id in self.posts_curtidos
+
+    @property
+    def inscricoes(self) -> List[Dict]:
+        """Inscrições do usuário logado (recarregadas só quando mudam)"""
+        if self._inscricoes is None:
+            self._inscricoes = listar_inscricoes_por_jogador(self.usuario_id)
+        return self._inscricoes
+
+    # ============= EVENTOS =============
+
+    def _ao_seguir(self, evento: Dict) -> None:
+        """Atualiza os conjuntos de seguindo/seguidores"""
+        if evento['seguidor_id'] == self.usuario_id:
+            conjunto, outro_id = self.seguindo, evento['seguido_id']
+        elif evento['seguido_id'] == self.usuario_id:
+            conjunto, outro_id = self.seguidores, evento['seguidor_id']
+        else:
+            return
+
+        if evento['seguindo']:
+            conjunto.add(outro_id)
+        else:
+            conjunto.discard(outro_id)
+
+    def _ao_curtir(self, evento: Dict) -> None:
+        """Atualiza o conjunto de posts curtidos"""
+        if evento['usuario_id'] != self.usuario_id:
+            return
+
+        if evento['curtiu']:
+            self.posts_curtidos.add(evento['post_id'])
+        else:
+            self.posts_curtidos.discard(evento['post_id'])
+
+    def _ao_mudar_inscricoes(self, evento: Dict) -> None:
+        """Descarta as inscrições em memória para relê-las no próximo acesso"""
+        if self.usuario_id in evento.get('jogadores_ids', []):
+            self._inscricoes = None
+
+    def _ao_mudar_usuario(self, evento: Dict) -> None:
+        """Relê o cadastro do usuário logado"""
+        if evento['usuario_id'] == self.usuario_id:
+            self.usuario = buscar_usuario_por_id(self.usuario_id)
+
+
+# ============= DISTRIBUIÇÃO DOS EVENTOS =============
+
+def _repassar(metodo: str, recarregar_no_reinicio: bool = False):
+    """Cria um assinante que repassa o evento a todos os contextos vivos"""
+    def assinante(evento: Dict):
+        if evento == EVENTO_REINICIO and not recarregar_no_reinicio:
+            return
+
+        with _trava:
+            contextos = list(_contextos)
+
+        for contexto in contextos:
+            if evento == EVENTO_REINICIO:
+                contexto.recarregar()  # Eventos podem ter sido perdidos
+            else:
+                getattr(contexto, metodo)(evento)
+
+    return assinante
+
+
+# O reinício do log chega em todos os canais; basta recarregar por um deles
+assinar(CANAL_SEGUINDO, _repassar('_ao_seguir', recarregar_no_reinicio=True))
+assinar(CANAL_CURTIDAS, _repassar('_ao_curtir'))
+assinar(CANAL_INSCRICOES, _repassar('_ao_mudar_inscricoes'))
+assinar(CANAL_USUARIOS, _repassar('_ao_mudar_usuario'))
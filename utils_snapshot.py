@@ -0,0 +1,476 @@
+"""
+Cópias binárias compactas das coleções (snapshots)
+Cada coleção JSON pode ter ao lado um arquivo .snap com os mesmos registros
+em colunas: inteiros (ids, chaves estrangeiras), números, booleanos e datas
+em arrays de tamanho fixo, e textos numa tabela de strings sem repetição
+(cada coluna de texto guarda só o índice). O arquivo é mapeado em memória
+(mmap), então abrir é instantâneo e as páginas são compartilhadas entre os
+processos. O JSON continua sendo a fonte dos dados: um snapshot só é usado
+enquanto o JSON não mudar desde que ele foi gerado, e gravar o JSON apaga o
+snapshot (descartar_snapshot). Mapas antigos são fechados assim que o último
+leitor que os reservou termina
+    python -m utils_snapshot gerar
+    python -m utils_snapshot json data/curtidas.snap /tmp/curtidas.json
+"""
+import argparse
+import json
+import mmap
+import os
+import re
+import threading
+import time
+import weakref
+from array import array
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+_MAGICO = b"JFSNAP01"
+_AUSENTE = object()
+
+# Tipos de coluna: código do array e tamanho de cada valor
+TIPOS_COLUNA = {
+    'q': ('q', 8),  # inteiro de 64 bits
+    'd': ('d', 8),  # número com casas decimais
+    'b': ('b', 1),  # booleano
+    't': ('q', 8),  # data e hora "AAAA-MM-DD HH:MM:SS" em segundos
+    's': ('I', 4),  # texto: índice na tabela de strings
+    'j': ('I', 4),  # qualquer outro valor: JSON na tabela de strings
+}
+_DATA_HORA = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\Z")
+_EPOCA = datetime(1970, 1, 1)
+
+# Pedaços pré-montados para remontar "AAAA-MM-DD HH:MM:SS" rápido (sem strftime)
+_DIAS: Dict[int, str] = {}
+_HORAS_MINUTOS = [f" {h:02d}:{m:02d}:" for h in range(24) for m in range(60)]
+_SEGUNDOS = [f"{s:02d}" for s in range(60)]
+
+_abertos: Dict[str, Tuple[Tuple[int, int], 'Snapshot']] = {}
+_trava = threading.Lock()
+
+
+# ============= CAMINHOS =============
+
+def caminho_snapshot(arquivo_json: str) -> str:
+    """Arquivo .snap correspondente a uma coleção JSON"""
+    return os.path.splitext(arquivo_json)[0] + ".snap"
+
+
+def _carimbo(arquivo: str) -> Optional[Tuple[int, int]]:
+    """Data de modificação e tamanho de um arquivo, para saber se mudou"""
+    try:
+        stat = os.stat(arquivo)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+# ============= GERAÇÃO =============
+
+def _tipo_valor(valor) -> str:
+    if isinstance(valor, bool):
+        return 'b'
+    if isinstance(valor, int) and -(1 << 63) <= valor < (1 << 63):
+        return 'q'
+    if isinstance(valor, float):
+        return 'd'
+    if isinstance(valor, str):
+        return 't' if _DATA_HORA.match(valor) and _segundos(valor) is not None else 's'
+    return 'j'
+
+
+def _segundos(texto: str) -> Optional[int]:
+    """Data e hora em segundos desde 1970, ou None se o texto não voltaria idêntico"""
+    try:
+        data = datetime.fromisoformat(texto)
+    except ValueError:
+        return None
+    return int((data - _EPOCA).total_seconds()) if str(data) == texto else None
+
+
+def _data_hora(segundos: int) -> str:
+    """Inverso de _segundos"""
+    dia, resto = divmod(segundos, 86400)
+    texto_dia = _DIAS.get(dia)
+    if texto_dia is None:
+        texto_dia = _DIAS[dia] = str(_EPOCA.date() + timedelta(days=dia))
+    minuto, segundo = divmod(resto, 60)
+    return texto_dia + _HORAS_MINUTOS[minuto] + _SEGUNDOS[segundo]
+
+
+def _juntar_tipos(atual: Optional[str], novo: str) -> str:
+    """Tipo da coluna que acomoda os dois tipos (texto com data vira texto; o resto, JSON)"""
+    if atual is None or atual == novo:
+        return novo
+    if {atual, novo} == {'s', 't'}:
+        return 's'
+    return 'j'
+
+
+def _alinhar(f) -> None:
+    """Completa o arquivo até um múltiplo de 8 bytes (as colunas são lidas com memoryview.cast)"""
+    resto = f.tell() % 8
+    if resto:
+        f.write(b"\0" * (8 - resto))
+
+
+def gerar_snapshot(arquivo_json: str, destino: Optional[str] = None) -> bool:
+    """
+    Converte uma coleção JSON em snapshot (duas passadas pela coleção, sem
+    carregá-la inteira). Retorna False se o JSON não existe ou não é uma lista
+    """
+    from utils import iterar_json  # importado aqui: utils usa este módulo
+
+    carimbo_origem = _carimbo(arquivo_json)
+    if carimbo_origem is None:
+        return False
+    destino = destino or caminho_snapshot(arquivo_json)
+
+    # 1ª passada: colunas (na ordem em que aparecem), tipos e se podem faltar
+    tipos: Dict[str, Optional[str]] = {}
+    presentes: Dict[str, int] = {}
+    total = 0
+    for registro in iterar_json(arquivo_json, usar_snapshot=False):
+        if not isinstance(registro, dict):
+            return False
+        total += 1
+        for nome, valor in registro.items():
+            tipos[nome] = _juntar_tipos(tipos.get(nome), 'j' if valor is None else _tipo_valor(valor))
+            presentes[nome] = presentes.get(nome, 0) + 1
+
+    # 2ª passada: valores de cada coluna
+    strings: Dict[str, int] = {}
+    colunas = {nome: array(TIPOS_COLUNA[tipo][0]) for nome, tipo in tipos.items()}
+    presenca = {nome: bytearray() for nome in tipos if presentes[nome] < total}
+
+    def indice_string(texto: str) -> int:
+        indice = strings.get(texto)
+        if indice is None:
+            indice = strings[texto] = len(strings)
+        return indice
+
+    for nome in tipos:
+        indice_string(nome)
+
+    for registro in iterar_json(arquivo_json, usar_snapshot=False):
+        for nome, tipo in tipos.items():
+            valor = registro.get(nome, _AUSENTE)
+            if nome in presenca:
+                presenca[nome].append(valor is not _AUSENTE)
+            if valor is _AUSENTE:
+                colunas[nome].append(0)
+            elif tipo == 't':
+                colunas[nome].append(_segundos(valor))
+            elif tipo == 's':
+                colunas[nome].append(indice_string(valor))
+            elif tipo == 'j':
+                colunas[nome].append(indice_string(json.dumps(valor, ensure_ascii=False)))
+            else:
+                colunas[nome].append(valor)
+
+    # Gravação: cabeçalho, diretório de colunas, colunas, tabela de strings
+    tabela = [texto.encode('utf-8') for texto in strings]
+    temporario = destino + ".tmp"
+    with open(temporario, 'wb') as f:
+        f.write(_MAGICO)
+        cabecalho_pos = f.tell()
+        array('q', [0] * 6).tofile(f)
+        diretorio_pos = f.tell()
+        array('q', [0] * 4 * len(tipos)).tofile(f)
+
+        diretorio = array('q')
+        for nome, tipo in tipos.items():
+            _alinhar(f)
+            pos_dados = f.tell()
+            colunas[nome].tofile(f)
+            pos_presenca = -1
+            if nome in presenca:
+                pos_presenca = f.tell()
+                f.write(bytes(presenca[nome]))
+            diretorio.extend([strings[nome], ord(tipo), pos_dados, pos_presenca])
+
+        _alinhar(f)
+        pos_strings = f.tell()
+        deslocamentos = array('q', [0])
+        for texto in tabela:
+            deslocamentos.append(deslocamentos[-1] + len(texto))
+        deslocamentos.tofile(f)
+        f.write(b"".join(tabela))
+
+        f.seek(cabecalho_pos)
+        array('q', [*carimbo_origem, total, len(tipos), len(tabela), pos_strings]).tofile(f)
+        f.seek(diretorio_pos)
+        diretorio.tofile(f)
+
+    os.replace(temporario, destino)
+    return True
+
+
+# ============= LEITURA =============
+
+class Snapshot:
+    """
+    Snapshot mapeado em memória. As colunas são memoryviews sobre o arquivo;
+    os registros (dicts) só são montados quando pedidos. Quem lê deve
+    reservar() antes e liberar() depois: um snapshot descartado só fecha o
+    mapa quando não há mais reservas
+    """
+
+    def __init__(self, arquivo: str):
+        self._reservas = 0
+        self._descartado = False
+        self._trava = threading.Lock()
+        with open(arquivo, 'rb') as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        dados = memoryview(self._mapa)
+        if bytes(dados[:len(_MAGICO)]) != _MAGICO:
+            raise ValueError(f"{arquivo} não é um snapshot")
+
+        cabecalho = dados[len(_MAGICO):len(_MAGICO) + 48].cast('q')
+        mtime_ns, tamanho, self.total, num_colunas, num_strings, pos_strings = cabecalho
+        self.carimbo_origem = (mtime_ns, tamanho)
+
+        fim_deslocamentos = pos_strings + 8 * (num_strings + 1)
+        self._deslocamentos = dados[pos_strings:fim_deslocamentos].cast('q')
+        self._textos = dados[fim_deslocamentos:]
+        self._cache_strings: Dict[int, str] = {}
+
+        inicio = len(_MAGICO) + 48
+        diretorio = dados[inicio:inicio + 32 * num_colunas].cast('q')
+        self._colunas: Dict[str, Tuple[str, memoryview, Optional[memoryview]]] = {}
+        for c in range(num_colunas):
+            nome_idx, tipo, pos_dados, pos_presenca = diretorio[c * 4:c * 4 + 4]
+            tipo = chr(tipo)
+            codigo, tamanho_valor = TIPOS_COLUNA[tipo]
+            valores = dados[pos_dados:pos_dados + tamanho_valor * self.total].cast(codigo)
+            presenca = dados[pos_presenca:pos_presenca + self.total] if pos_presenca >= 0 else None
+            self._colunas[self.string(nome_idx)] = (tipo, valores, presenca)
+
+    def __len__(self) -> int:
+        return self.total
+
+    @property
+    def colunas(self) -> List[str]:
+        return list(self._colunas)
+
+    def string(self, indice: int) -> str:
+        """Texto da tabela de strings (decodificado uma vez e guardado)"""
+        texto = self._cache_strings.get(indice)
+        if texto is None:
+            texto = bytes(self._textos[self._deslocamentos[indice]:self._deslocamentos[indice + 1]]).decode('utf-8')
+            self._cache_strings[indice] = texto
+        return texto
+
+    def coluna(self, nome: str) -> memoryview:
+        """
+        Valores brutos de uma coluna, sem montar registros: ids e números como
+        inteiros/floats, datas em segundos, textos como índices (use string()).
+        Coluna inexistente volta vazia
+        """
+        coluna = self._colunas.get(nome)
+        return coluna[1] if coluna else memoryview(b"").cast('q')
+
+    def _decodificador(self, tipo: str):
+        """Função que converte o valor bruto de uma coluna (None: já é o valor)"""
+        if tipo == 's':
+            return self.string
+        if tipo == 'j':
+            return lambda bruto: json.loads(self.string(bruto))
+        if tipo == 't':
+            return _data_hora
+        if tipo == 'b':
+            return bool
+        return None
+
+    def registro(self, i: int) -> Dict:
+        """Monta o registro da posição i como dict (igual ao do JSON)"""
+        registro = {}
+        for nome, (tipo, valores, presenca) in self._colunas.items():
+            if presenca is None or presenca[i]:
+                decodificar = self._decodificador(tipo)
+                registro[nome] = decodificar(valores[i]) if decodificar else valores[i]
+        return registro
+
+    def __iter__(self) -> Iterator[Dict]:
+        # Percorre as colunas em paralelo (zip), decodificando coluna a coluna
+        nomes, iteradores, opcionais = [], [], False
+        for nome, (tipo, valores, presenca) in self._colunas.items():
+            decodificar = self._decodificador(tipo)
+            iterador = map(decodificar, valores) if decodificar else iter(valores)
+            if presenca is not None:
+                opcionais = True
+                iterador = map(lambda valor, presente: valor if presente else _AUSENTE, iterador, presenca)
+            nomes.append(nome)
+            iteradores.append(iterador)
+
+        for linha in zip(*iteradores):
+            if opcionais:
+                yield {nome: valor for nome, valor in zip(nomes, linha) if valor is not _AUSENTE}
+            else:
+                yield dict(zip(nomes, linha))
+
+    def reservar(self) -> bool:
+        """Impede que o mapa seja fechado durante a leitura. False se já foi descartado"""
+        with self._trava:
+            if self._descartado:
+                return False
+            self._reservas += 1
+            return True
+
+    def liberar(self) -> None:
+        with self._trava:
+            self._reservas -= 1
+            fechar = self._descartado and not self._reservas
+        if fechar:
+            self._fechar_mapa()
+
+    def fechar(self) -> None:
+        """Descarta o snapshot; o mapa fecha agora ou quando a última reserva for liberada"""
+        with self._trava:
+            if self._descartado:
+                return
+            self._descartado = True
+            fechar = not self._reservas
+        if fechar:
+            self._fechar_mapa()
+
+    def _fechar_mapa(self) -> None:
+        self._colunas.clear()
+        self._cache_strings.clear()
+        self._deslocamentos.release()
+        self._textos.release()
+        try:
+            self._mapa.close()
+        except BufferError:
+            pass  # Alguém ainda guarda uma coluna (coluna()); o mapa fecha quando ela for liberada
+
+
+class VisaoSnapshot(Sequence):
+    """
+    Registros de um snapshot como sequência somente leitura, montados sob
+    demanda (o carregar_json devolve isto em vez de uma lista de dicts).
+    Mantém o snapshot reservado enquanto a visão existir
+    """
+
+    def __init__(self, snapshot: Snapshot):
+        # Recebe o snapshot já reservado; a reserva é liberada junto com a visão
+        self._snapshot = snapshot
+        weakref.finalize(self, snapshot.liberar)
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._snapshot.registro(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._snapshot.registro(i)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self._snapshot)
+
+
+def abrir_snapshot(arquivo_json: str) -> Optional[Snapshot]:
+    """
+    Snapshot da coleção, se existir e tiver sido gerado a partir do JSON atual
+    (o mesmo snapshot aberto é reaproveitado enquanto o JSON não mudar).
+    O snapshot de um JSON alterado depois dele é fechado e deixa de ser usado
+    """
+    carimbo_json = _carimbo(arquivo_json)
+    arquivo = caminho_snapshot(arquivo_json)
+    carimbo_snap = _carimbo(arquivo)
+    chave = os.path.abspath(arquivo)
+
+    with _trava:
+        aberto = _abertos.get(chave)
+        if aberto and (aberto[0] != carimbo_snap or aberto[1].carimbo_origem != carimbo_json):
+            del _abertos[chave]
+            aberto[1].fechar()
+            aberto = None
+        if carimbo_json is None or carimbo_snap is None:
+            return None
+
+        if aberto:
+            snapshot = aberto[1]
+        else:
+            try:
+                snapshot = Snapshot(arquivo)
+            except (OSError, ValueError):
+                return None
+            if snapshot.carimbo_origem != carimbo_json:
+                snapshot.fechar()
+                return None
+            _abertos[chave] = (carimbo_snap, snapshot)
+
+    return snapshot
+
+
+def descartar_snapshot(arquivo_json: str) -> None:
+    """Chamado ao gravar uma coleção: fecha e apaga o snapshot, que ficou desatualizado"""
+    arquivo = caminho_snapshot(arquivo_json)
+    with _trava:
+        aberto = _abertos.pop(os.path.abspath(arquivo), None)
+    if aberto:
+        aberto[1].fechar()
+    try:
+        os.remove(arquivo)
+    except OSError:
+        pass
+
+
+def exportar_json(arquivo_snapshot: str, destino: str) -> int:
+    """Converte um snapshot de volta para JSON (formato do salvar_json). Retorna o número de registros"""
+    snapshot = Snapshot(arquivo_snapshot)
+    temporario = destino + ".tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write("[")
+        for i, registro in enumerate(snapshot):
+            texto = json.dumps(registro, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+            f.write(("," if i else "") + "\n  " + texto)
+        f.write("\n]" if len(snapshot) else "]")
+    os.replace(temporario, destino)
+    snapshot.fechar()
+    return len(snapshot)
+
+
+# ============= LINHA DE COMANDO =============
+
+COLECOES_PADRAO = [
+    "usuarios.json", "campos.json", "jogos.json", "inscricoes.json",
+    "posts.json", "curtidas.json", "seguindo.json",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte coleções JSON em snapshots binários e vice-versa")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    gerar = comandos.add_parser("gerar", help="gera os snapshots das coleções em data/")
+    gerar.add_argument("colecoes", nargs="*", default=COLECOES_PADRAO)
+    gerar.add_argument("--diretorio", default="data")
+
+    para_json = comandos.add_parser("json", help="converte um snapshot de volta para JSON")
+    para_json.add_argument("snapshot")
+    para_json.add_argument("destino")
+    args = parser.parse_args()
+
+    if args.comando == "gerar":
+        for nome in args.colecoes:
+            arquivo = os.path.join(args.diretorio, nome)
+            inicio = time.perf_counter()
+            if gerar_snapshot(arquivo):
+                print(f"  {nome:<20} {os.path.getsize(arquivo):>12,} -> {os.path.getsize(caminho_snapshot(arquivo)):>12,} bytes"
+                      f"  ({time.perf_counter() - inicio:.2f}s)")
+            else:
+                print(f"  {nome:<20} ignorado (não existe ou não é uma lista de registros)")
+    else:
+        total = exportar_json(args.snapshot, args.destino)
+        print(f"{total} registros gravados em {args.destino}")
+
+
+if __name__ == "__main__":
+    main()